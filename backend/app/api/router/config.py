@@ -1,6 +1,7 @@
 from app.api.dependencies import get_current_user
 from app.db import get_db
 from app.repositories.config_repo import get_theme_config, upsert_theme_config
+from app.repositories.data_version_repo import bump_data_version, CONFIG_VERSION_NAME
 from app.repositories.placeOfInterest_repo import (
     delete_placeOfInterest,
     get_placeOfInterest,
@@ -63,6 +64,7 @@ async def placeOfInterest_upsert(
     ensure_admin(current)
     await upsert_placeOfInterest(db, payload.model_dump())
     await db.commit()
+    await bump_data_version(db, name=CONFIG_VERSION_NAME)
     return {"success": True, "detail": "Saved"}
 
 
@@ -75,6 +77,7 @@ async def placeOfInterest_delete(
     if not ok:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="PlaceOfInterest not found")
     await db.commit()
+    await bump_data_version(db, name=CONFIG_VERSION_NAME)
     return {"success": True, "detail": "Deleted"}
 
 
@@ -106,6 +109,7 @@ async def theme_config_update(
     ensure_admin(current)
     await upsert_theme_config(db, payload)
     await db.commit()
+    await bump_data_version(db, name=CONFIG_VERSION_NAME)
     cfg = await get_theme_config(db)
     return {"success": True, "detail": "Saved", "data": cfg.model_dump()}
 
@@ -124,6 +128,7 @@ async def theme_logo_upload_base64(
 
     public_url = await handle_logo_data_url(db, payload.image_data)
     await db.commit()
+    await bump_data_version(db, name=CONFIG_VERSION_NAME)
 
     return {
         "success": True,
@@ -1,15 +1,39 @@
+from datetime import date
 from typing import Optional, Set
+import hashlib
 
 
+from app.api.dependencies import get_current_user
+from app.core.geojson import RawJSONResponse, RawJSONStreamingResponse
+from app.core.http_cache import cache_headers, etag_matches, make_etag, not_modified
+from app.core.http_range import ranged_file_response
 from app.db import get_db
+from app.repositories.data_version_repo import CONFIG_VERSION_NAME, current_data_version
 from app.repositories.placeOfInterest_repo import list_placeOfInterest_for_lang
-from app.schemas.choropleth import ChoroplethGranularity, ChoroplethResponse
-from app.schemas.geo import GeoBundle
+from app.schemas.choropleth import (
+    ChoroplethBatchResponse,
+    ChoroplethGranularity,
+    ChoroplethResponse,
+    ChoroplethValuesResponse,
+)
+from app.schemas.geo import GeoBundle, GeoFormat, GeometryDetail, TileLayer
 from app.schemas.placeOfInterest import PlaceOfInterestClientOut
-from app.services.choropleth_service import build_choropleth
+from app.schemas.user import UserPublic
+from app.services.choropleth_batch_service import choropleth_batch_json
+from app.services.choropleth_service import (
+    build_choropleth_cached,
+    choropleth_cache_stats,
+    choropleth_geometry_json,
+    choropleth_response_parts,
+    choropleth_values_response,
+    server_timing_header,
+)
 from app.services.comparison_service import build_area_comparison
-from app.services.geo_service import ALL_LAYERS, get_geo_by_year_selective
-from fastapi import APIRouter, Depends, Query
+from app.services.fgb_service import FGB_MEDIA_TYPE, get_layer_fgb, resolve_fgb_year
+from app.services.geo_service import ALL_LAYERS, get_geo_by_year_parts
+from app.services.geo_static_service import read_manifest
+from app.services.tile_service import get_tile, MAX_TILE_ZOOM, TILE_GRANULARITY, TileValues
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -26,22 +50,134 @@ def _parse_layers(layers_csv: Optional[str]) -> Set[str]:
     return wanted
 
 
-# TODO: ameliorer la vitesse de traitement actuellement entre 3 - 6 secondes
 @router.get("/by_year", response_model=GeoBundle)
 async def geo_by_year(
+    request: Request,
     year: int | None = Query(None, description="Année demandée; défaut = année courante"),
     layers: str | None = Query(None, description="Les couches demandées: country,lakes,cantons,districts,communes"),
     clear_others: bool = Query(
         False, description="Si vrai, met à null les couches non demandées donc si null = modifier dans front"
     ),
+    detail: GeometryDetail = Query("full", description="Simplification: full,high,medium,low"),
+    format: GeoFormat = Query("geojson", description="geojson (une FeatureCollection par couche) ou topojson"),
     db: AsyncSession = Depends(get_db),
 ):
     wanted = _parse_layers(layers)
-    return await get_geo_by_year_selective(db, year, layers=wanted, clear_others=clear_others)
+    version = await current_data_version(db)
+    etag = make_etag("geo_by_year", version, year or date.today().year, sorted(wanted), clear_others, detail, format)
+    headers = cache_headers(etag, "geo_by_year")
+    if etag_matches(request, etag):
+        return not_modified(headers)
+
+    # GeoBundle déjà sérialisé (FeatureCollections assemblées par Postgres) : pas de
+    # re-validation Pydantic, envoyé par morceaux sans concaténer les couches
+    timings: dict[str, float] = {}
+    parts = await get_geo_by_year_parts(
+        db, year, layers=wanted, clear_others=clear_others, detail=detail, format=format, timings=timings
+    )
+    headers["Server-Timing"] = server_timing_header({"timings_ms": timings})
+    return RawJSONStreamingResponse(parts, headers=headers)
+
+
+@router.get("/static/manifest")
+async def geo_static_manifest(request: Request):
+    """
+    Manifest of the pre-compressed layer files exported to /static/geo
+    (layer -> map year -> detail -> gz/br URLs with content-hashed names).
+    Base maps can then be fetched from the static mount without any database work.
+    """
+    body = read_manifest()
+    if body is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Static geo layers not exported")
+
+    etag = make_etag("geo_static_manifest", hashlib.sha256(body).hexdigest())
+    headers = cache_headers(etag, "geo_static_manifest")
+    if etag_matches(request, etag):
+        return not_modified(headers)
+    return RawJSONResponse(content=body, headers=headers)
+
+
+@router.get("/tiles/{layer}/{year}/{z}/{x}/{y}.mvt")
+async def geo_tile(
+    request: Request,
+    layer: TileLayer,
+    year: int,
+    z: int = Path(..., ge=0, le=MAX_TILE_ZOOM),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+    scope: str | None = Query(None, pattern="^(per_survey|global)$", description="Valeurs choroplèthes: scope"),
+    question_uid: int | None = Query(None, description="Valeurs choroplèthes: question"),
+    survey_year: int | None = Query(None, description="Valeurs choroplèthes: année des réponses; défaut = year"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Mapbox Vector Tile of a layer (uid, name, code per feature) for the
+    latest map year <= year. With scope + question_uid, features also carry
+    the choropleth value, value_kind and fill_color.
+    """
+    if x >= 2**z or y >= 2**z:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tile out of range")
+
+    values = None
+    if question_uid is not None or scope is not None:
+        if question_uid is None or scope is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="scope and question_uid go together")
+        if layer not in TILE_GRANULARITY:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"No choropleth values for {layer}")
+        values = TileValues(scope, question_uid, survey_year if survey_year is not None else year)
+
+    version = await current_data_version(db)
+    etag = make_etag("geo_tile", version, layer, year, z, x, y, scope, question_uid, survey_year)
+    headers = cache_headers(etag, "geo_tile")
+    if etag_matches(request, etag):
+        return not_modified(headers)
+
+    body = await get_tile(db, layer, year, z, x, y, values=values)
+    return Response(content=body, media_type="application/vnd.mapbox-vector-tile", headers=headers)
+
+
+@router.get("/layers/{layer}/{year}.fgb")
+async def geo_layer_fgb(
+    request: Request,
+    layer: TileLayer,
+    year: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    FlatGeobuf file of a layer (uid, name, code per feature, WGS84) for the
+    latest map year <= year, with a packed Hilbert R-tree spatial index.
+    Supports HTTP Range requests: clients read the index, then only the
+    features intersecting their bbox.
+    """
+    map_year = await resolve_fgb_year(db, layer, year)
+    if map_year is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No {layer} map for year <= {year}")
+
+    version = await current_data_version(db)
+    etag = make_etag("geo_fgb", version, layer, map_year)
+    headers = cache_headers(etag, "geo_fgb")
+    if etag_matches(request, etag):
+        return not_modified(headers)
+
+    # fichier supprimé entre sa génération et sa lecture (purge d'une version antérieure
+    # du cache) : regénéré une fois
+    for attempt in range(2):
+        path = await get_layer_fgb(db, layer, map_year)
+        if path is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail=f"No {layer} geometry for map year {map_year}"
+            )
+        try:
+            return ranged_file_response(request, path, FGB_MEDIA_TYPE, headers, etag=etag)
+        except FileNotFoundError:
+            if attempt:
+                raise
 
 
 @router.get("/placeOfInterest", response_model=list[PlaceOfInterestClientOut])
 async def get_placeOfInterest_for_map(
+    request: Request,
+    response: Response,
     lang: str = Query("en", description="ISO code de langue, ex: fr, de, it, ro, en"),
     db: AsyncSession = Depends(get_db),
 ):
@@ -49,15 +185,24 @@ async def get_placeOfInterest_for_map(
     Retourne la liste des villes actives avec un nom déjà dans la bonne langue.
     Si aucune ville n'est en DB, renvoie simplement [].
     """
+    version = await current_data_version(db, CONFIG_VERSION_NAME)
+    etag = make_etag("place_of_interest", version, lang)
+    headers = cache_headers(etag, "place_of_interest")
+    if etag_matches(request, etag):
+        return not_modified(headers)
+
+    response.headers.update(headers)
     return await list_placeOfInterest_for_lang(db, lang)
 
 
 @router.get("/choropleth", response_model=ChoroplethResponse)
 async def commune_choropleth(
+    request: Request,
     scope: str = Query(..., pattern="^(per_survey|global)$"),
     question_uid: int = Query(...),
     year: int = Query(...),
     granularity: ChoroplethGranularity = Query("commune"),
+    detail: GeometryDetail = Query("full", description="Simplification: full,high,medium,low"),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -72,29 +217,139 @@ async def commune_choropleth(
         year (int): Year of the data to display.
         granularity (ChoroplethGranularity): Geographic level used for the map
             (e.g. "commune", "district", "canton", or "federal").
+        detail (GeometryDetail): Geometry simplification tier ("full" = original
+            polygons, "low" for a national view).
 
     Returns:
         ChoroplethResponse: GeoJSON FeatureCollection, legend and metadata
         needed to render the choropleth map.
     """
-    fc, legend, meta = await build_choropleth(
+    version = await current_data_version(db)
+    etag = make_etag("choropleth", version, scope, question_uid, year, granularity, detail)
+    headers = cache_headers(etag, "choropleth")
+    if etag_matches(request, etag):
+        return not_modified(headers)
+
+    feats, legend, meta = await build_choropleth_cached(
+        db,
+        scope=scope,
+        question_uid=question_uid,
+        year=year,
+        granularity=granularity,
+        detail=detail,
+    )
+    parts = choropleth_response_parts(
+        question_uid=question_uid,
+        year=year,
+        granularity=granularity,
+        features=feats,
+        legend=legend,
+        years_meta=meta,
+    )
+    return RawJSONStreamingResponse(parts, headers={**headers, "Server-Timing": server_timing_header(meta)})
+
+
+@router.get("/choropleth/values", response_model=ChoroplethValuesResponse)
+async def commune_choropleth_values(
+    request: Request,
+    response: Response,
+    scope: str = Query(..., pattern="^(per_survey|global)$"),
+    question_uid: int = Query(...),
+    year: int = Query(...),
+    granularity: ChoroplethGranularity = Query("commune"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Same as /choropleth but without geometry: only unit_uid -> value,
+    value_kind, fill_color and pattern, plus the legend.
+
+    The polygons come from /choropleth/geometry (granularity, geo_year),
+    which only changes when the geo data is re-imported, so switching
+    question or year only transfers the values.
+    """
+    version = await current_data_version(db)
+    etag = make_etag("choropleth_values", version, scope, question_uid, year, granularity)
+    headers = cache_headers(etag, "choropleth")
+    if etag_matches(request, etag):
+        return not_modified(headers)
+
+    feats, legend, meta = await build_choropleth_cached(
         db,
         scope=scope,
         question_uid=question_uid,
         year=year,
         granularity=granularity,
+        with_geometry=False,
     )
-    return ChoroplethResponse(
+    response.headers.update(headers)
+    response.headers["Server-Timing"] = server_timing_header(meta)
+    return choropleth_values_response(
         question_uid=question_uid,
-        year_requested=year,
+        year=year,
         granularity=granularity,
-        year_geo_districts=meta.get("districts"),
-        year_geo_cantons=meta.get("cantons"),
+        features=feats,
         legend=legend,
-        feature_collection=fc,
+        years_meta=meta,
     )
 
 
+@router.get("/choropleth/geometry")
+async def commune_choropleth_geometry(
+    request: Request,
+    year: int = Query(..., description="geo_year renvoyé par /choropleth/values"),
+    granularity: ChoroplethGranularity = Query("commune"),
+    detail: GeometryDetail = Query("full", description="Simplification: full,high,medium,low"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    GeoJSON FeatureCollection of the units used by the choropleth for a
+    geometry year (properties: level, unit_uid, name, code). Values-free and
+    cacheable; join with /choropleth/values on unit_uid.
+    """
+    version = await current_data_version(db)
+    etag = make_etag("choropleth_geometry", version, granularity, year, detail)
+    headers = cache_headers(etag, "choropleth_geometry")
+    if etag_matches(request, etag):
+        return not_modified(headers)
+
+    body = await choropleth_geometry_json(db, granularity, year, detail=detail)
+    return RawJSONResponse(content=body, headers=headers)
+
+
+@router.get("/choropleth/batch", response_model=ChoroplethBatchResponse)
+async def commune_choropleth_batch(
+    request: Request,
+    question_global_uid: int = Query(...),
+    granularity: ChoroplethGranularity = Query("commune"),
+    include_geometry: bool = Query(False),
+    detail: GeometryDetail = Query("full", description="Simplification: full,high,medium,low"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Values and legend of a global question for every survey year, in one
+    response (same per-year content as /choropleth/values).
+
+    include_geometry=true adds "geometries": geo_year -> FeatureCollection,
+    each map year sent once even when several survey years share it.
+    """
+    version = await current_data_version(db)
+    etag = make_etag("choropleth_batch", version, question_global_uid, granularity, include_geometry, detail)
+    headers = cache_headers(etag, "choropleth")
+    if etag_matches(request, etag):
+        return not_modified(headers)
+
+    body = await choropleth_batch_json(
+        db, question_global_uid, granularity, include_geometry=include_geometry, detail=detail
+    )
+    return RawJSONResponse(content=body, headers=headers)
+
+
+@router.get("/choropleth/cache_stats")
+async def commune_choropleth_cache_stats(_user: UserPublic = Depends(get_current_user)):
+    """Compteurs du cache mémoire des cartes choroplèthes (process courant)."""
+    return choropleth_cache_stats()
+
+
 @router.get("/comparison")
 async def get_area_comparison(
     scope: str = Query(..., pattern="^(per_survey|global)$"),
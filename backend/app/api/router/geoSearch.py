@@ -3,7 +3,7 @@ from typing import Literal
 
 from app.api.dependencies import get_current_user
 from app.db import get_db
-from app.repositories.geo_search_repo import get_geo_point, suggest_geo_locations
+from app.repositories.geo_search_repo import get_geo_location, get_geo_points, suggest_geo_locations
 from app.schemas.placeOfInterest import (
     GeoPointResponse,
     GeoSuggestionResponse,
@@ -60,9 +60,9 @@ async def geo_point(
     """
     Récupère un point géographique représentatif pour une commune, un district ou un canton.
 
-    Pour une commune, le point correspond directement à sa géométrie enregistrée.
-    Pour un district ou un canton, le point est calculé à partir des communes liées,
-    afin d'obtenir une position centrale approximative utilisable dans l'interface.
+    Le point (toujours à l'intérieur de la géométrie) et l'emprise (bbox, pour
+    zoomer sur l'entité) sont précalculés à l'import géo pour la dernière année
+    de carte de l'entité.
 
     Args:
         geo_type: Type d'entité géographique (`commune`, `district` ou `canton`).
@@ -71,16 +71,15 @@ async def geo_point(
         _user: Utilisateur courant authentifié.
 
     Returns:
-        dict: Réponse JSON contenant la latitude et la longitude si disponibles.
+        dict: Réponse JSON contenant la latitude, la longitude et la bbox si disponibles.
     """
-    pos = await get_geo_point(db, geo_type, uid)
-    if not pos:
+    location = await get_geo_location(db, geo_type, uid)
+    if not location:
         return {
             "success": False,
             "detail": f"No geometry for this {geo_type}",
         }
-    lat, lon = pos
-    return {"success": True, "detail": "OK", "data": {"lat": lat, "lon": lon}}
+    return {"success": True, "detail": "OK", "data": location}
 
 
 @router.get("/suggest/public", response_model=PlaceOfInterestSuggestResponse)
@@ -116,11 +115,13 @@ async def suggest_geo_public(
         PlaceOfInterestSuggestResponse: Liste des suggestions publiques avec position.
     """
     rows = await suggest_geo_locations(db, q=q, limit=limit)
+    # points de toutes les suggestions en une requête (ordre de pertinence conservé)
+    points = await get_geo_points(db, rows)
 
     place_of_interest: list[PlaceOfInterestSuggestOut] = []
 
     for row in rows:
-        pos = await get_geo_point(db, row["type"], row["uid"])
+        pos = points.get((row["type"], row["uid"]))
         if not pos:
             continue
 
@@ -1,7 +1,10 @@
+from app.core.http_cache import cache_headers, etag_matches, make_etag, not_modified
 from app.db import get_db
+from app.repositories.data_version_repo import CONFIG_VERSION_NAME, current_data_version
+from app.repositories.question_repo import normalize_lang
 from app.schemas.questions import HomeBootstrap
 from app.services.home_service import get_home_bootstrap
-from fastapi import APIRouter, Depends, Header, Request
+from fastapi import APIRouter, Depends, Header, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -9,7 +12,17 @@ router = APIRouter()
 
 
 @router.get("/bootstrap", response_model=HomeBootstrap)
-async def home_bootstrap(request: Request, db: AsyncSession = Depends(get_db)):
+async def home_bootstrap(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """Returns the initial payload of the home page (surveys + general questions)."""
     lang = request.headers.get("accept-language")
+
+    # surveys/questions (data) + thème (config)
+    data_version = await current_data_version(db)
+    config_version = await current_data_version(db, CONFIG_VERSION_NAME)
+    etag = make_etag("home_bootstrap", data_version, config_version, normalize_lang(lang))
+    headers = cache_headers(etag, "home_bootstrap", vary="Accept-Language")
+    if etag_matches(request, etag):
+        return not_modified(headers)
+
+    response.headers.update(headers)
     return await get_home_bootstrap(db, lang)
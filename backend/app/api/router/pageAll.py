@@ -1,9 +1,20 @@
+from typing import Optional
+
+
 from app.api.dependencies import get_current_user
 from app.db import get_db
-from app.repositories.pageAll_repo import get_page_for_uid, get_pageAll_paginated, suggest_pageAll_prefix
-from app.schemas.pageAll import AllResponse, EntityEnum, FindPageResponse, OrderByEnum, OrderDirEnum, SuggestResponse
+from app.repositories.pageAll_repo import get_pageAll_paginated, locate_uid_page, suggest_pageAll_prefix
+from app.schemas.pageAll import (
+    AllResponse,
+    CountModeEnum,
+    EntityEnum,
+    FindPageResponse,
+    OrderByEnum,
+    OrderDirEnum,
+    SuggestResponse,
+)
 from app.schemas.user import UserPublic
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -17,21 +28,32 @@ async def get_all(
     per_page: int = Query(20, ge=1, le=100),
     order_by: OrderByEnum = Query(OrderByEnum.uid),
     order_dir: OrderDirEnum = Query(OrderDirEnum.asc),
+    cursor: Optional[str] = Query(None, description="next_cursor / prev_cursor d'une réponse précédente"),
+    count_mode: CountModeEnum = Query(CountModeEnum.cached, description="Calcul du total : exact, cached, estimated"),
     db: AsyncSession = Depends(get_db),
     _user: UserPublic = Depends(get_current_user),
 ):
     """
     Endpoint générique : retourne uid / code / name d'une entité donnée,
     avec pagination + tri.
+
+    Pagination par numéro de page (page) ou par curseur (cursor, prioritaire) :
+    next_cursor / prev_cursor (opaques) pointent sur la page suivante /
+    précédente pour le même tri ; une page profonde coûte autant que la première.
     """
-    items, total = await get_pageAll_paginated(
-        db,
-        entity=entity,
-        page=page,
-        per_page=per_page,
-        order_by=order_by,
-        order_dir=order_dir,
-    )
+    try:
+        items, total, total_mode, next_cursor, prev_cursor = await get_pageAll_paginated(
+            db,
+            entity=entity,
+            page=page,
+            per_page=per_page,
+            order_by=order_by,
+            order_dir=order_dir,
+            cursor=cursor,
+            count_mode=count_mode,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     pages = (total + per_page - 1) // per_page
 
     return {
@@ -40,9 +62,12 @@ async def get_all(
         "data": {
             "items": items,
             "total": total,
-            "page": page,
+            "total_mode": total_mode,
+            "page": page if cursor is None else None,
             "per_page": per_page,
             "pages": pages,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
         },
     }
 
@@ -70,24 +95,27 @@ async def find_page(
     per_page: int = 20,
     order_by: OrderByEnum = OrderByEnum.uid,
     order_dir: OrderDirEnum = OrderDirEnum.asc,
+    with_items: bool = Query(False, description="Renvoie aussi le contenu de la page"),
     db: AsyncSession = Depends(get_db),
     _user: UserPublic = Depends(get_current_user),
 ):
     """
     Renvoie la page sur laquelle se trouve un uid donné,
-    en fonction du tri et du per_page.
+    en fonction du tri et du per_page (et son contenu si with_items),
+    en une seule requête.
     """
-    page = await get_page_for_uid(
+    page, items = await locate_uid_page(
         db,
         entity=entity,
         uid=uid,
         order_by=order_by,
         order_dir=order_dir,
         per_page=per_page,
+        with_items=with_items,
     )
 
     return {
         "success": True,
         "detail": "OK",
-        "data": {"page": page},
+        "data": {"page": page, "items": items if with_items else None},
     }
@@ -2,7 +2,8 @@ from app.api.dependencies import get_current_user
 from app.db import get_db
 from app.repositories.pageShow_children_repo import get_children_paginated
 from app.repositories.pageShow_repo import get_by_uid
-from app.schemas.pageAll import EntityEnum
+from app.schemas.geo import GeometryDetail
+from app.schemas.pageAll import CountModeEnum, EntityEnum
 from app.schemas.pageShow import ShowChildrenResponse, ShowInsightsResponse, ShowResponse
 from app.schemas.user import UserPublic
 from app.services.pageShow_insight_service import build_insights
@@ -41,6 +42,7 @@ async def show_children(
     child_key: str,
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
+    count_mode: CountModeEnum = Query(CountModeEnum.cached, description="Calcul du total : exact, cached, estimated"),
     db: AsyncSession = Depends(get_db),
     _user: UserPublic = Depends(get_current_user),
 ):
@@ -57,13 +59,14 @@ async def show_children(
         return {"success": False, "detail": f"Unknown child_key: {child_key}", "data": None}
 
     child_entity = EntityEnum(child.entity)  # ex: "district"
-    items, total = await get_children_paginated(
+    items, total, total_mode = await get_children_paginated(
         db=db,
         child_entity=child_entity,
         child_meta=child,
         parent_uid=uid,
         page=page,
         per_page=per_page,
+        count_mode=count_mode,
     )
     pages = (total + per_page - 1) // per_page if total else 0
 
@@ -76,6 +79,7 @@ async def show_children(
         "data": {
             "items": serialized,
             "total": total,
+            "total_mode": total_mode,
             "page": page,
             "per_page": per_page,
             "pages": pages,
@@ -87,6 +91,7 @@ async def show_children(
 async def show_entity_insights(
     entity: EntityEnum,
     uid: int,
+    detail: GeometryDetail = Query("full", description="Niveau de simplification des géométries de la carte"),
     db: AsyncSession = Depends(get_db),
     _user: UserPublic = Depends(get_current_user),
 ):
@@ -99,7 +104,7 @@ async def show_entity_insights(
             "data": None,
         }
 
-    insights = await build_insights(entity, obj, db)
+    insights = await build_insights(entity, obj, db, detail=detail)
 
     return {
         "success": True,
@@ -0,0 +1,44 @@
+from typing import List, Optional
+
+
+from app.api.dependencies import get_current_user
+from app.db import get_db
+from app.repositories.search_repo import search_all
+from app.schemas.pageAll import EntityEnum
+from app.schemas.search import SearchResponse
+from app.schemas.user import UserPublic
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+router = APIRouter()
+
+
+@router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=2),
+    limit: int = Query(20, ge=1, le=100),
+    entity: Optional[List[EntityEnum]] = Query(None, description="Restreint à ces entités (répétable)"),
+    db: AsyncSession = Depends(get_db),
+    _user: UserPublic = Depends(get_current_user),
+):
+    """
+    Recherche transversale : communes, districts, cantons, enquêtes,
+    questions, catégories et options, classées ensemble par pertinence.
+
+    Plein texte dans chaque langue (fr, de, it, en ; sans accents ni casse,
+    mots racinisés) et recherche approximative (fautes de frappe), sur les
+    noms, codes, libellés et textes localisés, en une requête.
+
+    Args:
+        q: Texte recherché (2 caractères minimum).
+        limit: Nombre maximum de résultats.
+        entity: Entités à inclure (toutes par défaut).
+        db: Session de base de données asynchrone.
+        _user: Utilisateur courant authentifié.
+
+    Returns:
+        dict: Résultats (entity, uid, code, name, score) triés par score.
+    """
+    data = await search_all(db, q=q, limit=limit, entities=entity)
+    return {"success": True, "detail": "OK", "data": data}
@@ -0,0 +1,77 @@
+# Cache mémoire LRU + TTL (par process), borné en nombre d'entrées et en poids.
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import time
+
+
+class LRUTTLCache:
+    """
+    - maxsize : nombre max d'entrées
+    - ttl : durée de vie d'une entrée (secondes)
+    - max_weight : poids total max (ex: octets approximatifs), None = pas de limite
+
+    Les valeurs sont partagées entre appelants : ne pas les modifier.
+    Pas de verrou : utilisé depuis la boucle asyncio (un seul thread).
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_weight: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self._data: "OrderedDict[Hashable, tuple[float, int, Any]]" = OrderedDict()
+        self._weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._pop(key)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, weight: int = 1) -> None:
+        if key in self._data:
+            self._pop(key)
+        if self.max_weight is not None and weight > self.max_weight:
+            return  # trop gros pour le cache
+
+        self._data[key] = (time.monotonic() + self.ttl, weight, value)
+        self._weight += weight
+
+        while len(self._data) > self.maxsize or (self.max_weight is not None and self._weight > self.max_weight):
+            oldest = next(iter(self._data))
+            self._pop(oldest)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._weight = 0
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "weight": self._weight,
+            "maxsize": self.maxsize,
+            "max_weight": self.max_weight,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+        }
+
+    def _pop(self, key: Hashable) -> None:
+        _, weight, _ = self._data.pop(key)
+        self._weight -= weight
@@ -49,6 +49,22 @@ class Settings(BaseSettings):
         # est faite plus bas dans la propriété `CORS_ORIGINS_LIST`.
         return v
 
+    # Caches en mémoire (par process)
+    CHOROPLETH_CACHE_SIZE: int = 128  # nombre max de cartes en cache
+    CHOROPLETH_CACHE_MAX_MB: int = 256  # taille approx. max (géométries comprises)
+    CHOROPLETH_CACHE_TTL_SECONDS: int = 900
+    GEO_TOPOLOGY_CACHE_SIZE: int = 8  # topologies TopoJSON de /geo/by_year
+    GEO_TOPOLOGY_CACHE_TTL_SECONDS: int = 3600
+    # connexions du pool prises en même temps (toutes requêtes) par les couches géo lues en parallèle.
+    # À garder sous pool_size + max_overflow du moteur (5 + 10 par défaut, voir app.db) : le
+    # reste du pool sert les autres requêtes
+    GEO_LAYER_MAX_CONNECTIONS: int = 4
+    COUNT_CACHE_SIZE: int = 1024  # totaux filtrés des listes paginées (mode "cached")
+    COUNT_CACHE_TTL_SECONDS: int = 600
+    COUNT_ESTIMATE_EXACT_BELOW: int = 10000  # mode "estimated" : COUNT exact sous ce nombre de lignes estimé
+    # relecture de data_version (les imports tournent dans un autre process)
+    DATA_VERSION_REFRESH_SECONDS: float = 5.0
+
     # Super admin instance account
     ROOT_EMAIL: str | None = None
     ROOT_PASSWORD: str | None = None
@@ -0,0 +1,110 @@
+# Assemblage GeoJSON "brut".
+# Les géométries sont déjà sérialisées en texte (table geometry_geojson ou
+# ST_AsGeoJSON) : on les insère telles quelles dans la réponse au lieu de
+# faire json.loads -> modèles Pydantic -> re-sérialisation.
+# Les FeatureCollections volumineuses sont assemblées par Postgres
+# (feature_collection_sql) et les réponses envoyées par morceaux
+# (RawJSONStreamingResponse), sans objet Python intermédiaire par feature.
+from typing import Any, AsyncIterator, Iterable, Mapping, Optional
+import json
+
+
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import cast, func, literal, Text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.sql.elements import ColumnElement
+
+
+STREAM_CHUNK_SIZE = 64 * 1024  # caractères par morceau envoyé
+
+
+def dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def feature_json(geometry: str, properties: Mapping[str, Any]) -> str:
+    """Feature GeoJSON dont la géométrie est déjà du JSON (texte)."""
+    return '{"type":"Feature","geometry":' + geometry + ',"properties":' + dumps(properties) + "}"
+
+
+def feature_collection_json(features: Iterable[str]) -> str:
+    """FeatureCollection à partir de Features déjà sérialisées (voir feature_json)."""
+    return '{"type":"FeatureCollection","features":[' + ",".join(features) + "]}"
+
+
+def object_json_parts(fields: Mapping[str, Any], raw_fields: Optional[Mapping[str, Optional[str]]] = None) -> list[str]:
+    """Morceaux de object_json, sans les concaténer (voir RawJSONStreamingResponse)."""
+    members = [dumps(k) + ":" + dumps(v) for k, v in fields.items()]
+    parts = ["{" + ",".join(members)]
+    for k, raw in (raw_fields or {}).items():
+        parts.append(("," if members or len(parts) > 1 else "") + dumps(k) + ":")
+        parts.append(raw if raw is not None else "null")
+    parts.append("}")
+    return parts
+
+
+def object_json(fields: Mapping[str, Any], raw_fields: Optional[Mapping[str, Optional[str]]] = None) -> str:
+    """
+    Objet JSON mêlant des champs "normaux" (sérialisés ici) et des champs
+    déjà sérialisés (raw_fields, insérés tels quels ; None -> null).
+    """
+    return "".join(object_json_parts(fields, raw_fields))
+
+
+def feature_collection_sql(
+    geojson: ColumnElement,
+    properties: Mapping[str, ColumnElement],
+    order_by: Optional[ColumnElement] = None,
+) -> ColumnElement:
+    """
+    Agrégat SQL renvoyant la FeatureCollection complète (texte) : Postgres
+    concatène géométries pré-sérialisées et propriétés (json_build_object),
+    Python ne reçoit qu'une valeur. Les lignes sans géométrie sont ignorées.
+    """
+    props = func.json_build_object(*[x for k, col in properties.items() for x in (literal(k, Text), col)])
+    feature = (
+        literal('{"type":"Feature","geometry":', Text)
+        + geojson
+        + literal(',"properties":', Text)
+        + cast(props, Text)
+        + literal("}", Text)
+    )
+    sep = literal(",", Text)
+    agg = func.string_agg(feature, aggregate_order_by(sep, order_by) if order_by is not None else sep)
+    return (
+        literal('{"type":"FeatureCollection","features":[', Text)
+        + func.coalesce(agg.filter(geojson.isnot(None)), literal("", Text))
+        + literal("]}", Text)
+    )
+
+
+class RawJSONResponse(Response):
+    """Réponse JSON dont le contenu est déjà sérialisé (str/bytes)."""
+
+    media_type = "application/json"
+
+
+async def _utf8_chunks(parts: Iterable[str], size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    buf: list[str] = []
+    n = 0
+    for part in parts:
+        buf.append(part)
+        n += len(part)
+        if n >= size:
+            yield "".join(buf).encode("utf-8")
+            buf, n = [], 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+class RawJSONStreamingResponse(StreamingResponse):
+    """
+    Réponse JSON envoyée par morceaux à partir de fragments déjà sérialisés
+    (itérable de str, éventuellement paresseux) : ni chaîne complète, ni
+    copie en bytes de toute la réponse en mémoire.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, parts: Iterable[str], **kwargs: Any):
+        super().__init__(_utf8_chunks(parts), **kwargs)
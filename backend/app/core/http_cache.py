@@ -0,0 +1,57 @@
+# Cache HTTP : ETag forts + If-None-Match (304) + Cache-Control par route.
+# L'ETag dérive d'une version (data_version) et des paramètres de la requête :
+# il est vérifié AVANT de calculer la réponse, un 304 ne coûte donc rien.
+from typing import Any, Optional
+import hashlib
+
+
+from fastapi import Request, Response
+
+
+# Politiques Cache-Control par route
+CACHE_CONTROL = {
+    # dépend des réponses (edit/delete/import) : toujours revalider
+    "choropleth": "public, no-cache",
+    # géométrie d'une année de carte : ETag lié à data_version, revalidée (304) à chaque usage
+    "choropleth_geometry": "public, no-cache",
+    "geo_by_year": "public, max-age=300, must-revalidate",
+    "geo_tile": "public, max-age=300, must-revalidate",
+    "geo_fgb": "public, max-age=300, must-revalidate",
+    # fichiers nommés par leur contenu : jamais modifiés, seulement remplacés
+    "geo_static": "public, max-age=31536000, immutable",
+    "geo_static_manifest": "public, no-cache",
+    "place_of_interest": "public, no-cache",
+    "home_bootstrap": "public, no-cache",
+}
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag fort (entre guillemets) à partir de la route, des versions et des paramètres."""
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True si l'en-tête If-None-Match de la requête contient etag (ou *)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match : comparaison faible (W/"x" == "x")
+        if candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def cache_headers(etag: str, route: str, vary: Optional[str] = None) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL[route]}
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
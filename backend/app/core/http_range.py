@@ -0,0 +1,73 @@
+# Requêtes HTTP Range (RFC 9110) sur un fichier du disque : 206 + Content-Range
+# pour une plage unique, 416 si elle est hors du fichier. Les clients
+# FlatGeobuf / COG lisent l'en-tête puis seulement les octets utiles.
+# Plusieurs plages (multipart/byteranges) ou un If-Range périmé : fichier entier.
+from pathlib import Path
+from typing import Optional
+import re
+
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    (début, fin incluse) d'une plage unique "bytes=a-b", "bytes=a-" ou
+    "bytes=-n" ; None si l'en-tête n'est pas géré ou invalide (le fichier
+    entier est servi). ValueError si la plage commence après la fin du fichier.
+    """
+    m = _RANGE_RE.match(header.strip())
+    if not m or m.group(1) == m.group(2) == "":
+        return None
+    first, last = m.group(1), m.group(2)
+    if first == "":
+        # suffixe : les n derniers octets
+        n = int(last)
+        if n == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(size - n, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        # plage invalide (fin avant le début) : en-tête ignoré
+        return None
+    if start >= size:
+        raise ValueError("unsatisfiable range")
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def ranged_file_response(
+    request: Request,
+    path: Path,
+    media_type: str,
+    headers: dict[str, str],
+    etag: Optional[str] = None,
+) -> Response:
+    """Fichier entier (200) ou plage demandée (206) ; headers : ETag / Cache-Control de la route."""
+    headers = {**headers, "Accept-Ranges": "bytes"}
+    size = path.stat().st_size
+    header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if not header or (if_range is not None and if_range != etag):
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    try:
+        byte_range = parse_range(header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    with path.open("rb") as f:
+        f.seek(start)
+        data = f.read(end - start + 1)
+    return Response(
+        content=data,
+        status_code=206,
+        media_type=media_type,
+        headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"},
+    )
@@ -13,3 +13,14 @@ LOGO_SUBDIR = Path("uploads") / "logos"
 # Dérivés
 LOGO_UPLOAD_DIR = STATIC_FS_ROOT / LOGO_SUBDIR
 LOGO_PUBLIC_PREFIX = f"{STATIC_URL_ROOT}/{LOGO_SUBDIR.as_posix()}"
+
+# Caches disque (fichiers dérivés de la base, reconstructibles)
+CACHE_FS_ROOT = BASE_DIR / "cache"
+TILE_CACHE_DIR = CACHE_FS_ROOT / "tiles"
+FGB_CACHE_DIR = CACHE_FS_ROOT / "fgb"
+
+# Couches géo pré-compressées (export statique, servies par le montage /static)
+GEO_STATIC_SUBDIR = Path("geo")
+GEO_STATIC_DIR = STATIC_FS_ROOT / GEO_STATIC_SUBDIR
+GEO_STATIC_PUBLIC_PREFIX = f"{STATIC_URL_ROOT}/{GEO_STATIC_SUBDIR.as_posix()}"
+GEO_STATIC_MANIFEST = GEO_STATIC_DIR / "manifest.json"
@@ -0,0 +1,71 @@
+# Montage /static. Les couches géo exportées (static/geo/<nom>.json) n'existent
+# que pré-compressées (.json.br, .json.gz) : une demande de <nom>.json, ou
+# directement d'une variante, est servie dans l'encodage accepté par le client
+# (Accept-Encoding, réponse marquée Vary) avec le type du fichier d'origine ;
+# le serveur ne compresse rien. Sans encodage accepté (br n'est annoncé qu'en
+# HTTPS), la variante gzip est décompressée. Les autres fichiers de /static
+# (uploads, ...) sont servis tels quels, sans Content-Encoding.
+from pathlib import Path
+import gzip
+import stat
+
+
+from app.core.http_cache import CACHE_CONTROL
+from app.core.paths import GEO_STATIC_MANIFEST, GEO_STATIC_SUBDIR
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+import anyio
+
+
+# (Content-Encoding, extension du fichier), par ordre de préférence
+PRECOMPRESSED_VARIANTS = (("br", ".br"), ("gzip", ".gz"))
+JSON_MEDIA_TYPE = "application/json"
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Encodages acceptés d'un en-tête Accept-Encoding (q > 0, "*" compris)."""
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if token and q > 0:
+            accepted.add(token)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        rel = Path(path)
+        if rel.parent != GEO_STATIC_SUBDIR or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+        stem = rel.with_suffix("") if rel.suffix in {ext for _, ext in PRECOMPRESSED_VARIANTS} else rel
+        if stem.suffix != ".json" or stem.name == GEO_STATIC_MANIFEST.name:
+            return await super().get_response(path, scope)
+
+        # couches géo exportées : nom = hash du contenu
+        headers = {"cache-control": CACHE_CONTROL["geo_static"], "vary": "Accept-Encoding"}
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding, ext in PRECOMPRESSED_VARIANTS:
+            if encoding not in accepted and "*" not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, stem.as_posix() + ext)
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers.update({**headers, "content-encoding": encoding, "content-type": JSON_MEDIA_TYPE})
+                return response
+
+        full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, stem.as_posix() + ".gz")
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return await super().get_response(path, scope)
+        body = await anyio.to_thread.run_sync(lambda: gzip.decompress(Path(full_path).read_bytes()))
+        return Response(body, media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,70 @@
+# Cache disque des fichiers géo dérivés de la base : tuiles vectorielles (MVT)
+# et couches FlatGeobuf.
+# Arborescence : <racine>/<version des données>/<clé>/<z>/<x>/<y>.mvt
+#                <racine>/<version des données>/<couche>/<année>.fgb
+# La version fait partie du chemin : un import ou une édition rend les
+# anciens fichiers inaccessibles, et les dossiers des versions antérieures
+# sont supprimés à la première écriture sous la nouvelle version.
+from pathlib import Path
+from typing import Optional
+import logging
+import os
+import shutil
+import tempfile
+
+
+from app.core.paths import FGB_CACHE_DIR, TILE_CACHE_DIR
+
+
+logger = logging.getLogger(__name__)
+
+
+def tile_path(version: int, key: str, z: int, x: int, y: int, root: Path = TILE_CACHE_DIR) -> Path:
+    """key : chemin relatif couche/année[/valeurs], construit uniquement à partir de paramètres validés."""
+    return root / str(version) / key / str(z) / str(x) / f"{y}.mvt"
+
+
+def fgb_path(version: int, layer: str, map_year: int, root: Path = FGB_CACHE_DIR) -> Path:
+    return root / str(version) / layer / f"{map_year}.fgb"
+
+
+def read_cached_file(path: Path) -> Optional[bytes]:
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def _purge_old_versions(version_dir: Path) -> None:
+    """
+    Supprime les versions antérieures seulement : un worker encore sur une
+    version plus ancienne (data_version relue toutes les quelques secondes)
+    ne doit pas effacer le cache d'un worker déjà passé à la suivante.
+    """
+    version = int(version_dir.name)
+    for sibling in version_dir.parent.iterdir():
+        if sibling.is_dir() and sibling.name.isdigit() and int(sibling.name) < version:
+            shutil.rmtree(sibling, ignore_errors=True)
+            logger.info("Geo file cache: removed stale version %s", sibling.name)
+
+
+def write_cached_file(path: Path, data: bytes, root: Path = TILE_CACHE_DIR) -> None:
+    """Écriture atomique (fichier temporaire + rename) : un lecteur concurrent ne voit jamais de fichier partiel."""
+    version_dir = root / path.relative_to(root).parts[0]
+    if not version_dir.exists():
+        version_dir.mkdir(parents=True, exist_ok=True)
+        _purge_old_versions(version_dir)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        # cache best-effort : le contenu est servi même si l'écriture échoue
+        logger.exception("Geo file cache: cannot write %s", path)
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
@@ -0,0 +1,176 @@
+# Construction TopoJSON : topologie à arcs partagés à partir de géométries GeoJSON.
+# Une frontière commune à plusieurs unités (commune / district / canton / pays)
+# n'est transmise qu'une fois ; les coordonnées sont quantifiées en entiers et
+# les arcs encodés en deltas (spécification TopoJSON 1.0).
+from typing import Any, Iterable, Mapping, Optional
+import math
+
+
+Point = tuple[int, int]
+Ring = list[Point]
+
+
+class _Quantizer:
+    """
+    Grille de pas 10^-precision : les géométries sont déjà arrondies à
+    `precision` décimales (ST_AsGeoJSON), la quantification est donc sans perte.
+    """
+
+    def __init__(self, min_x: float, min_y: float, precision: int):
+        self.k = 10**precision
+        self.x0 = math.floor(min_x * self.k)
+        self.y0 = math.floor(min_y * self.k)
+
+    def point(self, x: float, y: float) -> Point:
+        return round(x * self.k) - self.x0, round(y * self.k) - self.y0
+
+    @property
+    def transform(self) -> dict[str, list[float]]:
+        return {"scale": [1 / self.k, 1 / self.k], "translate": [self.x0 / self.k, self.y0 / self.k]}
+
+
+def _polygons(geometry: Optional[Mapping[str, Any]]) -> list[list[list[list[float]]]]:
+    """Polygon / MultiPolygon -> liste de polygones (listes d'anneaux)."""
+    if not geometry:
+        return []
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+def _bbox(geometries: Iterable[Optional[Mapping[str, Any]]]) -> Optional[tuple[float, float]]:
+    min_x = min_y = math.inf
+    for geometry in geometries:
+        for polygon in _polygons(geometry):
+            for ring in polygon:
+                for x, y, *_ in ring:
+                    if x < min_x:
+                        min_x = x
+                    if y < min_y:
+                        min_y = y
+    return None if min_x == math.inf else (min_x, min_y)
+
+
+def _quantize_ring(ring: list[list[float]], q: _Quantizer) -> Optional[Ring]:
+    """Anneau quantifié, sans doublons consécutifs ni point de fermeture ; None si dégénéré."""
+    out: Ring = []
+    for x, y, *_ in ring:
+        p = q.point(x, y)
+        if not out or out[-1] != p:
+            out.append(p)
+    if len(out) > 1 and out[0] == out[-1]:
+        out.pop()
+    return out if len(out) >= 3 else None
+
+
+def _find_junctions(rings: Iterable[Ring]) -> set[Point]:
+    """
+    Jonctions : points visités avec des voisins différents (début/fin d'une
+    portion de frontière partagée). Les anneaux sont découpés en arcs à ces points.
+    """
+    neighbors: dict[Point, tuple[Point, Point]] = {}
+    junctions: set[Point] = set()
+    for ring in rings:
+        n = len(ring)
+        for i, p in enumerate(ring):
+            a, b = ring[i - 1], ring[(i + 1) % n]
+            seen = neighbors.get(p)
+            if seen is None:
+                neighbors[p] = (a, b)
+            elif seen != (a, b) and seen != (b, a):
+                junctions.add(p)
+    return junctions
+
+
+class _ArcIndex:
+    def __init__(self) -> None:
+        self.arcs: list[tuple[Point, ...]] = []
+        self._index: dict[tuple[Point, ...], int] = {}
+
+    def add(self, arc: tuple[Point, ...]) -> int:
+        """Indice de l'arc (~i s'il existe déjà dans l'autre sens)."""
+        i = self._index.get(arc)
+        if i is not None:
+            return i
+        i = self._index.get(arc[::-1])
+        if i is not None:
+            return ~i
+        self._index[arc] = len(self.arcs)
+        self.arcs.append(arc)
+        return len(self.arcs) - 1
+
+    def ring_arcs(self, ring: Ring, junctions: set[Point]) -> list[int]:
+        cuts = [i for i, p in enumerate(ring) if p in junctions]
+        if not cuts:
+            # anneau sans jonction : rotation canonique (plus petit point en tête)
+            # pour retrouver le même anneau parcouru par une autre unité
+            start = ring.index(min(ring))
+            rotated = ring[start:] + ring[:start]
+            return [self.add(tuple(rotated + [rotated[0]]))]
+
+        rotated = ring[cuts[0] :] + ring[: cuts[0]]
+        closed = rotated + [rotated[0]]
+        offsets = [c - cuts[0] for c in cuts] + [len(ring)]
+        return [self.add(tuple(closed[a : b + 1])) for a, b in zip(offsets, offsets[1:])]
+
+
+def _delta_encode(arc: tuple[Point, ...]) -> list[list[int]]:
+    out = [[arc[0][0], arc[0][1]]]
+    px, py = arc[0]
+    for x, y in arc[1:]:
+        out.append([x - px, y - py])
+        px, py = x, y
+    return out
+
+
+def build_topology(
+    layers: Mapping[str, list[tuple[Optional[Mapping[str, Any]], Mapping[str, Any]]]],
+    precision: int,
+) -> dict[str, Any]:
+    """
+    layers : nom d'objet -> [(géométrie GeoJSON (dict), propriétés)].
+    Renvoie une Topology (un GeometryCollection par couche, arcs partagés
+    entre toutes les couches). Seuls Polygon / MultiPolygon sont gérés.
+    """
+    origin = _bbox(g for features in layers.values() for g, _ in features)
+    q = _Quantizer(*(origin or (0.0, 0.0)), precision)
+
+    # 1. quantification : couche -> [(polygones quantifiés, propriétés)]
+    quantized: dict[str, list[tuple[list[list[Ring]], Mapping[str, Any]]]] = {}
+    all_rings: list[Ring] = []
+    for name, features in layers.items():
+        items = []
+        for geometry, props in features:
+            polygons: list[list[Ring]] = []
+            for polygon in _polygons(geometry):
+                rings = [r for r in (_quantize_ring(ring, q) for ring in polygon) if r is not None]
+                if rings:
+                    polygons.append(rings)
+                    all_rings.extend(rings)
+            items.append((polygons, props))
+        quantized[name] = items
+
+    # 2. jonctions puis découpage en arcs dédupliqués
+    junctions = _find_junctions(all_rings)
+    index = _ArcIndex()
+    objects: dict[str, Any] = {}
+    for name, items in quantized.items():
+        geometries = []
+        for polygons, props in items:
+            arcs = [[index.ring_arcs(ring, junctions) for ring in polygon] for polygon in polygons]
+            if not arcs:
+                geometries.append({"type": None, "properties": props})
+            elif len(arcs) == 1:
+                geometries.append({"type": "Polygon", "arcs": arcs[0], "properties": props})
+            else:
+                geometries.append({"type": "MultiPolygon", "arcs": arcs, "properties": props})
+        objects[name] = {"type": "GeometryCollection", "geometries": geometries}
+
+    return {
+        "type": "Topology",
+        "transform": q.transform,
+        "objects": objects,
+        "arcs": [_delta_encode(arc) for arc in index.arcs],
+    }
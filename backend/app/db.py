@@ -1,6 +1,7 @@
 # engine + session async
 from app.core.config import settings
 from app.models import Base
+from app.repositories.text_search_repo import trigram_index_ddl, UNACCENT_FUNCTION_DDL
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession, create_async_engine
 
@@ -31,6 +32,32 @@ async def ping_db():
     async with engine.connect() as conn:
         await conn.execute(text("SELECT 1"))
 
+
 async def ensure_extensions():
     async with engine.begin() as conn:
         await conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent;"))
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+        # unaccent() n'est pas IMMUTABLE : enveloppe indexable (voir text_search_repo)
+        await conn.execute(text(UNACCENT_FUNCTION_DDL))
+
+
+async def ensure_indexes():
+    """
+    Crée les index déclarés par les modèles qui manquent (base créée avant
+    leur ajout : create_all n'est lancé qu'avec -f). Inclut les index GiST
+    des colonnes géométrie (idx_<table>_geometry, déclarés par GeoAlchemy2)
+    et les index trigrammes de la recherche (ix_<table>_<col>_trgm).
+    """
+    async with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                await conn.run_sync(index.create, checkfirst=True)
+        for ddl in trigram_index_ddl():
+            await conn.execute(text(ddl))
+
+
+async def analyze_tables():
+    # statistiques du planificateur à jour après un import massif
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE"))
@@ -1,17 +1,50 @@
+from contextlib import asynccontextmanager
 from pathlib import Path
+import logging
 
 
-from app.api.router import auth, config, delete, edit, export, geo, geoSearch, home, pageAll, pageShow, questions, user
+from app.api.router import (
+    auth,
+    config,
+    delete,
+    edit,
+    export,
+    geo,
+    geoSearch,
+    home,
+    pageAll,
+    pageShow,
+    questions,
+    search,
+    user,
+)
 from app.core.middleware import setup_middlewares
 from app.core.paths import STATIC_FS_ROOT, STATIC_URL_ROOT
-from app.db import get_db
+from app.core.static_files import PrecompressedStaticFiles
+from app.db import get_db, SessionLocal
+from app.repositories.geo_name_index_repo import load_geo_name_index
+from app.repositories.geo_year_index_repo import load_geo_year_index
 from fastapi import Depends, FastAPI
-from fastapi.staticfiles import StaticFiles
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-app = FastAPI(title="IDHEAP Data Hub API")
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Index des années de carte et des noms géographiques chargés au démarrage (sinon au premier appel)
+    try:
+        async with SessionLocal() as session:
+            await load_geo_year_index(session)
+            await load_geo_name_index(session)
+    except Exception:
+        logger.exception("Geo indexes not loaded at startup")
+    yield
+
+
+app = FastAPI(title="IDHEAP Data Hub API", lifespan=lifespan)
 
 setup_middlewares(app)
 
@@ -27,12 +60,13 @@ app.include_router(delete.router, prefix="/delete", tags=["delete"])
 app.include_router(pageShow.router, prefix="/show", tags=["pageShow"])
 app.include_router(edit.router, prefix="/edit", tags=["edit"])
 app.include_router(export.router, prefix="/export", tags=["export"])
+app.include_router(search.router, prefix="/search", tags=["search"])
 
 
 STATIC_FS_ROOT.mkdir(parents=True, exist_ok=True)
 app.mount(
     STATIC_URL_ROOT,
-    StaticFiles(directory=str(STATIC_FS_ROOT)),
+    PrecompressedStaticFiles(directory=str(STATIC_FS_ROOT)),
     name="static",
 )
 
@@ -1,4 +1,5 @@
 from .answer import Answer
+from .answer_aggregate import AnswerAggregate
 from .base import Base
 from .canton import Canton
 from .canton_map import CantonMap
@@ -6,8 +7,11 @@ from .commune import Commune
 from .commune_map import CommuneMap
 from .config import Config
 from .country import Country
+from .data_version import DataVersion
 from .district import District
 from .district_map import DistrictMap
+from .geo_unit_point import GeoUnitPoint
+from .geometry_geojson import GeometryGeoJSON
 from .lake import Lake
 from .lake_map import LakeMap
 from .option import Option
@@ -18,6 +22,7 @@ from .question_global import QuestionGlobal
 from .question_global_option_association import QuestionGlobalOptionAssociation
 from .question_option_association import QuestionOptionAssociation
 from .question_per_survey import QuestionPerSurvey
+from .search_document import SearchDocument
 from .survey import Survey
 from .survey_author import SurveyAuthor
 from .survey_author_association import SurveyAuthorAssociation
@@ -35,14 +40,19 @@ __all__ = [
     "Survey",
     "QuestionPerSurvey",
     "Answer",
+    "AnswerAggregate",
     "Lake",
     "Country",
     "CantonMap",
     "CommuneMap",
     "DistrictMap",
     "LakeMap",
+    "GeometryGeoJSON",
+    "GeoUnitPoint",
+    "SearchDocument",
     "PlaceOfInterest",
     "Config",
+    "DataVersion",
     "QuestionGlobalOptionAssociation",
     "QuestionOptionAssociation",
     "QuestionCategoryOptionAssociation",
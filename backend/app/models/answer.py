@@ -1,13 +1,18 @@
 from typing import Optional
 
 
-from sqlalchemy import CheckConstraint, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import CheckConstraint, ForeignKey, func, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 
 from .base import Base
 
 
+# caractères de value indexés pour le tri de /pageAll : une entrée btree est
+# limitée (~2,7 Ko), une réponse texte libre peut la dépasser
+VALUE_SORT_LENGTH = 256
+
+
 class Answer(Base):
     __tablename__ = "answer"
 
@@ -17,9 +22,19 @@ class Answer(Base):
     question_uid: Mapped[int] = mapped_column(ForeignKey("question_per_survey.uid", ondelete="CASCADE"))
     question: Mapped["QuestionPerSurvey"] = relationship(back_populates="answers")
 
-    commune_uid: Mapped[int] = mapped_column(ForeignKey("commune.uid", ondelete="CASCADE"))
+    commune_uid: Mapped[int] = mapped_column(ForeignKey("commune.uid", ondelete="CASCADE"), index=True)
     commune: Mapped["Commune"] = relationship(back_populates="answers")
 
     value: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
-    __table_args__ = (UniqueConstraint("question_uid", "commune_uid", "year"),)
+    __table_args__ = (
+        UniqueConstraint("question_uid", "commune_uid", "year"),
+        # communes ayant répondu à une (question, année), dans l'ordre de la clé. Pas
+        # d'INCLUDE (value) : une entrée btree est limitée à ~2,7 Ko et une réponse en
+        # texte libre peut la dépasser (échec de l'INSERT) ; value est lue dans la table
+        Index("ix_answer_question_year_commune", "question_uid", "year", "commune_uid"),
+    )
+
+
+# tri par valeur de /pageAll (pagination par clé, rang de /pageAll/find_page) : préfixe borné de value
+Index("ix_answer_value_prefix_uid", func.left(Answer.value, VALUE_SORT_LENGTH), Answer.uid)
@@ -0,0 +1,45 @@
+from typing import List, Optional
+
+
+from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+from .base import Base
+
+
+class AnswerAggregate(Base):
+    """
+    Agrégats pré-calculés des réponses, utilisés par les cartes choroplèthes.
+
+    Une ligne par (question, année, niveau, unité géographique) :
+      - level: "commune" / "district" / "canton" / "federal"
+      - unit_uid: uid de la commune / du district / du canton (0 pour "federal")
+
+    La table est recalculée par les scripts d'import et par /edit et /delete
+    (voir app.repositories.answer_aggregate_repo).
+    """
+
+    __tablename__ = "answer_aggregate"
+
+    question_uid: Mapped[int] = mapped_column(
+        ForeignKey("question_per_survey.uid", ondelete="CASCADE"), primary_key=True
+    )
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    level: Mapped[str] = mapped_column(String(16), primary_key=True)
+    unit_uid: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    total_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cnt_null: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cnt_empty: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cnt_non_empty: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cnt_num: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cnt_distinct: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    avg_num_int: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    mode_text: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+    # meilleure fréquence d'une vraie valeur non vide + valeurs ex-aequo à ce max
+    top_real_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tie_values: Mapped[Optional[List[str]]] = mapped_column(ARRAY(String), nullable=True)
@@ -1,5 +1,5 @@
 from geoalchemy2 import Geometry
-from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy import ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, relationship
 from sqlalchemy.testing.schema import mapped_column
 
@@ -10,6 +10,11 @@ from .base import Base
 
 class CantonMap(Base):
     __tablename__ = "canton_map"
+    __table_args__ = (
+        # unité -> années (fenêtre de la meilleure géométrie), année seule (/geo/by_year)
+        Index("ix_canton_map_canton_uid_year", "canton_uid", "year"),
+        Index("ix_canton_map_year", "year"),
+    )
 
     uid: Mapped[int] = mapped_column(primary_key=True)
     year: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -21,7 +21,7 @@ class Commune(Base):
     name_ro: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     name_en: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
-    district_uid: Mapped[int] = mapped_column(ForeignKey("district.uid", ondelete="CASCADE"))
+    district_uid: Mapped[int] = mapped_column(ForeignKey("district.uid", ondelete="CASCADE"), index=True)
     district: Mapped["District"] = relationship("District", back_populates="communes")
 
     commune_map: Mapped[List["CommuneMap"]] = relationship(
@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+from .base import Base
+
+
+class DataVersion(Base):
+    """
+    Compteur de version des données, incrémenté à chaque import, /edit et
+    /delete. Les caches en mémoire (cartes choroplèthes, ...) l'incluent dans
+    leurs clés : une nouvelle version rend les anciennes entrées inaccessibles.
+    """
+
+    __tablename__ = "data_version"
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
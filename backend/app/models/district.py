@@ -21,7 +21,7 @@ class District(Base):
     name_ro: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     name_en: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
-    canton_uid: Mapped[int] = mapped_column(ForeignKey("canton.uid", ondelete="CASCADE"))
+    canton_uid: Mapped[int] = mapped_column(ForeignKey("canton.uid", ondelete="CASCADE"), index=True)
     canton: Mapped["Canton"] = relationship("Canton", back_populates="districts")
 
     district_map: Mapped[List["DistrictMap"]] = relationship(
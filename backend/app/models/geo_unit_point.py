@@ -0,0 +1,32 @@
+from sqlalchemy import Float, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+from .base import Base
+
+
+class GeoUnitPoint(Base):
+    """
+    Point représentatif (ST_PointOnSurface, toujours à l'intérieur du
+    polygone) et emprise (bbox) de chaque commune / district / canton, par
+    année de carte, en WGS84.
+
+    Remplie à l'import géo (voir app.repositories.geo_unit_point_repo) :
+    positionnement et zoom sur une unité en une lecture indexée.
+    """
+
+    __tablename__ = "geo_unit_point"
+
+    # "commune" / "district" / "canton"
+    level: Mapped[str] = mapped_column(String(16), primary_key=True)
+    unit_uid: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # année de la géométrie (*_map.year) ; la clé (level, unit_uid, year) sert aussi "dernière année"
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    lat: Mapped[float] = mapped_column(Float, nullable=False)
+    lon: Mapped[float] = mapped_column(Float, nullable=False)
+
+    min_lon: Mapped[float] = mapped_column(Float, nullable=False)
+    min_lat: Mapped[float] = mapped_column(Float, nullable=False)
+    max_lon: Mapped[float] = mapped_column(Float, nullable=False)
+    max_lat: Mapped[float] = mapped_column(Float, nullable=False)
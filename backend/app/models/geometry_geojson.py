@@ -0,0 +1,35 @@
+from sqlalchemy import Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+from .base import Base
+
+
+class GeometryGeoJSON(Base):
+    """
+    Géométries pré-sérialisées en GeoJSON (texte), une ligne par ligne de
+    table *_map (ou country), par précision (nombre de décimales) et par
+    niveau de détail ("full" = géométrie d'origine, sinon version simplifiée).
+
+    Remplie à l'import géo (voir app.repositories.geometry_cache_repo) ;
+    les endpoints carte insèrent ce texte directement dans la réponse.
+    """
+
+    __tablename__ = "geometry_geojson"
+
+    # "communes" / "districts" / "cantons" / "lakes" / "country"
+    layer: Mapped[str] = mapped_column(String(16), primary_key=True)
+    precision: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # "full" / "high" / "medium" / "low" (voir geometry_cache_repo.DETAIL_TOLERANCES)
+    detail: Mapped[str] = mapped_column(String(8), primary_key=True, default="full")
+    # uid de la ligne *_map (ou country.uid)
+    map_uid: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # année de la géométrie (0 pour country, non versionné)
+    year: Mapped[int] = mapped_column(Integer, nullable=False)
+    # uid de la commune / du district / du canton / du lac
+    unit_uid: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    geojson: Mapped[str] = mapped_column(Text, nullable=False)
+
+    __table_args__ = (Index("ix_geometry_geojson_layer_year_precision", "layer", "year", "precision", "detail"),)
@@ -28,10 +28,12 @@ class QuestionPerSurvey(Base):
     text_ro: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     text_en: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
-    survey_uid: Mapped[int] = mapped_column(ForeignKey("survey.uid", ondelete="CASCADE"))
+    survey_uid: Mapped[int] = mapped_column(ForeignKey("survey.uid", ondelete="CASCADE"), index=True)
     survey: Mapped["Survey"] = relationship("Survey", back_populates="questions")
 
-    question_global_uid: Mapped[Optional[int]] = mapped_column(ForeignKey("question_global.uid"), nullable=True)
+    question_global_uid: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("question_global.uid"), nullable=True, index=True
+    )
     question_global: Mapped[Optional["QuestionGlobal"]] = relationship(
         "QuestionGlobal", back_populates="questions_linked"
     )
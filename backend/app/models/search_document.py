@@ -0,0 +1,53 @@
+from typing import Optional
+
+
+from sqlalchemy import Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+from .base import Base
+
+
+class SearchDocument(Base):
+    """
+    Document de recherche transversale (/search) : une ligne par commune,
+    district, canton, enquête, question, catégorie et option.
+
+    Un tsvector par langue (textes sans accents, racinisés par la
+    configuration de la langue ; "simple" pour les codes, libellés et le
+    romanche) et le texte complet normalisé pour la recherche trigramme.
+    Dérivée des tables sources (voir app.repositories.search_repo),
+    reconstruite à l'import et après /edit et /delete.
+    """
+
+    __tablename__ = "search_document"
+
+    # EntityEnum
+    entity: Mapped[str] = mapped_column(String(32), primary_key=True)
+    uid: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    code: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+
+    tsv_simple: Mapped[str] = mapped_column(TSVECTOR, nullable=False)
+    tsv_fr: Mapped[str] = mapped_column(TSVECTOR, nullable=False)
+    tsv_de: Mapped[str] = mapped_column(TSVECTOR, nullable=False)
+    tsv_it: Mapped[str] = mapped_column(TSVECTOR, nullable=False)
+    tsv_en: Mapped[str] = mapped_column(TSVECTOR, nullable=False)
+    # lower(f_unaccent(...)) de tous les textes
+    search_text: Mapped[str] = mapped_column(Text, nullable=False)
+
+    __table_args__ = (
+        Index("ix_search_document_tsv_simple", "tsv_simple", postgresql_using="gin"),
+        Index("ix_search_document_tsv_fr", "tsv_fr", postgresql_using="gin"),
+        Index("ix_search_document_tsv_de", "tsv_de", postgresql_using="gin"),
+        Index("ix_search_document_tsv_it", "tsv_it", postgresql_using="gin"),
+        Index("ix_search_document_tsv_en", "tsv_en", postgresql_using="gin"),
+        Index(
+            "ix_search_document_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
@@ -0,0 +1,304 @@
+# Agrégats matérialisés des réponses (table answer_aggregate).
+# Les cartes choroplèthes lisent ces agrégats au lieu de ré-agréger
+# la table answer (btrim + regex + mode) à chaque requête.
+from typing import Any, Iterable, Optional
+
+
+from app.models.answer import Answer
+from app.models.answer_aggregate import AnswerAggregate
+from app.models.canton import Canton
+from app.models.commune import Commune
+from app.models.district import District
+from app.schemas.pageAll import EntityEnum
+from sqlalchemy import and_, cast, delete, func, insert, Integer, literal, literal_column, Numeric, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.selectable import FromClause
+
+
+AGGREGATE_LEVELS = ("commune", "district", "canton", "federal")
+
+# Entités / colonnes dont la modification change les agrégats
+AGGREGATE_ENTITIES = {EntityEnum.answer, EntityEnum.commune, EntityEnum.district, EntityEnum.canton}
+AGGREGATE_COLUMNS = {"value", "year", "question_uid", "commune_uid", "district_uid", "canton_uid"}
+
+Scope = tuple[int, int]  # (question_uid, year)
+Units = dict[str, Optional[set[int]]]  # niveau -> unit_uid à recalculer (None : toutes les unités du niveau)
+
+
+def numeric_regex_col() -> ColumnElement:
+    # Postgres regex
+    return Answer.value.op("~")(r"^[+-]?\d+(\.\d+)?$")
+
+
+def _scope_filter(scopes: Optional[list[Scope]]) -> list[ColumnElement]:
+    if scopes is None:
+        return []
+    return [tuple_(Answer.question_uid, Answer.year).in_(scopes)]
+
+
+def _level_source(level: str) -> tuple[Optional[ColumnElement], FromClause, list[ColumnElement]]:
+    """
+    (colonne gid, from_clause, filtres) pour un niveau d'agrégation.
+    gid = None pour "federal" (une seule ligne par question/année).
+    """
+    if level == "commune":
+        return Answer.commune_uid, Answer.__table__, [Answer.commune_uid.isnot(None)]
+    if level == "district":
+        base = Answer.__table__.join(Commune.__table__, Commune.uid == Answer.commune_uid)
+        return Commune.district_uid, base, [Commune.district_uid.isnot(None)]
+    if level == "canton":
+        base = Answer.__table__.join(Commune.__table__, Commune.uid == Answer.commune_uid).join(
+            District.__table__, District.uid == Commune.district_uid
+        )
+        return District.canton_uid, base, [District.canton_uid.isnot(None)]
+    if level == "federal":
+        return None, Answer.__table__, []
+    raise ValueError(f"Unsupported aggregate level: {level}")
+
+
+def _aggregate_select(level: str, scopes: Optional[list[Scope]] = None, gids: Optional[set[int]] = None) -> Any:
+    """
+    SELECT produisant les lignes answer_aggregate d'un niveau,
+    groupées par (question_uid, year, gid), limitées aux unités gids si fourni.
+    """
+    gid_col, from_clause, gid_filters = _level_source(level)
+    vtrim = func.btrim(Answer.value)
+    is_num = numeric_regex_col()
+    where = [*gid_filters, *_scope_filter(scopes)]
+    if gids is not None and gid_col is not None:
+        where.append(gid_col.in_(sorted(gids)))
+
+    keys = [Answer.question_uid, Answer.year] + ([gid_col] if gid_col is not None else [])
+    gid_out = gid_col if gid_col is not None else literal_column("0", Integer)
+
+    # counts par (question, année, gid, valeur réelle non vide)
+    counts = (
+        select(
+            Answer.question_uid.label("q_uid"),
+            Answer.year.label("year"),
+            gid_out.label("gid"),
+            vtrim.label("v"),
+            func.count().label("n"),
+        )
+        .select_from(from_clause)
+        .where(*where, Answer.value.isnot(None), vtrim != "")
+        .group_by(*keys, vtrim)
+    ).cte(f"{level}_value_counts")
+
+    counts_keys = [counts.c.q_uid, counts.c.year, counts.c.gid]
+
+    # top_real_count + valeurs ex-aequo + nombre de valeurs distinctes par gid
+    top = (
+        select(
+            *counts_keys,
+            func.max(counts.c.n).label("top_real_count"),
+            func.count().label("cnt_distinct"),
+        ).group_by(*counts_keys)
+    ).cte(f"{level}_top_real_count")
+
+    ties = (
+        select(
+            *counts_keys,
+            func.array_agg(func.distinct(counts.c.v)).label("tie_values"),
+        )
+        .select_from(counts)
+        .join(top, and_(top.c.q_uid == counts.c.q_uid, top.c.year == counts.c.year, top.c.gid == counts.c.gid))
+        .where(counts.c.n == top.c.top_real_count)
+        .group_by(*counts_keys)
+    ).cte(f"{level}_ties")
+
+    # agg global par gid (inclut NULL et empty)
+    avg_numeric = func.avg(cast(Answer.value, Numeric)).filter(and_(Answer.value.isnot(None), vtrim != "", is_num))
+    agg = (
+        select(
+            Answer.question_uid.label("q_uid"),
+            Answer.year.label("year"),
+            gid_out.label("gid"),
+            func.count().label("total_rows"),
+            func.count().filter(Answer.value.is_(None)).label("cnt_null"),
+            func.count().filter(and_(Answer.value.isnot(None), vtrim == "")).label("cnt_empty"),
+            func.count().filter(and_(Answer.value.isnot(None), vtrim != "")).label("cnt_non_empty"),
+            func.count().filter(and_(Answer.value.isnot(None), vtrim != "", is_num)).label("cnt_num"),
+            cast(func.round(avg_numeric, 0), Integer).label("avg_num_int"),
+            func.mode().within_group(vtrim).filter(and_(Answer.value.isnot(None), vtrim != "")).label("mode_text"),
+        )
+        .select_from(from_clause)
+        .where(*where)
+        .group_by(*keys)
+    ).cte(f"{level}_agg")
+
+    def _same(t: Any) -> ColumnElement:
+        return and_(t.c.q_uid == agg.c.q_uid, t.c.year == agg.c.year, t.c.gid == agg.c.gid)
+
+    return (
+        select(
+            agg.c.q_uid,
+            agg.c.year,
+            literal(level).label("level"),
+            agg.c.gid,
+            agg.c.total_rows,
+            agg.c.cnt_null,
+            agg.c.cnt_empty,
+            agg.c.cnt_non_empty,
+            agg.c.cnt_num,
+            func.coalesce(top.c.cnt_distinct, 0).label("cnt_distinct"),
+            agg.c.avg_num_int,
+            agg.c.mode_text,
+            func.coalesce(top.c.top_real_count, 0).label("top_real_count"),
+            ties.c.tie_values,
+        )
+        .select_from(agg)
+        .outerjoin(top, _same(top))
+        .outerjoin(ties, _same(ties))
+    )
+
+
+_INSERT_COLUMNS = [
+    "question_uid",
+    "year",
+    "level",
+    "unit_uid",
+    "total_rows",
+    "cnt_null",
+    "cnt_empty",
+    "cnt_non_empty",
+    "cnt_num",
+    "cnt_distinct",
+    "avg_num_int",
+    "mode_text",
+    "top_real_count",
+    "tie_values",
+]
+
+
+async def refresh_answer_aggregates(
+    db: AsyncSession, scopes: Optional[Iterable[Scope]] = None, units: Optional[Units] = None
+) -> None:
+    """
+    Recalcule answer_aggregate.
+    - scopes=None : toutes les (question_uid, year) (imports, script refresh_answer_aggregates)
+    - scopes=[(question_uid, year), ...] : recalcul ciblé
+    - units=None : tous les niveaux ; sinon seulement les niveaux et unités donnés
+
+    Ne commit pas : l'appelant garde la main sur la transaction.
+    """
+    scope_list = None if scopes is None else sorted(set(scopes))
+    if scope_list is not None and not scope_list:
+        return
+
+    for level in AGGREGATE_LEVELS:
+        if units is not None and level not in units:
+            continue
+        gids = units.get(level) if units is not None else None
+        if gids is not None and not gids:
+            continue
+
+        del_stmt = delete(AnswerAggregate).where(AnswerAggregate.level == level)
+        if scope_list is not None:
+            del_stmt = del_stmt.where(tuple_(AnswerAggregate.question_uid, AnswerAggregate.year).in_(scope_list))
+        if gids is not None and level != "federal":
+            del_stmt = del_stmt.where(AnswerAggregate.unit_uid.in_(sorted(gids)))
+        await db.execute(del_stmt)
+        await db.execute(
+            insert(AnswerAggregate).from_select(_INSERT_COLUMNS, _aggregate_select(level, scope_list, gids))
+        )
+
+
+class AggregateTargets:
+    """Agrégats touchés par une écriture : (question, année) et, si units, niveaux / unités."""
+
+    def __init__(self, scopes: set[Scope], units: Optional[Units] = None):
+        self.scopes = scopes
+        self.units = units
+
+
+def aggregates_impacted(entity: EntityEnum, columns: Optional[Iterable[str]] = None) -> bool:
+    """
+    True si une modification de `entity` peut changer les agrégats.
+    columns=None => suppression de lignes (toujours impactant pour ces entités).
+    """
+    if entity not in AGGREGATE_ENTITIES:
+        return False
+    if columns is None:
+        return True
+    return bool(set(columns) & AGGREGATE_COLUMNS)
+
+
+async def answer_scopes(db: AsyncSession, conditions: list[ColumnElement]) -> set[Scope]:
+    """(question_uid, year) des réponses ciblées par les conditions (avant modification)."""
+    stmt = select(Answer.question_uid, Answer.year).where(and_(*conditions)).distinct()
+    return {(int(q), int(y)) for (q, y) in (await db.execute(stmt)).all()}
+
+
+async def _uids(db: AsyncSession, stmt: Any) -> set[int]:
+    return {int(v) for v in (await db.execute(stmt)).scalars() if v is not None}
+
+
+async def aggregate_targets_before_write(
+    db: AsyncSession,
+    *,
+    entity: EntityEnum,
+    conditions: list[ColumnElement],
+    updates: Optional[dict[str, object]] = None,
+) -> AggregateTargets:
+    """
+    Avant /edit ou /delete (updates=None : suppression) : agrégats à recalculer.
+    - answer : (question, année) touchées, avant ET après update, tous niveaux
+    - commune / district / canton : (question, année) des réponses des communes
+      concernées, limitées aux unités dont le rattachement ou les lignes changent
+      (ancien et nouveau district / canton ; communes, districts supprimés et
+      national pour une suppression). Le recalcul complet reste au script
+      refresh_answer_aggregates (imports).
+    """
+    if entity == EntityEnum.answer:
+        scopes_before = await answer_scopes(db, conditions)
+        scopes = set(scopes_before)
+        if updates:
+            for q_uid, year in scopes_before:
+                q_new, year_new = updates.get("question_uid", q_uid), updates.get("year", year)
+                if q_new is not None and year_new is not None:
+                    scopes.add((int(q_new), int(year_new)))
+        return AggregateTargets(scopes)
+
+    deleted = updates is None
+    if entity == EntityEnum.commune:
+        communes = select(Commune.uid).where(and_(*conditions))
+        districts = await _uids(db, select(Commune.district_uid).where(and_(*conditions)))
+        if not deleted and updates.get("district_uid") is not None:
+            districts.add(int(updates["district_uid"]))
+    elif entity == EntityEnum.district:
+        districts = await _uids(db, select(District.uid).where(and_(*conditions)))
+        communes = select(Commune.uid).where(Commune.district_uid.in_(sorted(districts)))
+    elif entity == EntityEnum.canton:
+        cantons = select(Canton.uid).where(and_(*conditions))
+        districts = await _uids(db, select(District.uid).where(District.canton_uid.in_(cantons)))
+        communes = select(Commune.uid).where(Commune.district_uid.in_(sorted(districts)))
+    else:
+        return AggregateTargets(set(), {})
+
+    cantons_before = await _uids(db, select(District.canton_uid).where(District.uid.in_(sorted(districts))))
+    if entity == EntityEnum.district and not deleted and updates.get("canton_uid") is not None:
+        cantons_before.add(int(updates["canton_uid"]))
+
+    scopes = await answer_scopes(db, [Answer.commune_uid.in_(communes)])
+    if not deleted:
+        # commune : rattachement au district (donc au canton) ; district : rattachement au canton
+        units: Units = {"canton": cantons_before}
+        if entity == EntityEnum.commune:
+            units["district"] = districts
+        return AggregateTargets(scopes, units)
+
+    # suppression (ON DELETE CASCADE jusqu'aux réponses) : lignes des unités disparues et niveaux parents
+    units = {
+        "commune": await _uids(db, communes),
+        "district": districts,
+        "canton": cantons_before,
+        "federal": None,
+    }
+    return AggregateTargets(scopes, units)
+
+
+async def refresh_aggregates_after_change(db: AsyncSession, *, targets: AggregateTargets) -> None:
+    """Recalcule les agrégats relevés par aggregate_targets_before_write, après /edit ou /delete."""
+    await refresh_answer_aggregates(db, targets.scopes, targets.units)
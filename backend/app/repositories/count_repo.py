@@ -0,0 +1,133 @@
+# Totaux des listes paginées (/pageAll/all, /show/.../children).
+# Un COUNT(*) exact à chaque page est un parcours complet de answer. Trois modes :
+# - exact : COUNT à chaque appel ;
+# - cached : COUNT exact mémorisé par process. Le total d'une table entière est
+#   maintenu par edit_repo / delete_repo (un update ne change pas le nombre de
+#   lignes, un delete le décrémente et invalide les tables en ON DELETE CASCADE) ;
+#   les totaux filtrés et tout total après un import (autre process) sont
+#   invalidés par data_version ;
+# - estimated : pg_class.reltuples (table entière) ou estimation du
+#   planificateur (EXPLAIN) pour un total filtré ; COUNT exact si l'estimation
+#   est petite (le COUNT ne coûte alors presque rien).
+from typing import Any, Iterable, Optional
+import json
+
+
+from app.core.cache import LRUTTLCache
+from app.core.config import settings
+from app.models import Base
+from app.repositories.data_version_repo import current_data_version
+from app.schemas.pageAll import CountModeEnum
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+
+# table -> (total, data_version au moment du comptage / de la dernière mise à jour)
+_table_totals: dict[str, tuple[int, int]] = {}
+
+# totaux filtrés, clé = (data_version, table, SQL du COUNT)
+_filtered_totals = LRUTTLCache(maxsize=settings.COUNT_CACHE_SIZE, ttl=settings.COUNT_CACHE_TTL_SECONDS)
+
+
+def _count_sql(stmt: Select, dialect: Any = None) -> str:
+    dialect = dialect if dialect is not None else postgresql.dialect()
+    return str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+async def _estimate(db: AsyncSession, table: str, stmt: Optional[Select]) -> Optional[int]:
+    """reltuples pour une table entière, lignes estimées du plan sinon ; None si pas de statistiques."""
+    if stmt is None:
+        res = await db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+        )
+        estimate = res.scalar_one_or_none()
+        # -1 : table jamais analysée (PostgreSQL 14+)
+        return int(estimate) if estimate is not None and estimate >= 0 else None
+
+    # plan de la requête comptée (le COUNT lui-même est estimé à 1 ligne). SQL
+    # envoyé tel quel au driver, compilé pour son dialecte : passé dans text(),
+    # un ":" des valeurs inlinées serait pris pour un paramètre
+    inner = stmt.with_only_columns(literal_column("1"), maintain_column_froms=True)
+    conn = await db.connection()
+    raw = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {_count_sql(inner, conn.dialect)}")).scalar_one()
+    plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+    return int(plan["Plan Rows"])
+
+
+async def _exact(db: AsyncSession, model: Any, stmt: Optional[Select]) -> int:
+    stmt = stmt if stmt is not None else select(func.count()).select_from(model)
+    return int((await db.execute(stmt)).scalar() or 0)
+
+
+async def count_rows(
+    db: AsyncSession,
+    model: Any,
+    stmt: Optional[Select] = None,
+    mode: CountModeEnum = CountModeEnum.cached,
+) -> tuple[int, CountModeEnum]:
+    """
+    Total de model (stmt=None) ou d'un SELECT count(...) filtré sur model.
+    Renvoie (total, mode effectivement utilisé) : "estimated" peut se replier
+    sur "exact" (petite table, pas de statistiques).
+    """
+    table = model.__tablename__
+
+    if mode == CountModeEnum.estimated:
+        estimate = await _estimate(db, table, stmt)
+        if estimate is not None and estimate >= settings.COUNT_ESTIMATE_EXACT_BELOW:
+            return estimate, CountModeEnum.estimated
+        mode = CountModeEnum.exact
+
+    if mode == CountModeEnum.exact:
+        return await _exact(db, model, stmt), CountModeEnum.exact
+
+    version = await current_data_version(db)
+    if stmt is None:
+        cached = _table_totals.get(table)
+        if cached is not None and cached[1] == version:
+            return cached[0], CountModeEnum.cached
+        total = await _exact(db, model, None)
+        _table_totals[table] = (total, version)
+        return total, CountModeEnum.cached
+
+    key = (version, table, _count_sql(stmt))
+    total = _filtered_totals.get(key)
+    if total is None:
+        total = await _exact(db, model, stmt)
+        _filtered_totals.set(key, total)
+    return total, CountModeEnum.cached
+
+
+def _cascade_tables(table: str) -> set[str]:
+    """Tables dont des lignes disparaissent avec celles de table (ON DELETE CASCADE, transitif)."""
+    out: set[str] = set()
+    todo = [table]
+    while todo:
+        parent = todo.pop()
+        for child in Base.metadata.sorted_tables:
+            if child.name in out:
+                continue
+            if any(fk.ondelete == "CASCADE" and fk.column.table.name == parent for fk in child.foreign_keys):
+                out.add(child.name)
+                todo.append(child.name)
+    return out
+
+
+def counts_after_write(table: str, new_version: int, deleted: int = 0, changed: Iterable[str] = ()) -> None:
+    """
+    Reporte les totaux de tables entières sur la nouvelle data_version (rendue
+    par bump_data_version) après un update (deleted=0) ou un delete de
+    `deleted` lignes de table, au lieu de les recompter. Seuls les totaux à
+    jour juste avant l'écriture sont reportés ; ceux des tables touchées par
+    cascade ou listées dans changed (agrégats recalculés, ...) sont oubliés.
+    """
+    dropped = set(changed) | (_cascade_tables(table) if deleted else set())
+    for name, (total, version) in list(_table_totals.items()):
+        if version != new_version - 1 or name in dropped:
+            del _table_totals[name]
+        elif name == table:
+            _table_totals[name] = (max(total - deleted, 0), new_version)
+        else:
+            _table_totals[name] = (total, new_version)
@@ -0,0 +1,61 @@
+# Versions globales des données (table data_version).
+# Lues périodiquement par chaque process de l'API (les imports tournent dans
+# un autre process) et incrémentées localement après chaque écriture.
+import time
+
+
+from app.core.config import settings
+from app.models.data_version import DataVersion
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+DATA_VERSION_NAME = "data"  # réponses, questions, géo (imports, /edit, /delete)
+CONFIG_VERSION_NAME = "config"  # thème, logo, lieux d'intérêt (/config)
+
+# name -> (dernière version connue de ce process, instant de lecture monotonic)
+_known: dict[str, tuple[int, float]] = {}
+
+
+def _remember(name: str, version: int) -> None:
+    _known[name] = (version, time.monotonic())
+
+
+async def current_data_version(db: AsyncSession, name: str = DATA_VERSION_NAME) -> int:
+    """
+    Version courante. Relue en base au plus toutes les
+    DATA_VERSION_REFRESH_SECONDS (changements faits par les scripts d'import).
+    """
+    known = _known.get(name)
+    if known is not None and time.monotonic() - known[1] < settings.DATA_VERSION_REFRESH_SECONDS:
+        return known[0]
+
+    stmt = select(DataVersion.version).where(DataVersion.name == name)
+    version = int((await db.execute(stmt)).scalar_one_or_none() or 0)
+    _remember(name, version)
+    return version
+
+
+async def bump_data_version(db: AsyncSession, *, name: str = DATA_VERSION_NAME, commit: bool = True) -> int:
+    """
+    Incrémente la version et renvoie la nouvelle valeur.
+
+    À appeler APRÈS le commit des données modifiées (commit=True, défaut) :
+    une requête qui voit la nouvelle version voit aussi les nouvelles données.
+    commit=False pour les scripts qui gèrent leur propre transaction.
+    """
+    stmt = (
+        pg_insert(DataVersion)
+        .values(name=name, version=1)
+        .on_conflict_do_update(
+            index_elements=[DataVersion.name],
+            set_={"version": DataVersion.version + 1},
+        )
+        .returning(DataVersion.version)
+    )
+    version = int((await db.execute(stmt)).scalar_one())
+    if commit:
+        await db.commit()
+        _remember(name, version)
+    return version
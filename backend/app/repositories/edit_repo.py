@@ -1,7 +1,16 @@
 from typing import Dict, List
 
 
+from app.models.answer_aggregate import AnswerAggregate
+from app.repositories.answer_aggregate_repo import (
+    aggregate_targets_before_write,
+    aggregates_impacted,
+    refresh_aggregates_after_change,
+)
+from app.repositories.count_repo import counts_after_write
+from app.repositories.data_version_repo import bump_data_version
 from app.repositories.pageAll_repo import ENTITY_CONFIG
+from app.repositories.search_repo import search_documents_after_change, search_uids_before_write
 from app.schemas.pageAll import EntityEnum
 from sqlalchemy import and_, update
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -60,8 +69,27 @@ async def update_rows(
     if not conditions:
         raise ValueError("No valid filters provided")
 
+    # Agrégats choroplèthes : on note les (question, année) touchées avant l'update
+    impacted = aggregates_impacted(entity, values_dict.keys())
+    targets = (
+        await aggregate_targets_before_write(db, entity=entity, conditions=conditions, updates=values_dict)
+        if impacted
+        else None
+    )
+    search_before = await search_uids_before_write(db, model, conditions)
+
     stmt = update(model).where(and_(*conditions)).values(**values_dict)
     result = await db.execute(stmt)
+
+    if impacted and result.rowcount:
+        await refresh_aggregates_after_change(db, targets=targets)
+    if result.rowcount:
+        await search_documents_after_change(db, search_before)
     await db.commit()
 
+    # invalide les caches mémoire (cartes choroplèthes, ...) ; un update ne change pas les totaux
+    if result.rowcount:
+        version = await bump_data_version(db)
+        counts_after_write(model.__tablename__, version, changed=[AnswerAggregate.__tablename__] if impacted else [])
+
     return result.rowcount or 0
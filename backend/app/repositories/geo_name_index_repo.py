@@ -0,0 +1,145 @@
+# Index en mémoire des noms géographiques pour l'autocomplétion (geoSearch).
+# Les suggestions passaient par trois LIKE '%q%' sur lower(unaccent(...)) puis
+# re-normalisaient chaque champ en Python pour le tri. Les communes, districts
+# et cantons sont peu nombreux et changent rarement : les noms (toutes langues)
+# et codes sont normalisés une fois (minuscules, sans accents), indexés par
+# préfixe (trie) et par trigrammes, avec les clés de tri précalculées.
+# Rechargé quand data_version change (imports, /edit, /delete).
+from typing import Literal, Optional
+import logging
+import unicodedata
+
+
+from app.models.canton import Canton
+from app.models.commune import Commune
+from app.models.district import District
+from app.repositories.data_version_repo import current_data_version
+from sqlalchemy import literal, select, String, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+logger = logging.getLogger(__name__)
+
+GeoType = Literal["commune", "district", "canton"]
+
+NGRAM = 3
+TYPE_RANK = {"commune": 0, "district": 1, "canton": 2}
+NAME_FIELDS = ["name", "name_fr", "name_de", "name_it", "name_ro", "name_en", "code"]
+
+
+def normalize_search_text(value: Optional[str]) -> str:
+    if not value:
+        return ""
+
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return value.lower().strip()
+
+
+def _ngrams(value: str) -> set[str]:
+    return {value[i : i + NGRAM] for i in range(len(value) - NGRAM + 1)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: dict[str, "_TrieNode"] = {}
+        self.ids: set[int] = set()  # entrées dont un champ commence par le préfixe du nœud
+
+
+class GeoNameIndex:
+    """
+    Entrées {"uid", "type", "code", "name", "name_fr", ...} (format de
+    suggest_geo_locations) ; recherche par sous-chaîne, triée par
+    correspondance exacte, préfixe puis contenu, puis commune / district /
+    canton, puis nom.
+    """
+
+    def __init__(self, version: int, entries: list[dict]):
+        self.version = version
+        self.entries = entries
+        self._folded: list[frozenset[str]] = []
+        self._sort_keys: list[tuple[int, str]] = []
+        self._root = _TrieNode()
+        self._postings: dict[str, set[int]] = {}
+
+        for i, entry in enumerate(entries):
+            folded = frozenset(v for v in (normalize_search_text(entry.get(f)) for f in NAME_FIELDS) if v)
+            self._folded.append(folded)
+            self._sort_keys.append((TYPE_RANK.get(entry["type"], 9), normalize_search_text(entry.get("name"))))
+            for value in folded:
+                self._insert(value, i)
+                for gram in _ngrams(value):
+                    self._postings.setdefault(gram, set()).add(i)
+
+    def _insert(self, value: str, i: int) -> None:
+        node = self._root
+        for char in value:
+            node = node.children.setdefault(char, _TrieNode())
+            node.ids.add(i)
+
+    def _prefix_ids(self, q: str) -> set[int]:
+        node = self._root
+        for char in q:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.ids
+
+    def _contains_ids(self, q: str) -> set[int]:
+        grams = sorted(_ngrams(q), key=lambda g: len(self._postings.get(g, ())))
+        if not grams:
+            return set()
+        ids = set(self._postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            ids &= self._postings.get(gram, set())
+            if not ids:
+                return ids
+        # les trigrammes sont nécessaires, pas suffisants : vérification de la sous-chaîne
+        return {i for i in ids if any(q in v for v in self._folded[i])}
+
+    def search(self, q: str, limit: int) -> list[dict]:
+        q_norm = normalize_search_text(q)
+        if len(q_norm) < NGRAM:
+            return []
+
+        prefix_ids = self._prefix_ids(q_norm)
+        ranked = [(0 if q_norm in self._folded[i] else 1, *self._sort_keys[i], i) for i in prefix_ids]
+        ranked.extend((2, *self._sort_keys[i], i) for i in self._contains_ids(q_norm) - prefix_ids)
+        ranked.sort()
+        return [dict(self.entries[r[-1]]) for r in ranked[:limit]]
+
+
+_index: Optional[GeoNameIndex] = None
+
+
+def _names_stmt(model, geo_type: GeoType):
+    return select(
+        literal(geo_type, String).label("type"),
+        model.uid,
+        *[getattr(model, field) for field in NAME_FIELDS],
+    )
+
+
+async def load_geo_name_index(db: AsyncSession) -> GeoNameIndex:
+    """(Re)charge l'index : communes, districts et cantons en une requête."""
+    global _index
+    version = await current_data_version(db)
+    stmt = union_all(
+        _names_stmt(Commune, "commune"),
+        _names_stmt(District, "district"),
+        _names_stmt(Canton, "canton"),
+    )
+    entries = [dict(row) for row in (await db.execute(stmt)).mappings()]
+    _index = GeoNameIndex(version, entries)
+    logger.info("Geo name index loaded (data version %s): %s entries", version, len(entries))
+    return _index
+
+
+async def get_geo_name_index(db: AsyncSession) -> GeoNameIndex:
+    """Index courant ; rechargé si la version des données a changé."""
+    index = _index
+    if index is not None and index.version == await current_data_version(db):
+        return index
+    return await load_geo_name_index(db)
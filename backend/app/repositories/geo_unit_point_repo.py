@@ -0,0 +1,118 @@
+# Points représentatifs et emprises des unités géographiques (table geo_unit_point).
+# ST_PointOnSurface était recalculé à chaque appel, et le point d'un district
+# ou d'un canton demandait une requête par commune : tout est calculé une fois
+# à l'import géo, la lecture est un accès par clé primaire.
+from typing import Any, Optional
+
+
+from app.models.geo_unit_point import GeoUnitPoint
+from app.repositories.geometry_cache_repo import LAYER_FOR_LEVEL, MAP_LAYERS
+from sqlalchemy import delete, func, insert, literal, select, String, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+POINT_LEVELS = ("commune", "district", "canton")
+
+_POINT_COLUMNS = ["level", "unit_uid", "year", "lat", "lon", "min_lon", "min_lat", "max_lon", "max_lat"]
+
+
+def _location_columns(geom: Any) -> list[Any]:
+    """lat, lon (point sur la surface) puis bbox ; les *_map sont stockées en WGS84."""
+    point = func.ST_PointOnSurface(geom)
+    return [
+        func.ST_Y(point),
+        func.ST_X(point),
+        func.ST_XMin(geom),
+        func.ST_YMin(geom),
+        func.ST_XMax(geom),
+        func.ST_YMax(geom),
+    ]
+
+
+def _point_source(level: str, year: Optional[int] = None) -> Any:
+    layer = MAP_LAYERS[LAYER_FOR_LEVEL[level]]
+    model = layer.map_model
+    # une ligne par (unité, année) même si la carte en contient plusieurs (clé primaire)
+    stmt = (
+        select(
+            literal(level, String),
+            layer.unit_col,
+            model.year,
+            *_location_columns(model.geometry),
+        )
+        .where(model.geometry.isnot(None), func.ST_IsEmpty(model.geometry).is_(False))
+        .distinct(layer.unit_col, model.year)
+        .order_by(layer.unit_col, model.year, model.uid)
+    )
+    if year is not None:
+        stmt = stmt.where(model.year == year)
+    return stmt
+
+
+async def build_geo_unit_points(db: AsyncSession, year: Optional[int] = None) -> None:
+    """
+    (Re)calcule points et emprises de toutes les unités (une année donnée ou
+    toutes). Ne commit pas : l'appelant garde la main sur la transaction.
+    """
+    for level in POINT_LEVELS:
+        del_stmt = delete(GeoUnitPoint).where(GeoUnitPoint.level == level)
+        if year is not None:
+            del_stmt = del_stmt.where(GeoUnitPoint.year == year)
+        await db.execute(del_stmt)
+        await db.execute(insert(GeoUnitPoint).from_select(_POINT_COLUMNS, _point_source(level, year)))
+
+
+def _location(row: Any) -> dict[str, Any]:
+    return {
+        "lat": float(row.lat),
+        "lon": float(row.lon),
+        "bbox": [float(row.min_lon), float(row.min_lat), float(row.max_lon), float(row.max_lat)],
+    }
+
+
+async def _live_locations(db: AsyncSession, level: str, unit_uids: list[int]) -> dict[int, dict[str, Any]]:
+    # repli si la table n'est pas (encore) remplie : calcul sur la dernière géométrie de chaque unité
+    layer = MAP_LAYERS[LAYER_FOR_LEVEL[level]]
+    model = layer.map_model
+    latest = (
+        select(layer.unit_col.label("unit_uid"), model.geometry.label("geometry"))
+        .where(layer.unit_col.in_(unit_uids), model.geometry.isnot(None))
+        .distinct(layer.unit_col)
+        .order_by(layer.unit_col, model.year.desc())
+        .subquery()
+    )
+    labels = ["lat", "lon", "min_lon", "min_lat", "max_lon", "max_lat"]
+    stmt = select(latest.c.unit_uid, *[c.label(n) for c, n in zip(_location_columns(latest.c.geometry), labels)])
+    return {int(row.unit_uid): _location(row) for row in (await db.execute(stmt)) if row.lat is not None}
+
+
+async def get_unit_locations(db: AsyncSession, units: list[tuple[str, int]]) -> dict[tuple[str, int], dict[str, Any]]:
+    """
+    (niveau, uid) -> {"lat", "lon", "bbox": [min_lon, min_lat, max_lon, max_lat]}
+    pour la dernière année de carte de chaque unité ; absente si l'unité n'a
+    pas de géométrie. Une requête pour toutes les unités (plus une par niveau
+    pour les unités absentes de geo_unit_point).
+    """
+    wanted = {(level, int(uid)) for level, uid in units if level in POINT_LEVELS}
+    if not wanted:
+        return {}
+
+    stmt = (
+        select(GeoUnitPoint)
+        .where(tuple_(GeoUnitPoint.level, GeoUnitPoint.unit_uid).in_(sorted(wanted)))
+        .distinct(GeoUnitPoint.level, GeoUnitPoint.unit_uid)
+        .order_by(GeoUnitPoint.level, GeoUnitPoint.unit_uid, GeoUnitPoint.year.desc())
+    )
+    out = {(row.level, row.unit_uid): _location(row) for row in (await db.execute(stmt)).scalars()}
+
+    for level in POINT_LEVELS:
+        missing = sorted(uid for lvl, uid in wanted - out.keys() if lvl == level)
+        if missing:
+            for uid, location in (await _live_locations(db, level, missing)).items():
+                out[(level, uid)] = location
+    return out
+
+
+async def get_unit_location(db: AsyncSession, level: str, unit_uid: int) -> Optional[dict[str, Any]]:
+    """Voir get_unit_locations, pour une seule unité."""
+    return (await get_unit_locations(db, [(level, unit_uid)])).get((level, unit_uid))
@@ -0,0 +1,72 @@
+# Index en mémoire des années de carte disponibles par couche (*_map).
+# "Dernière année <= y" et "année la plus proche dans +-w" étaient résolues
+# par une requête MAX / GROUP BY sur la table de carte à chaque appel ; les
+# années ne changent qu'au ré-import géo. L'index est chargé au démarrage
+# (une requête pour toutes les couches) puis rechargé quand data_version change.
+from bisect import bisect_right
+from typing import Iterable, Optional
+import logging
+
+
+from app.repositories.data_version_repo import current_data_version
+from app.repositories.geometry_cache_repo import MAP_LAYERS
+from sqlalchemy import literal, select, String, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+logger = logging.getLogger(__name__)
+
+
+def nearest_year(years: Iterable[int], target: int, window: int) -> Optional[int]:
+    """Année la plus proche de target dans +-window : plus proche, puis passé, puis plus récent."""
+    cands = [y for y in years if abs(y - target) <= window]
+    if not cands:
+        return None
+    return min(cands, key=lambda y: (abs(y - target), 0 if y <= target else 1, -y))
+
+
+class GeoYearIndex:
+    """Années triées par couche versionnée ("communes", "districts", "cantons", "lakes")."""
+
+    def __init__(self, version: int, years: dict[str, list[int]]):
+        self.version = version
+        self.years = {layer: sorted(ys) for layer, ys in years.items()}
+
+    def latest(self, layer: str, max_year: Optional[int] = None) -> Optional[int]:
+        """Dernière année de carte (<= max_year si donné)."""
+        years = self.years.get(layer) or []
+        if max_year is None:
+            return years[-1] if years else None
+        i = bisect_right(years, max_year)
+        return years[i - 1] if i else None
+
+    def nearest(self, layer: str, target: int, window: int) -> Optional[int]:
+        return nearest_year(self.years.get(layer) or [], target, window)
+
+
+_index: Optional[GeoYearIndex] = None
+
+
+async def load_geo_year_index(db: AsyncSession) -> GeoYearIndex:
+    """(Re)charge l'index : années distinctes de toutes les tables de carte en une requête."""
+    global _index
+    version = await current_data_version(db)
+    parts = [
+        select(literal(key, String).label("layer"), layer.map_model.year.label("year")).group_by(layer.map_model.year)
+        for key, layer in MAP_LAYERS.items()
+        if layer.versioned
+    ]
+    years: dict[str, list[int]] = {key: [] for key, layer in MAP_LAYERS.items() if layer.versioned}
+    for row in (await db.execute(union_all(*parts))).mappings():
+        years[row["layer"]].append(int(row["year"]))
+    _index = GeoYearIndex(version, years)
+    logger.info("Geo year index loaded (data version %s): %s", version, _index.years)
+    return _index
+
+
+async def get_geo_year_index(db: AsyncSession) -> GeoYearIndex:
+    """Index courant ; rechargé si la version des données a changé (import géo, édition)."""
+    index = _index
+    if index is not None and index.version == await current_data_version(db):
+        return index
+    return await load_geo_year_index(db)
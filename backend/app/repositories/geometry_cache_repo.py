@@ -0,0 +1,199 @@
+# Cache de sérialisation GeoJSON des géométries (table geometry_geojson).
+# ST_AsGeoJSON sur ~2000 polygones de communes domine la latence des cartes :
+# on le calcule une fois par (couche, année, précision, niveau de détail) à
+# l'import géo.
+from typing import Any, Optional
+import logging
+
+
+from app.models.canton_map import CantonMap
+from app.models.commune_map import CommuneMap
+from app.models.country import Country
+from app.models.district_map import DistrictMap
+from app.models.geometry_geojson import GeometryGeoJSON
+from app.models.lake_map import LakeMap
+from app.schemas.geo import GeometryDetail
+from geoalchemy2 import functions as geofunc
+from sqlalchemy import and_, delete, func, insert, Integer, literal, literal_column, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.elements import ColumnElement
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRECISION = 5  # maxdecimaldigits utilisé par tous les endpoints carte
+
+# Niveaux de détail : tolérance de simplification en mètres (LV95), None = géométrie d'origine.
+# "low" suffit pour la Suisse entière à l'écran, "medium" pour un canton, "high" pour un district.
+DEFAULT_DETAIL: GeometryDetail = "full"
+DETAIL_TOLERANCES: dict[str, Optional[float]] = {"full": None, "high": 10.0, "medium": 50.0, "low": 200.0}
+METRIC_SRID = 2056  # LV95, système métrique des tolérances
+
+
+class MapLayer:
+    def __init__(
+        self,
+        key: str,
+        map_model: Any,
+        unit_attr: str,
+        versioned: bool = True,
+        to_wgs84: bool = True,
+    ):
+        self.key = key  # "communes" / "districts" / ...
+        self.map_model = map_model
+        self.unit_attr = unit_attr  # FK vers l'unité (commune_uid, district_id, ...)
+        self.versioned = versioned  # False pour country (pas de colonne year)
+        self.to_wgs84 = to_wgs84  # ST_Transform(…, 4326) avant sérialisation (sinon déjà en LV95)
+
+    @property
+    def unit_col(self) -> ColumnElement:
+        return getattr(self.map_model, self.unit_attr)
+
+    @property
+    def srid(self) -> int:
+        # SRID de stockage : WGS84 pour les *_map, LV95 pour country
+        return 4326 if self.to_wgs84 else METRIC_SRID
+
+    @property
+    def year_col(self) -> ColumnElement:
+        return self.map_model.year if self.versioned else literal_column("0", Integer)
+
+    def simplified_expr(self, geom_col: Any, tolerance: float, coverage: bool = False) -> ColumnElement:
+        """
+        Géométrie simplifiée (tolérance en mètres), dans le système de sortie.
+        coverage=True : ST_CoverageSimplify sur toutes les unités d'une même
+        année (frontières communes simplifiées à l'identique, pas de trous
+        entre voisins ; PostGIS >= 3.4 avec GEOS >= 3.12). Sinon
+        ST_SimplifyPreserveTopology, géométrie par géométrie.
+        """
+        metric = geofunc.ST_Transform(geom_col, METRIC_SRID) if self.to_wgs84 else geom_col
+        if coverage:
+            simplified = func.ST_CoverageSimplify(metric, tolerance).over(partition_by=self.year_col)
+        else:
+            simplified = geofunc.ST_SimplifyPreserveTopology(metric, tolerance)
+        return geofunc.ST_Transform(simplified, 4326) if self.to_wgs84 else simplified
+
+    def geojson_expr(
+        self,
+        geom_col: Any,
+        precision: int = DEFAULT_PRECISION,
+        tolerance: Optional[float] = None,
+        coverage: bool = False,
+    ) -> ColumnElement:
+        if tolerance is not None:
+            geom = self.simplified_expr(geom_col, tolerance, coverage=coverage)
+        else:
+            geom = geofunc.ST_Transform(geom_col, 4326) if self.to_wgs84 else geom_col
+        # maxdecimaldigits en positionnel : un kwarg serait ignoré par SQLAlchemy
+        return geofunc.ST_AsGeoJSON(geom, precision)
+
+
+MAP_LAYERS: dict[str, MapLayer] = {
+    "communes": MapLayer("communes", CommuneMap, "commune_uid"),
+    "districts": MapLayer("districts", DistrictMap, "district_id"),
+    "cantons": MapLayer("cantons", CantonMap, "canton_uid"),
+    "lakes": MapLayer("lakes", LakeMap, "lake_id"),
+    # country: sérialisé tel quel (comportement historique de /geo/by_year)
+    "country": MapLayer("country", Country, "uid", versioned=False, to_wgs84=False),
+}
+
+# granularité choroplèthe -> couche
+LAYER_FOR_LEVEL = {"commune": "communes", "district": "districts", "canton": "cantons", "federal": "cantons"}
+
+
+def geojson_cache_join(
+    layer: str,
+    map_uid_col: ColumnElement,
+    geom_col: ColumnElement,
+    precision: int = DEFAULT_PRECISION,
+    detail: GeometryDetail = DEFAULT_DETAIL,
+) -> tuple[Any, ColumnElement, ColumnElement]:
+    """
+    (alias, condition de LEFT JOIN, colonne geojson) pour lire la géométrie
+    pré-sérialisée d'une ligne *_map au niveau de détail demandé. Si le cache
+    n'est pas (encore) rempli, la colonne retombe sur ST_AsGeoJSON calculé à
+    la volée (simplification géométrie par géométrie).
+
+    Usage:
+        cache, onclause, geojson = geojson_cache_join("cantons", CantonMap.uid, CantonMap.geometry)
+        select(geojson.label("geojson"), ...).outerjoin(cache, onclause)
+    """
+    cache = aliased(GeometryGeoJSON)
+    onclause = and_(
+        cache.layer == layer,
+        cache.precision == precision,
+        cache.detail == detail,
+        cache.map_uid == map_uid_col,
+    )
+    col = func.coalesce(cache.geojson, MAP_LAYERS[layer].geojson_expr(geom_col, precision, DETAIL_TOLERANCES[detail]))
+    return cache, onclause, col
+
+
+def _cache_source(
+    layer: MapLayer, key: str, precision: int, detail: str, year: Optional[int], coverage: bool = False
+) -> Any:
+    model = layer.map_model
+    src = select(
+        literal(key).label("layer"),
+        literal(precision, Integer).label("precision"),
+        literal(detail).label("detail"),
+        model.uid.label("map_uid"),
+        layer.year_col.label("year"),
+        layer.unit_col.label("unit_uid"),
+        layer.geojson_expr(model.geometry, precision, DETAIL_TOLERANCES[detail], coverage=coverage).label("geojson"),
+    ).where(model.geometry.isnot(None))
+    if year is not None and layer.versioned:
+        src = src.where(model.year == year)
+    return src
+
+
+_CACHE_COLUMNS = ["layer", "precision", "detail", "map_uid", "year", "unit_uid", "geojson"]
+
+
+async def build_geojson_cache(
+    db: AsyncSession,
+    layers: Optional[list[str]] = None,
+    year: Optional[int] = None,
+    precision: int = DEFAULT_PRECISION,
+    details: Optional[list[str]] = None,
+) -> None:
+    """
+    (Re)construit le cache pour les couches demandées (toutes par défaut),
+    une année donnée (toutes par défaut), une précision et les niveaux de
+    détail demandés (tous par défaut).
+
+    Les niveaux simplifiés utilisent ST_CoverageSimplify (frontières
+    partagées simplifiées à l'identique) quand la base le permet, sinon
+    ST_SimplifyPreserveTopology.
+    Ne commit pas : l'appelant garde la main sur la transaction.
+    """
+    for key in layers or list(MAP_LAYERS):
+        layer = MAP_LAYERS[key]
+        for detail in details or list(DETAIL_TOLERANCES):
+            del_stmt = delete(GeometryGeoJSON).where(
+                GeometryGeoJSON.layer == key,
+                GeometryGeoJSON.precision == precision,
+                GeometryGeoJSON.detail == detail,
+            )
+            if year is not None and layer.versioned:
+                del_stmt = del_stmt.where(GeometryGeoJSON.year == year)
+            await db.execute(del_stmt)
+
+            if DETAIL_TOLERANCES[detail] is not None:
+                try:
+                    # savepoint : une erreur (fonction absente, couverture invalide) n'annule pas le reste
+                    async with db.begin_nested():
+                        await db.execute(
+                            insert(GeometryGeoJSON).from_select(
+                                _CACHE_COLUMNS, _cache_source(layer, key, precision, detail, year, coverage=True)
+                            )
+                        )
+                    continue
+                except DBAPIError as exc:
+                    logger.info("ST_CoverageSimplify failed for %s/%s, per-geometry fallback: %s", key, detail, exc)
+
+            await db.execute(
+                insert(GeometryGeoJSON).from_select(_CACHE_COLUMNS, _cache_source(layer, key, precision, detail, year))
+            )
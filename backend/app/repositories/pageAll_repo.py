@@ -1,7 +1,10 @@
 from typing import Dict, List, Optional, Tuple, Type
+import base64
+import binascii
+import json
 
 
-from app.models.answer import Answer
+from app.models.answer import Answer, VALUE_SORT_LENGTH
 from app.models.base import Base
 from app.models.canton import Canton
 from app.models.commune import Commune
@@ -11,8 +14,10 @@ from app.models.question_category import QuestionCategory
 from app.models.question_global import QuestionGlobal
 from app.models.question_per_survey import QuestionPerSurvey
 from app.models.survey import Survey
-from app.schemas.pageAll import AllItem, EntityEnum, OrderByEnum, OrderDirEnum
-from sqlalchemy import and_, delete, func, or_, select
+from app.repositories.count_repo import count_rows
+from app.repositories.text_search_repo import fold, fuzzy_match, match_rank, similarity
+from app.schemas.pageAll import AllItem, CountModeEnum, EntityEnum, OrderByEnum, OrderDirEnum
+from sqlalchemy import and_, delete, func, literal, literal_column, or_, select, true, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -99,6 +104,102 @@ def _build_columns_for_entity(entity: EntityEnum, cfg: EntityConfig):
     return columns
 
 
+def _sort_column(cfg: EntityConfig, order_by: OrderByEnum):
+    model = cfg.model
+    if order_by == OrderByEnum.uid:
+        return model.uid
+    if order_by == OrderByEnum.code and cfg.code_attr:
+        return getattr(model, cfg.code_attr)
+    if model is Answer:
+        # préfixe borné, expression de l'index ix_answer_value_prefix_uid (longueur en
+        # constante SQL, un paramètre ne correspondrait pas à l'index dans un plan générique)
+        return func.left(Answer.value, literal_column(str(VALUE_SORT_LENGTH)))
+    return getattr(model, cfg.name_attr)
+
+
+def _row_to_item(entity: EntityEnum, row) -> AllItem:
+    code_value = getattr(row, "code", None)
+    name_value = row.name
+    value_value = getattr(row, "value", None)
+
+    # cas spécial Option : si label_ est NULL -> fallback sur value (= code)
+    if entity == EntityEnum.option and not name_value:
+        name_value = code_value or ""
+
+    if entity == EntityEnum.answer and not name_value:
+        name_value = value_value or ""
+
+    return AllItem(
+        uid=row.uid,
+        code=code_value,
+        name=name_value or "",
+        entity=entity,
+        year=getattr(row, "year", None),
+        value=value_value,
+        question_uid=getattr(row, "question_uid", None),
+        commune_uid=getattr(row, "commune_uid", None),
+    )
+
+
+# Curseurs (pagination par clé) : base64url d'un JSON {"k": [valeur de tri, uid],
+# "d": "next" | "prev", "o": "<order_by>:<order_dir>"}. Opaques pour le client.
+def encode_cursor(sort_value, uid: int, direction: str, order_by: OrderByEnum, order_dir: OrderDirEnum) -> str:
+    payload = {"k": [sort_value, uid], "d": direction, "o": f"{order_by.value}:{order_dir.value}"}
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: OrderByEnum, order_dir: OrderDirEnum) -> Tuple[object, int, str]:
+    """(valeur de tri, uid, direction) ; ValueError si le curseur est invalide ou d'un autre tri."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        sort_value, uid = payload["k"]
+        direction = payload["d"]
+        order = payload["o"]
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if direction not in ("next", "prev") or not isinstance(uid, int):
+        raise ValueError("Invalid cursor")
+    if order != f"{order_by.value}:{order_dir.value}":
+        raise ValueError("Cursor does not match order_by / order_dir")
+    return sort_value, uid, direction
+
+
+def _order_exprs(sort_col, uid_col, desc: bool, reverse: bool = False) -> list:
+    """
+    Ordre (sort_col, uid) asc ou desc, départage par uid dans le même sens :
+    l'index (tri, uid) est lu dans un sens ou dans l'autre.
+    reverse : ordre inverse exact (NULLs compris) pour lire la page précédente.
+    """
+    if desc != reverse:
+        return [sort_col.desc(), uid_col.desc()] if sort_col is not uid_col else [uid_col.desc()]
+    return [sort_col.asc(), uid_col.asc()] if sort_col is not uid_col else [uid_col.asc()]
+
+
+def _keyset_segments(sort_col, uid_col, sort_value, uid: int, desc: bool, after: bool) -> list:
+    """
+    Lignes strictement après (after=True) ou avant la clé (sort_value, uid)
+    dans l'ordre de _order_exprs, en segments lus l'un après l'autre dans cet
+    ordre. Chaque segment est une seule plage de l'index (tri, uid) : comparaison
+    de lignes (sort_col, uid) >|< (v, u), ou groupe des NULL (derniers en asc,
+    premiers en desc). Un OR des deux ne borne plus le parcours d'index.
+    """
+    # desc est l'inverse exact de asc : "après" en desc = "avant" en asc
+    greater = after != desc
+    if sort_col is uid_col:
+        return [uid_col > uid if greater else uid_col < uid]
+
+    if sort_value is None:
+        if greater:
+            return [and_(sort_col.is_(None), uid_col > uid)]
+        return [and_(sort_col.is_(None), uid_col < uid), sort_col.isnot(None)]
+
+    if greater:
+        return [tuple_(sort_col, uid_col) > tuple_(sort_value, uid), sort_col.is_(None)]
+    return [tuple_(sort_col, uid_col) < tuple_(sort_value, uid)]
+
+
 async def get_pageAll_paginated(
     db: AsyncSession,
     *,
@@ -107,10 +208,18 @@ async def get_pageAll_paginated(
     per_page: int = 20,
     order_by: OrderByEnum = OrderByEnum.uid,
     order_dir: OrderDirEnum = OrderDirEnum.asc,
-) -> Tuple[List[AllItem], int]:
+    cursor: Optional[str] = None,
+    count_mode: CountModeEnum = CountModeEnum.cached,
+) -> Tuple[List[AllItem], int, CountModeEnum, Optional[str], Optional[str]]:
     """
     Template générique pour récupérer (uid, code?, name, year?) d'une table donnée
     avec tri par uid / name.
+
+    Par numéro de page (OFFSET) ou, si cursor est donné, par clé
+    (valeur de tri, uid) : une page profonde coûte alors autant que la
+    première. Renvoie (items, total, mode du total, next_cursor, prev_cursor) ;
+    les curseurs sont aussi renvoyés en mode page pour passer à la navigation
+    par clé. Total exact, mémorisé ou estimé selon count_mode (voir count_repo).
     """
     cfg = ENTITY_CONFIG.get(entity)
     if cfg is None:
@@ -123,57 +232,52 @@ async def get_pageAll_paginated(
     if per_page < 1:
         per_page = 10
 
-    # total
-    total_stmt = select(func.count(model.uid))
-    total = (await db.execute(total_stmt)).scalar_one()
+    total, total_mode = await count_rows(db, model, mode=count_mode)
 
-    # colonne de tri
-    if order_by == OrderByEnum.uid:
-        order_column = model.uid
-    elif order_by == OrderByEnum.code and cfg.code_attr:
-        order_column = getattr(model, cfg.code_attr)
-    else:
-        order_column = getattr(model, cfg.name_attr)
+    # colonne de tri, exposée en sort_key pour construire les curseurs
+    sort_col = _sort_column(cfg, order_by)
+    desc = order_dir == OrderDirEnum.desc
 
-    order_expr = order_column.asc() if order_dir == OrderDirEnum.asc else order_column.desc()
+    columns = [*_build_columns_for_entity(entity, cfg), sort_col.label("sort_key")]
 
-    columns = _build_columns_for_entity(entity, cfg)
+    stmt = select(*columns)
+    direction = "next"
+    # une ligne de plus pour savoir s'il reste une page dans le sens de lecture
+    if cursor is None:
+        stmt = stmt.order_by(*_order_exprs(sort_col, model.uid, desc)).offset((page - 1) * per_page)
+        rows = list((await db.execute(stmt.limit(per_page + 1))).all())
+    else:
+        sort_value, key_uid, direction = decode_cursor(cursor, order_by, order_dir)
+        after = direction == "next"
+        stmt = stmt.order_by(*_order_exprs(sort_col, model.uid, desc, reverse=not after))
+        rows = []
+        # segment suivant (groupe des NULL, ...) seulement si la page n'est pas remplie
+        for condition in _keyset_segments(sort_col, model.uid, sort_value, key_uid, desc, after):
+            rows.extend((await db.execute(stmt.where(condition).limit(per_page + 1 - len(rows)))).all())
+            if len(rows) > per_page:
+                break
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == "prev":
+        rows.reverse()
+
+    if not rows:
+        return [], total, total_mode, None, None
+
+    def row_cursor(row, d: str) -> str:
+        return encode_cursor(row.sort_key, row.uid, d, order_by, order_dir)
+
+    if cursor is None:
+        has_next, has_prev = has_more, page > 1
+    elif direction == "next":
+        has_next, has_prev = has_more, True
+    else:
+        has_next, has_prev = True, has_more
 
-    stmt = select(*columns).order_by(order_expr).offset((page - 1) * per_page).limit(per_page)
-
-    result = await db.execute(stmt)
-    rows = result.all()
-
-    items: List[AllItem] = []
-    for row in rows:
-        code_value = getattr(row, "code", None)
-        name_value = row.name
-        year_value = getattr(row, "year", None)
-        value_value = getattr(row, "value", None)
-        question_uid_value = getattr(row, "question_uid", None)
-        commune_uid_value = getattr(row, "commune_uid", None)
-
-        # cas spécial Option : si label_ est NULL -> fallback sur value (= code)
-        if entity == EntityEnum.option and not name_value:
-            name_value = code_value or ""
-
-        if entity == EntityEnum.answer and not name_value:
-            name_value = value_value or ""
-
-        items.append(
-            AllItem(
-                uid=row.uid,
-                code=code_value,
-                name=name_value or "",
-                entity=entity,
-                year=year_value,
-                value=value_value,
-                question_uid=question_uid_value,
-                commune_uid=commune_uid_value,
-            )
-        )
+    next_cursor = row_cursor(rows[-1], "next") if has_next else None
+    prev_cursor = row_cursor(rows[0], "prev") if has_prev else None
 
-    return items, total
+    return [_row_to_item(entity, row) for row in rows], total, total_mode, next_cursor, prev_cursor
 
 
 async def suggest_pageAll_prefix(
@@ -184,7 +288,10 @@ async def suggest_pageAll_prefix(
     limit: int = 10,
 ) -> List[AllItem]:
     """
-    Recherche préfixe générique sur name / code (+ colonnes extra si définies).
+    Recherche générique sur name / code (+ colonnes extra si définies), sans
+    accents ni casse : exact, préfixe, contenu puis approximatif (pg_trgm,
+    tolère les fautes de frappe), servie par les index trigrammes
+    (voir text_search_repo). answer reste une recherche préfixe non indexée.
     Retourne une liste d'AllItem, réutilisable partout (PageAll, autocomplete, etc.).
     """
     cfg = ENTITY_CONFIG.get(entity)
@@ -196,70 +303,61 @@ async def suggest_pageAll_prefix(
     if not q or len(q.strip()) < 3:
         return []
 
-    q = q.strip().lower()
-    u, l = func.unaccent, func.lower
-    qprefix = f"{q}%"
-
-    search_conditions = []
-
-    # colonne principale de nom
-    name_col = getattr(model, cfg.name_attr, None)
-    if name_col is not None:
-        search_conditions.append(l(u(name_col)).like(qprefix))
-
-    # code si dispo
-    if cfg.code_attr:
-        code_col = getattr(model, cfg.code_attr)
-        search_conditions.append(l(u(code_col)).like(qprefix))
+    q = q.strip()
 
-    # colonnes extra de recherche
-    for attr in cfg.search_extra_attrs:
-        if hasattr(model, attr):
-            col = getattr(model, attr)
-            search_conditions.append(l(u(col)).like(qprefix))
+    # colonne principale de nom, code si dispo, colonnes extra de recherche
+    attrs = [cfg.name_attr, *([cfg.code_attr] if cfg.code_attr else []), *cfg.search_extra_attrs]
+    search_columns = [getattr(model, attr) for attr in attrs if hasattr(model, attr)]
 
-    if not search_conditions:
+    if not search_columns:
         return []
 
     columns = _build_columns_for_entity(entity, cfg)
+    name_col = getattr(model, cfg.name_attr)
 
-    stmt = select(*columns).where(or_(*search_conditions)).limit(limit)
-
-    res = await db.execute(stmt)
-    rows = res.all()
-
-    items: List[AllItem] = []
-    for row in rows:
-        code_value = getattr(row, "code", None)
-        name_value = row.name
-        year_value = getattr(row, "year", None)
-        value_value = getattr(row, "value", None)
-        question_uid_value = getattr(row, "question_uid", None)
-        commune_uid_value = getattr(row, "commune_uid", None)
-
-        if entity == EntityEnum.option and not name_value:
-            name_value = code_value or ""
-
-        if entity == EntityEnum.answer and not name_value:
-            name_value = value_value or ""
-
-        items.append(
-            AllItem(
-                uid=row.uid,
-                code=code_value,
-                name=name_value or "",
-                entity=entity,
-                year=year_value,
-                value=value_value,
-                question_uid=question_uid_value,
-                commune_uid=commune_uid_value,
+    if entity == EntityEnum.answer:
+        qprefix = fold(literal(f"{q.lower()}%"))
+        stmt = select(*columns).where(or_(*[fold(col).like(qprefix) for col in search_columns])).limit(limit)
+    else:
+        stmt = (
+            select(*columns)
+            .where(fuzzy_match(search_columns, q))
+            .order_by(
+                match_rank(search_columns, q),
+                similarity(search_columns, q).desc(),
+                name_col,
+                model.uid,
             )
+            .limit(limit)
         )
 
-    return items
+    rows = (await db.execute(stmt)).all()
 
+    return [_row_to_item(entity, row) for row in rows]
 
-async def get_page_for_uid(
+
+def _before_target(sort_col, uid_col, target_value, target_uid, desc: bool):
+    """
+    Lignes avant la cible dans l'ordre de _order_exprs, cible donnée en
+    colonnes SQL : comparaison de lignes (condition d'index), branches IS NULL
+    pour une cible ou des lignes sans valeur (NULL derniers en asc, premiers en desc).
+    """
+    if sort_col is uid_col:
+        return uid_col > target_uid if desc else uid_col < target_uid
+    if desc:
+        return or_(
+            tuple_(sort_col, uid_col) > tuple_(target_value, target_uid),
+            and_(sort_col.is_(None), target_value.isnot(None)),
+            and_(sort_col.is_(None), target_value.is_(None), uid_col > target_uid),
+        )
+    return or_(
+        tuple_(sort_col, uid_col) < tuple_(target_value, target_uid),
+        and_(target_value.is_(None), sort_col.isnot(None)),
+        and_(target_value.is_(None), sort_col.is_(None), uid_col < target_uid),
+    )
+
+
+async def locate_uid_page(
     db: AsyncSession,
     *,
     entity: EntityEnum,
@@ -267,54 +365,67 @@ async def get_page_for_uid(
     order_by: OrderByEnum = OrderByEnum.uid,
     order_dir: OrderDirEnum = OrderDirEnum.asc,
     per_page: int = 20,
-) -> int:
+    with_items: bool = False,
+) -> Tuple[int, List[AllItem]]:
     """
-    Renvoie la page (1-based) sur laquelle se trouve un enregistrement donné (uid)
-    en fonction du tri et du per_page.
+    Page (1-based) d'un enregistrement pour le tri et le per_page donnés et,
+    si with_items, le contenu de cette page, en une seule requête : le rang
+    est un COUNT des lignes avant la cible (parcours d'index sur (tri, uid)),
+    la page est lue avec OFFSET = début de page calculé dans la même requête.
+    Enregistrement absent -> page 1.
     """
     cfg = ENTITY_CONFIG.get(entity)
     if cfg is None:
         raise ValueError(f"Unsupported entity: {entity}")
 
     model = cfg.model
-
-    # On récupère la valeur de la colonne de tri pour ce uid
-    if order_by == OrderByEnum.uid:
-        sort_col = model.uid
-    elif order_by == OrderByEnum.code and cfg.code_attr:
-        sort_col = getattr(model, cfg.code_attr)
-    else:
-        sort_col = getattr(model, cfg.name_attr)
-
-    sort_value_stmt = select(sort_col, model.uid).where(model.uid == uid)
-    row = (await db.execute(sort_value_stmt)).first()
-
-    # Si l'élément n'existe plus -> on renvoie page 1
-    if row is None:
-        return 1
-
-    sort_value, target_uid = row
-
-    # NB : on suppose ici que sort_col n'est pas NULL
-    if order_dir == OrderDirEnum.asc:
-        before_conditions = or_(
-            sort_col < sort_value,
-            and_(sort_col == sort_value, model.uid < target_uid),
-        )
-    else:
-        # pour desc : les valeurs plus grandes sont "avant"
-        before_conditions = or_(
-            sort_col > sort_value,
-            and_(sort_col == sort_value, model.uid < target_uid),
-        )
-
-    count_stmt = select(func.count(model.uid)).where(before_conditions)
-    before_count = (await db.execute(count_stmt)).scalar_one()
-
-    # index 0-based -> page 1-based
-    index = before_count
     if per_page <= 0:
         per_page = 20
 
-    page = index // per_page + 1
+    sort_col = _sort_column(cfg, order_by)
+    desc = order_dir == OrderDirEnum.desc
+
+    target = select(sort_col.label("value"), model.uid.label("uid")).where(model.uid == uid).subquery("target")
+    # index 0-based de la cible (0 si elle n'existe plus)
+    position = (
+        select(func.count(model.uid).label("position"))
+        .select_from(model)
+        .join(target, _before_target(sort_col, model.uid, target.c.value, target.c.uid, desc))
+    )
+
+    if not with_items:
+        index = (await db.execute(position)).scalar_one()
+        return index // per_page + 1, []
+
+    # rang calculé une fois (CTE), réutilisé pour l'OFFSET du début de page
+    position_cte = position.cte("target_position")
+    page_start = (select(position_cte.c.position).scalar_subquery() // per_page) * per_page
+    stmt = (
+        select(*_build_columns_for_entity(entity, cfg), position_cte.c.position)
+        .join_from(model, position_cte, true())
+        .order_by(*_order_exprs(sort_col, model.uid, desc))
+        .offset(page_start)
+        .limit(per_page)
+    )
+    rows = (await db.execute(stmt)).all()
+    index = rows[0].position if rows else 0
+    return index // per_page + 1, [_row_to_item(entity, row) for row in rows]
+
+
+async def get_page_for_uid(
+    db: AsyncSession,
+    *,
+    entity: EntityEnum,
+    uid: int,
+    order_by: OrderByEnum = OrderByEnum.uid,
+    order_dir: OrderDirEnum = OrderDirEnum.asc,
+    per_page: int = 20,
+) -> int:
+    """
+    Renvoie la page (1-based) sur laquelle se trouve un enregistrement donné (uid)
+    en fonction du tri et du per_page.
+    """
+    page, _ = await locate_uid_page(
+        db, entity=entity, uid=uid, order_by=order_by, order_dir=order_dir, per_page=per_page
+    )
     return page
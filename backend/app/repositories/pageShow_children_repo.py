@@ -4,8 +4,9 @@ from typing import Any, List, Optional, Type
 from app.models.question_category_option_association import QuestionCategoryOptionAssociation
 from app.models.question_global_option_association import QuestionGlobalOptionAssociation
 from app.models.question_option_association import QuestionOptionAssociation
+from app.repositories.count_repo import count_rows
 from app.repositories.pageShow_repo import ENTITY_MODEL_MAP
-from app.schemas.pageAll import EntityEnum
+from app.schemas.pageAll import CountModeEnum, EntityEnum
 from app.schemas.pageShow import ShowMetaChild
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -25,31 +26,32 @@ async def get_children_paginated(
     parent_uid: int,
     page: int,
     per_page: int,
-) -> tuple[List[Any], int]:
+    count_mode: CountModeEnum = CountModeEnum.cached,
+) -> tuple[List[Any], int, CountModeEnum]:
+    """Page d'enfants et (total, mode du total), voir count_repo."""
     model: Optional[Type[Any]] = ENTITY_MODEL_MAP.get(child_entity)
     if model is None:
-        return [], 0
+        return [], 0, CountModeEnum.exact
 
     offset = (page - 1) * per_page
 
     if child_meta.relation_type == "direct":
         if not child_meta.fk_field:
-            return [], 0
+            return [], 0, CountModeEnum.exact
 
         fk_col = getattr(model, child_meta.fk_field, None)
         if fk_col is None:
-            return [], 0
+            return [], 0, CountModeEnum.exact
 
         where_clause = fk_col == parent_uid
 
         total_req = select(func.count()).select_from(model).where(where_clause)
-        total_res = await db.execute(total_req)
-        total = int(total_res.scalar() or 0)
+        total, total_mode = await count_rows(db, model, total_req, mode=count_mode)
 
         req = select(model).where(where_clause).offset(offset).limit(per_page)
         res = await db.execute(req)
         items = list(res.scalars().all())
-        return items, total
+        return items, total, total_mode
 
     if child_meta.relation_type == "association":
         if (
@@ -57,18 +59,18 @@ async def get_children_paginated(
             or not child_meta.association_source_field
             or not child_meta.association_target_field
         ):
-            return [], 0
+            return [], 0, CountModeEnum.exact
 
         association_model = ASSOCIATION_MODEL_MAP.get(child_meta.association_table)
         if association_model is None:
-            return [], 0
+            return [], 0, CountModeEnum.exact
 
         source_col = getattr(association_model, child_meta.association_source_field, None)
         target_col = getattr(association_model, child_meta.association_target_field, None)
         target_uid_col = getattr(model, child_meta.target_uid_field, None)
 
         if source_col is None or target_col is None or target_uid_col is None:
-            return [], 0
+            return [], 0, CountModeEnum.exact
 
         total_req = (
             select(func.count())
@@ -76,8 +78,7 @@ async def get_children_paginated(
             .join(association_model, target_uid_col == target_col)
             .where(source_col == parent_uid)
         )
-        total_res = await db.execute(total_req)
-        total = int(total_res.scalar() or 0)
+        total, total_mode = await count_rows(db, model, total_req, mode=count_mode)
 
         req = (
             select(model)
@@ -88,6 +89,6 @@ async def get_children_paginated(
         )
         res = await db.execute(req)
         items = list(res.scalars().all())
-        return items, total
+        return items, total, total_mode
 
-    return [], 0
+    return [], 0, CountModeEnum.exact
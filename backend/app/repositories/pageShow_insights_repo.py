@@ -9,46 +9,27 @@ from app.models.commune_map import CommuneMap
 from app.models.district import District
 from app.models.district_map import DistrictMap
 from app.models.survey import Survey
-from geoalchemy2 import functions as geofunc
-from sqlalchemy import and_, case, func, Select, select
+from app.repositories.geo_year_index_repo import get_geo_year_index
+from app.repositories.geometry_cache_repo import DEFAULT_DETAIL, geojson_cache_join
+from app.schemas.geo import GeometryDetail
+from sqlalchemy import and_, func, Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
 JoinConfig = tuple[Any, Any]
 
 
-def _geojson_col(geom_col: Any) -> Any:
-    return geofunc.ST_AsGeoJSON(geofunc.ST_Transform(geom_col, 4326), maxdecimaldigits=5)
-
-
 async def _count_from_stmt(db: AsyncSession, stmt: Select[Any]) -> int:
     result = await db.execute(stmt)
     return int(result.scalar_one() or 0)
 
 
-async def _latest_year(db: AsyncSession, model: Any) -> Optional[int]:
-    stmt = select(func.max(model.year))
-    result = await db.execute(stmt)
-    year = result.scalar_one_or_none()
-    return int(year) if year is not None else None
+async def _latest_year(db: AsyncSession, layer: str) -> Optional[int]:
+    return (await get_geo_year_index(db)).latest(layer)
 
 
-async def _nearest_year(db: AsyncSession, model: Any, target_year: int, window: int = 2) -> Optional[int]:
-    y = model.year
-    stmt = (
-        select(y)
-        .where(and_(y >= target_year - window, y <= target_year + window))
-        .group_by(y)
-        .order_by(
-            func.abs(y - target_year).asc(),
-            case((y <= target_year, 0), else_=1).asc(),
-            y.desc(),
-        )
-        .limit(1)
-    )
-    result = await db.execute(stmt)
-    year = result.scalar_one_or_none()
-    return int(year) if year is not None else None
+async def _nearest_year(db: AsyncSession, layer: str, target_year: int, window: int = 2) -> Optional[int]:
+    return (await get_geo_year_index(db)).nearest(layer, target_year, window)
 
 
 async def get_survey_year_by_uid(db: AsyncSession, survey_uid: int) -> Optional[int]:
@@ -58,19 +39,21 @@ async def get_survey_year_by_uid(db: AsyncSession, survey_uid: int) -> Optional[
     return int(year) if year is not None else None
 
 
-async def get_all_canton_features(db: AsyncSession) -> list[dict]:
-    map_year = await _latest_year(db, CantonMap)
+async def get_all_canton_features(db: AsyncSession, detail: GeometryDetail = DEFAULT_DETAIL) -> list[dict]:
+    map_year = await _latest_year(db, "cantons")
     if map_year is None:
         return []
 
+    cache, onclause, geojson = geojson_cache_join("cantons", CantonMap.uid, CantonMap.geometry, detail=detail)
     stmt = (
         select(
             Canton.uid.label("uid"),
             Canton.name.label("name"),
             Canton.code.label("code"),
-            _geojson_col(CantonMap.geometry).label("geojson"),
+            geojson.label("geojson"),
         )
         .join(CantonMap, and_(CantonMap.canton_uid == Canton.uid, CantonMap.year == map_year))
+        .outerjoin(cache, onclause)
         .order_by(Canton.uid.asc())
     )
     rows = (await db.execute(stmt)).mappings().all()
@@ -98,25 +81,30 @@ async def get_all_canton_features(db: AsyncSession) -> list[dict]:
 
 
 async def get_commune_focus_feature(
-    db: AsyncSession, commune_uid: int, target_year: Optional[int] = None
+    db: AsyncSession,
+    commune_uid: int,
+    target_year: Optional[int] = None,
+    detail: GeometryDetail = DEFAULT_DETAIL,
 ) -> Optional[dict]:
     map_year = (
-        await _nearest_year(db, CommuneMap, target_year)
+        await _nearest_year(db, "communes", target_year)
         if target_year is not None
-        else await _latest_year(db, CommuneMap)
+        else await _latest_year(db, "communes")
     )
     if map_year is None:
         return None
 
+    cache, onclause, geojson = geojson_cache_join("communes", CommuneMap.uid, CommuneMap.geometry, detail=detail)
     stmt = (
         select(
             Commune.uid.label("uid"),
             Commune.name.label("name"),
             Commune.code.label("code"),
             Commune.district_uid.label("district_uid"),
-            _geojson_col(CommuneMap.geometry).label("geojson"),
+            geojson.label("geojson"),
         )
         .join(CommuneMap, and_(CommuneMap.commune_uid == Commune.uid, CommuneMap.year == map_year))
+        .outerjoin(cache, onclause)
         .where(Commune.uid == commune_uid)
         .limit(1)
     )
@@ -138,20 +126,24 @@ async def get_commune_focus_feature(
     }
 
 
-async def get_district_focus_feature(db: AsyncSession, district_uid: int) -> Optional[dict]:
-    map_year = await _latest_year(db, DistrictMap)
+async def get_district_focus_feature(
+    db: AsyncSession, district_uid: int, detail: GeometryDetail = DEFAULT_DETAIL
+) -> Optional[dict]:
+    map_year = await _latest_year(db, "districts")
     if map_year is None:
         return None
 
+    cache, onclause, geojson = geojson_cache_join("districts", DistrictMap.uid, DistrictMap.geometry, detail=detail)
     stmt = (
         select(
             District.uid.label("uid"),
             District.name.label("name"),
             District.code.label("code"),
             District.canton_uid.label("canton_uid"),
-            _geojson_col(DistrictMap.geometry).label("geojson"),
+            geojson.label("geojson"),
         )
         .join(DistrictMap, and_(DistrictMap.district_id == District.uid, DistrictMap.year == map_year))
+        .outerjoin(cache, onclause)
         .where(District.uid == district_uid)
         .limit(1)
     )
@@ -173,19 +165,23 @@ async def get_district_focus_feature(db: AsyncSession, district_uid: int) -> Opt
     }
 
 
-async def get_canton_focus_feature(db: AsyncSession, canton_uid: int) -> Optional[dict]:
-    map_year = await _latest_year(db, CantonMap)
+async def get_canton_focus_feature(
+    db: AsyncSession, canton_uid: int, detail: GeometryDetail = DEFAULT_DETAIL
+) -> Optional[dict]:
+    map_year = await _latest_year(db, "cantons")
     if map_year is None:
         return None
 
+    cache, onclause, geojson = geojson_cache_join("cantons", CantonMap.uid, CantonMap.geometry, detail=detail)
     stmt = (
         select(
             Canton.uid.label("uid"),
             Canton.name.label("name"),
             Canton.code.label("code"),
-            _geojson_col(CantonMap.geometry).label("geojson"),
+            geojson.label("geojson"),
         )
         .join(CantonMap, and_(CantonMap.canton_uid == Canton.uid, CantonMap.year == map_year))
+        .outerjoin(cache, onclause)
         .where(Canton.uid == canton_uid)
         .limit(1)
     )
@@ -262,22 +258,25 @@ async def _get_child_features_for_parent(
     *,
     child_model: Any,
     map_model: Any,
+    layer: str,
     map_fk_column: Any,
     child_uid_column: Any,
     parent_fk_column: Any,
     parent_uid: int,
     level: str,
+    detail: GeometryDetail = DEFAULT_DETAIL,
 ) -> list[dict]:
-    map_year = await _latest_year(db, map_model)
+    map_year = await _latest_year(db, layer)
     if map_year is None:
         return []
 
+    cache, onclause, geojson = geojson_cache_join(layer, map_model.uid, map_model.geometry, detail=detail)
     stmt = (
         select(
             child_model.uid.label("uid"),
             child_model.name.label("name"),
             child_model.code.label("code"),
-            _geojson_col(map_model.geometry).label("geojson"),
+            geojson.label("geojson"),
         )
         .join(
             map_model,
@@ -286,6 +285,7 @@ async def _get_child_features_for_parent(
                 map_model.year == map_year,
             ),
         )
+        .outerjoin(cache, onclause)
         .where(parent_fk_column == parent_uid)
         .order_by(child_model.uid.asc())
     )
@@ -318,30 +318,36 @@ async def _get_child_features_for_parent(
 async def get_all_commune_features_for_district(
     db: AsyncSession,
     district_uid: int,
+    detail: GeometryDetail = DEFAULT_DETAIL,
 ) -> list[dict]:
     return await _get_child_features_for_parent(
         db,
         child_model=Commune,
         map_model=CommuneMap,
+        layer="communes",
         map_fk_column=CommuneMap.commune_uid,
         child_uid_column=Commune.uid,
         parent_fk_column=Commune.district_uid,
         parent_uid=district_uid,
         level="commune",
+        detail=detail,
     )
 
 
 async def get_all_district_features_for_canton(
     db: AsyncSession,
     canton_uid: int,
+    detail: GeometryDetail = DEFAULT_DETAIL,
 ) -> list[dict]:
     return await _get_child_features_for_parent(
         db,
         child_model=District,
         map_model=DistrictMap,
+        layer="districts",
         map_fk_column=DistrictMap.district_id,
         child_uid_column=District.uid,
         parent_fk_column=District.canton_uid,
         parent_uid=canton_uid,
         level="district",
+        detail=detail,
     )
@@ -0,0 +1,215 @@
+# Recherche transversale (/search) sur la table search_document.
+# Chercher dans l'admin demandait un /pageAll/suggest par entité (préfixe sur
+# quelques colonnes, textes multilingues ignorés). Chaque entité cherchable
+# a un document : tsvector par langue (racinisation fr / de / it / en,
+# "simple" pour noms, codes et romanche) et texte normalisé pour pg_trgm.
+# Une requête classe les résultats de toutes les entités ensemble.
+from typing import Any, Iterable, Optional
+
+
+from app.models import Base
+from app.models.canton import Canton
+from app.models.commune import Commune
+from app.models.district import District
+from app.models.option import Option
+from app.models.question_category import QuestionCategory
+from app.models.question_global import QuestionGlobal
+from app.models.question_per_survey import QuestionPerSurvey
+from app.models.search_document import SearchDocument
+from app.models.survey import Survey
+from app.repositories.text_search_repo import escape_like, fold
+from app.schemas.pageAll import EntityEnum
+from sqlalchemy import and_, delete, func, insert, literal, literal_column, or_, select, String
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# langue -> (colonne tsvector, configuration de recherche plein texte)
+LANGUAGES = {
+    "simple": ("tsv_simple", "simple"),
+    "fr": ("tsv_fr", "french"),
+    "de": ("tsv_de", "german"),
+    "it": ("tsv_it", "italian"),
+    "en": ("tsv_en", "english"),
+}
+
+
+class SearchSource:
+    def __init__(
+        self,
+        model: Any,
+        code_attr: Optional[str],
+        name_attr: str,
+        simple_attrs: list[str],
+        prefix: Optional[str] = None,
+    ):
+        self.model = model
+        self.code_attr = code_attr
+        self.name_attr = name_attr
+        self.simple_attrs = simple_attrs  # noms, codes, libellés, romanche
+        self.prefix = prefix  # "name" / "text" : colonnes <prefix>_fr, _de, _it, _en
+
+    def lang_attrs(self, lang: str) -> list[str]:
+        if lang == "simple":
+            return self.simple_attrs
+        return [f"{self.prefix}_{lang}"] if self.prefix else []
+
+
+_GEO = ["name", "code", "name_ro"]
+_TEXTS = ["text_ro"]
+
+SEARCH_SOURCES: dict[EntityEnum, SearchSource] = {
+    EntityEnum.commune: SearchSource(Commune, "code", "name", _GEO, prefix="name"),
+    EntityEnum.district: SearchSource(District, "code", "name", _GEO, prefix="name"),
+    EntityEnum.canton: SearchSource(Canton, "code", "name", _GEO, prefix="name"),
+    EntityEnum.survey: SearchSource(Survey, None, "name", ["name"]),
+    EntityEnum.question_per_survey: SearchSource(
+        QuestionPerSurvey, "code", "label", ["code", "label", *_TEXTS], prefix="text"
+    ),
+    EntityEnum.question_global: SearchSource(QuestionGlobal, None, "label", ["label", *_TEXTS], prefix="text"),
+    EntityEnum.question_category: SearchSource(QuestionCategory, None, "label", ["label", *_TEXTS], prefix="text"),
+    # Option : name = label_ (fallback sur value), code = value
+    EntityEnum.option: SearchSource(Option, "value", "label_", ["value", "label_", *_TEXTS], prefix="text"),
+}
+
+_DOCUMENT_COLUMNS = [
+    "entity",
+    "uid",
+    "code",
+    "name",
+    *[column for column, _ in LANGUAGES.values()],
+    "search_text",
+]
+
+
+def _regconfig(config: str) -> Any:
+    # constante de ce module, jamais une entrée utilisateur
+    return literal_column(f"'{config}'::regconfig")
+
+
+def _joined(model: Any, attrs: list[str]) -> Any:
+    return func.concat_ws(" ", *[getattr(model, attr) for attr in attrs]) if attrs else literal("", String)
+
+
+def _document_stmt(entity: EntityEnum, source: SearchSource) -> Any:
+    model = source.model
+    name = getattr(model, source.name_attr)
+    if source.code_attr:
+        name = func.coalesce(name, getattr(model, source.code_attr))
+
+    vectors = [
+        func.to_tsvector(_regconfig(config), func.f_unaccent(_joined(model, source.lang_attrs(lang))))
+        for lang, (_, config) in LANGUAGES.items()
+    ]
+    all_attrs = list(dict.fromkeys([a for lang in LANGUAGES for a in source.lang_attrs(lang)]))
+    return select(
+        literal(entity.value, String),
+        model.uid,
+        getattr(model, source.code_attr) if source.code_attr else literal(None, String),
+        func.coalesce(name, ""),
+        *vectors,
+        fold(_joined(model, all_attrs)),
+    )
+
+
+async def build_search_documents(
+    db: AsyncSession,
+    entities: Optional[Iterable[EntityEnum]] = None,
+    uids: Optional[Iterable[int]] = None,
+) -> None:
+    """
+    (Re)construit les documents des entités données (toutes par défaut),
+    limités à uids si fourni (un uid sans ligne source perd son document).
+    Ne commit pas : l'appelant garde la main sur la transaction.
+    """
+    uid_list = list(uids) if uids is not None else None
+    for entity in entities if entities is not None else SEARCH_SOURCES:
+        source = SEARCH_SOURCES.get(entity)
+        if source is None:
+            continue
+        del_stmt = delete(SearchDocument).where(SearchDocument.entity == entity.value)
+        doc_stmt = _document_stmt(entity, source)
+        if uid_list is not None:
+            del_stmt = del_stmt.where(SearchDocument.uid.in_(uid_list))
+            doc_stmt = doc_stmt.where(source.model.uid.in_(uid_list))
+        await db.execute(del_stmt)
+        await db.execute(insert(SearchDocument).from_select(_DOCUMENT_COLUMNS, doc_stmt))
+
+
+def _cascade_conditions(model: Any, conditions: list[Any]) -> dict[Any, Any]:
+    """table -> condition des lignes supprimées avec celles de model (ON DELETE CASCADE, transitif)."""
+    where = {model.__table__: and_(*conditions)}
+    # parents avant enfants : la condition d'un parent est connue avant celle de ses enfants
+    for table in Base.metadata.sorted_tables:
+        if table in where:
+            continue
+        linked = [
+            fk.parent.in_(select(fk.column).where(where[fk.column.table]))
+            for fk in table.foreign_keys
+            if fk.ondelete == "CASCADE" and fk.column.table in where
+        ]
+        if linked:
+            where[table] = or_(*linked)
+    return where
+
+
+async def search_uids_before_write(
+    db: AsyncSession, model: Any, conditions: list[Any], *, deleted: bool = False
+) -> dict[EntityEnum, list[int]]:
+    """
+    Avant /edit ou /delete : uids des documents à reconstruire pour les lignes
+    de model filtrées par conditions. Une suppression emporte aussi d'autres
+    entités cherchables (ON DELETE CASCADE : canton -> districts -> communes,
+    enquête -> questions), lues tant qu'elles existent encore.
+    """
+    where = _cascade_conditions(model, conditions) if deleted else {model.__table__: and_(*conditions)}
+    changed: dict[EntityEnum, list[int]] = {}
+    for entity, source in SEARCH_SOURCES.items():
+        condition = where.get(source.model.__table__)
+        if condition is None:
+            continue
+        uids = list((await db.execute(select(source.model.uid).where(condition))).scalars())
+        if uids:
+            changed[entity] = uids
+    return changed
+
+
+async def search_documents_after_change(db: AsyncSession, changed: dict[EntityEnum, list[int]]) -> None:
+    """Après /edit ou /delete, avant le commit : reconstruit les documents relevés par search_uids_before_write."""
+    for entity, uids in changed.items():
+        await build_search_documents(db, [entity], uids)
+
+
+async def search_all(
+    db: AsyncSession,
+    q: str,
+    limit: int = 20,
+    entities: Optional[list[EntityEnum]] = None,
+) -> list[dict]:
+    """
+    Résultats classés toutes entités confondues, en une requête : plein texte
+    dans chaque langue (sans accents) ou texte contenant / ressemblant à q
+    (pg_trgm). Score = meilleur ts_rank + similarité de mots.
+    """
+    q = q.strip()
+    if len(q) < 2:
+        return []
+
+    doc = SearchDocument
+    q_fold = fold(literal(q))
+    contains = fold(literal(f"%{escape_like(q.lower())}%"))
+
+    matches = [doc.search_text.like(contains), doc.search_text.op("%>")(q_fold)]
+    ranks = []
+    for column, config in LANGUAGES.values():
+        tsv = getattr(doc, column)
+        tsquery = func.websearch_to_tsquery(_regconfig(config), func.f_unaccent(literal(q)))
+        matches.append(tsv.bool_op("@@")(tsquery))
+        ranks.append(func.ts_rank(tsv, tsquery))
+    score = (func.greatest(*ranks) + func.word_similarity(q_fold, doc.search_text)).label("score")
+
+    stmt = select(doc.entity, doc.uid, doc.code, doc.name, score).where(or_(*matches))
+    if entities:
+        stmt = stmt.where(doc.entity.in_([e.value for e in entities]))
+    stmt = stmt.order_by(score.desc(), doc.entity, doc.name, doc.uid).limit(limit)
+
+    return [dict(row) for row in (await db.execute(stmt)).mappings()]
@@ -0,0 +1,100 @@
+# Recherche approximative (pg_trgm) sur les noms, libellés et codes.
+# unaccent() n'est pas IMMUTABLE (le dictionnaire peut changer) : il ne peut
+# pas servir dans un index. f_unaccent() l'enveloppe avec un dictionnaire
+# explicite et est déclarée IMMUTABLE ; lower(f_unaccent(col)) est indexé en
+# GIN gin_trgm_ops, ce qui sert à la fois LIKE '%q%' et la similarité de mots
+# (opérateur %>, tolère les fautes de frappe).
+from typing import Any, Sequence
+
+
+from app.models.canton import Canton
+from app.models.commune import Commune
+from app.models.district import District
+from app.models.option import Option
+from app.models.question_category import QuestionCategory
+from app.models.question_global import QuestionGlobal
+from app.models.question_per_survey import QuestionPerSurvey
+from app.models.survey import Survey
+from sqlalchemy import case, func, literal, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+
+UNACCENT_FUNCTION_DDL = """
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+"""
+
+_LOCALIZED_NAMES = ["name", "name_fr", "name_de", "name_it", "name_ro", "name_en", "code"]
+_LOCALIZED_TEXTS = ["text_fr", "text_de", "text_it", "text_ro", "text_en"]
+
+# (modèle, attributs) : colonnes cherchées par geoSearch et /pageAll/suggest.
+# answer n'y est pas : un index trigramme sur des millions de valeurs coûte
+# plus qu'il ne rapporte, sa recherche reste un préfixe.
+TRIGRAM_COLUMNS: list[tuple[Any, list[str]]] = [
+    (Commune, _LOCALIZED_NAMES),
+    (District, _LOCALIZED_NAMES),
+    (Canton, _LOCALIZED_NAMES),
+    (QuestionPerSurvey, ["code", "label"]),
+    (QuestionGlobal, ["label"]),
+    (QuestionCategory, ["label", *_LOCALIZED_TEXTS]),
+    (Option, ["value", "label_"]),
+    (Survey, ["name"]),
+]
+
+# rangs de correspondance, du meilleur au moins bon
+RANK_EXACT, RANK_PREFIX, RANK_CONTAINS, RANK_FUZZY = 0, 1, 2, 3
+
+
+def fold(expr: Any) -> ColumnElement:
+    """lower(f_unaccent(expr)) : forme normalisée, identique à l'expression indexée."""
+    return func.lower(func.f_unaccent(expr))
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def trigram_index_ddl() -> list[str]:
+    """CREATE INDEX IF NOT EXISTS ... USING gin (lower(f_unaccent(col)) gin_trgm_ops) par colonne."""
+    out = []
+    for model, attrs in TRIGRAM_COLUMNS:
+        table = model.__tablename__
+        for attr in attrs:
+            column = getattr(model, attr).expression.name
+            out.append(
+                f'CREATE INDEX IF NOT EXISTS "ix_{table}_{column}_trgm" ON "{table}" '
+                f'USING gin (lower(f_unaccent("{column}")) gin_trgm_ops)'
+            )
+    return out
+
+
+def fuzzy_match(columns: Sequence[Any], q: str) -> ColumnElement:
+    """Une des colonnes contient q ou lui ressemble (similarité de mots pg_trgm), sans accents ni casse."""
+    q_fold = fold(literal(q))
+    contains = f"%{escape_like(q.lower())}%"
+    return or_(*[or_(fold(col).like(fold(literal(contains))), fold(col).op("%>")(q_fold)) for col in columns])
+
+
+def match_rank(columns: Sequence[Any], q: str) -> ColumnElement:
+    """Meilleur rang sur les colonnes : exact, préfixe, contenu, puis approximatif."""
+    q_fold = fold(literal(q))
+    prefix = fold(literal(f"{escape_like(q.lower())}%"))
+    contains = fold(literal(f"%{escape_like(q.lower())}%"))
+    ranks = [
+        case(
+            (fold(col) == q_fold, RANK_EXACT),
+            (fold(col).like(prefix), RANK_PREFIX),
+            (fold(col).like(contains), RANK_CONTAINS),
+            else_=RANK_FUZZY,
+        )
+        for col in columns
+    ]
+    return func.least(*ranks) if len(ranks) > 1 else ranks[0]
+
+
+def similarity(columns: Sequence[Any], q: str) -> ColumnElement:
+    """Similarité de mots maximale entre q et les colonnes (0..1), pour départager un même rang."""
+    q_fold = fold(literal(q))
+    scores = [func.coalesce(func.word_similarity(q_fold, fold(col)), 0) for col in columns]
+    return func.greatest(*scores) if len(scores) > 1 else scores[0]
@@ -45,3 +45,42 @@ class ChoroplethResponse(BaseModel):
     granularity: ChoroplethGranularity
     legend: MapLegend
     feature_collection: FeatureCollection = Field(..., description="GeoJSON FeatureCollection des communes")
+
+
+class ChoroplethUnitValue(BaseModel):
+    value: Optional[Any] = None
+    value_kind: Literal["value", "no_response", "no_data"]
+    fill_color: Optional[str] = None
+    # rayures multicolores pour les ex-aequo (district/canton), sinon None
+    pattern: Optional[dict[str, Any]] = None
+
+
+class ChoroplethValuesResponse(BaseModel):
+    question_uid: int
+    year_requested: int
+    granularity: ChoroplethGranularity
+    # couche et année de géométrie à demander à /geo/choropleth/geometry
+    geo_layer: Literal["communes", "districts", "cantons"]
+    geo_year: Optional[int] = None
+    legend: MapLegend
+    values: dict[int, ChoroplethUnitValue] = Field(..., description="unit_uid -> valeur et couleur")
+    warnings: list[dict[str, Any]] = Field(default_factory=list)
+
+
+class ChoroplethYearValues(BaseModel):
+    year: int
+    # QuestionPerSurvey.uid utilisé pour cette année
+    question_uid: Optional[int] = None
+    geo_year: Optional[int] = None
+    legend: MapLegend
+    values: dict[int, ChoroplethUnitValue] = Field(default_factory=dict)
+    warnings: list[dict[str, Any]] = Field(default_factory=list)
+
+
+class ChoroplethBatchResponse(BaseModel):
+    question_global_uid: int
+    granularity: ChoroplethGranularity
+    geo_layer: Literal["communes", "districts", "cantons"]
+    years: list[ChoroplethYearValues]
+    # geo_year -> FeatureCollection, une seule fois par année de carte (include_geometry=true)
+    geometries: Optional[dict[int, FeatureCollection]] = None
@@ -4,12 +4,22 @@ Conventions:
 - Precise types (Optional, List, Dict, etc.)
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 
 from pydantic import BaseModel, Field
 
 
+# Niveau de simplification des géométries servies ("full" = géométrie d'origine)
+GeometryDetail = Literal["full", "high", "medium", "low"]
+
+# Format de /geo/by_year : une FeatureCollection par couche, ou une topologie TopoJSON
+GeoFormat = Literal["geojson", "topojson"]
+
+# Couches servies en tuiles vectorielles (/geo/tiles)
+TileLayer = Literal["country", "lakes", "cantons", "districts", "communes"]
+
+
 class Geometry(BaseModel):
     type: str
     coordinates: Any  # listes imbriquées GeoJSON
@@ -28,6 +28,12 @@ class OrderDirEnum(str, Enum):
     desc = "desc"
 
 
+class CountModeEnum(str, Enum):
+    exact = "exact"  # COUNT à chaque appel
+    cached = "cached"  # COUNT exact mémorisé, maintenu par /edit et /delete
+    estimated = "estimated"  # statistiques du planificateur (pg_class.reltuples / EXPLAIN)
+
+
 class AllItem(BaseModel):
     uid: int
     code: Optional[str] = None
@@ -45,9 +51,12 @@ class AllItem(BaseModel):
 class AllPayload(BaseModel):
     items: List[AllItem]
     total: int
-    page: int
+    total_mode: CountModeEnum = CountModeEnum.exact
+    page: Optional[int] = None  # None en pagination par curseur
     per_page: int
     pages: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 
 class AllResponse(BaseModel):
@@ -64,6 +73,7 @@ class SuggestResponse(BaseModel):
 
 class FindPageData(BaseModel):
     page: int
+    items: Optional[List[AllItem]] = None  # contenu de la page si with_items
 
 
 class FindPageResponse(BaseModel):
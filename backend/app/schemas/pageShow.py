@@ -1,6 +1,7 @@
 from typing import Any, Dict, List, Literal, Optional
 
 
+from app.schemas.pageAll import CountModeEnum
 from pydantic import BaseModel
 
 
@@ -76,6 +77,7 @@ class ShowInsightsResponse(BaseModel):
 class ShowChildrenData(BaseModel):
     items: List[Dict[str, Any]]
     total: int
+    total_mode: CountModeEnum = CountModeEnum.exact
     page: int
     per_page: int
     pages: int
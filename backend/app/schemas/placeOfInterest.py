@@ -86,6 +86,8 @@ class GeoPointOut(BaseModel):
 
     lat: float
     lon: float
+    # emprise [min_lon, min_lat, max_lon, max_lat] (zoom sur l'entité)
+    bbox: Optional[list[float]] = None
 
 
 class GeoPointResponse(BaseModel):
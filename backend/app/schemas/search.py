@@ -0,0 +1,19 @@
+from typing import List, Optional
+
+
+from app.schemas.pageAll import EntityEnum
+from pydantic import BaseModel
+
+
+class SearchItem(BaseModel):
+    entity: EntityEnum
+    uid: int
+    code: Optional[str] = None
+    name: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    success: bool
+    detail: str
+    data: List[SearchItem]
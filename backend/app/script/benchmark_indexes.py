@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import json
+import logging
+
+
+from app.core.logging_config import configure_logging
+from app.db import engine
+from app.models import Answer, AnswerAggregate, Base, CantonMap, Commune, District, Lake, LakeMap
+from app.services.choropleth_service import choropleth_stmt
+from geoalchemy2 import functions as geofunc
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects import postgresql
+
+
+""""
+Benchmark des index (spatiaux, composites, clés étrangères) sur les requêtes
+chaudes : carte choroplèthe, preview canton (lacs par ST_Intersects),
+compteurs de pageShow, réponses d'une (question, année).
+
+Chaque requête est exécutée avec EXPLAIN ANALYZE deux fois : avec les index,
+puis dans une transaction qui supprime les index secondaires des modèles
+(DROP INDEX est transactionnel, la transaction est annulée). Affiche les
+temps d'exécution et les nœuds du plan (Seq Scan / Index Scan ...).
+
+DROP INDEX verrouille les tables le temps de la mesure : à lancer sur une
+base de développement.
+
+Usage : python -m app.script.benchmark_indexes [--runs 3]
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def _secondary_indexes() -> list[str]:
+    """Index non uniques déclarés par les modèles (GiST GeoAlchemy2 compris)."""
+    return sorted(
+        index.name
+        for table in Base.metadata.sorted_tables
+        for index in table.indexes
+        if not index.unique and index.name
+    )
+
+
+async def _sample(conn) -> dict:
+    """Paramètres réalistes tirés de la base (première ligne disponible)."""
+    agg = (
+        await conn.execute(
+            select(AnswerAggregate.question_uid, AnswerAggregate.year)
+            .where(AnswerAggregate.level == "commune")
+            .limit(1)
+        )
+    ).first()
+    district = (await conn.execute(select(District.uid, District.canton_uid).limit(1))).first()
+    canton_year = (await conn.execute(select(func.max(CantonMap.year)))).scalar()
+    lake_year = (await conn.execute(select(func.max(LakeMap.year)))).scalar()
+    commune_uid = (await conn.execute(select(Answer.commune_uid).limit(1))).scalar()
+    return {
+        "q_uid": agg.question_uid if agg else 0,
+        "year": agg.year if agg else 0,
+        "district_uid": district.uid if district else 0,
+        "canton_uid": district.canton_uid if district else 0,
+        "canton_year": canton_year or 0,
+        "lake_year": lake_year or 0,
+        "commune_uid": commune_uid or 0,
+    }
+
+
+def _queries(p: dict) -> dict:
+    return {
+        "choropleth_commune": choropleth_stmt(
+            q_uid=p["q_uid"], year=p["year"], granularity="commune", geo_year=None, with_geometry=True
+        ),
+        # clés seules (index-only scan) : value n'est pas dans l'index (voir models/answer.py)
+        "answers_question_year": select(Answer.commune_uid).where(
+            Answer.question_uid == p["q_uid"], Answer.year == p["year"]
+        ),
+        "preview_lakes_intersects": select(Lake.uid)
+        .join(LakeMap.lake)
+        .join(CantonMap, and_(CantonMap.year == p["canton_year"], CantonMap.canton_uid == p["canton_uid"]))
+        .where(LakeMap.year == p["lake_year"], geofunc.ST_Intersects(LakeMap.geometry, CantonMap.geometry)),
+        "pageshow_commune_answers": select(func.count())
+        .select_from(Answer)
+        .where(Answer.commune_uid == p["commune_uid"]),
+        "pageshow_district_answers": select(func.count())
+        .select_from(Answer)
+        .join(Commune, Commune.uid == Answer.commune_uid)
+        .where(Commune.district_uid == p["district_uid"]),
+        "pageshow_canton_communes": select(func.count())
+        .select_from(Commune)
+        .join(District, District.uid == Commune.district_uid)
+        .where(District.canton_uid == p["canton_uid"]),
+        "canton_by_uid_year": select(CantonMap.uid).where(
+            CantonMap.canton_uid == p["canton_uid"], CantonMap.year == p["canton_year"]
+        ),
+    }
+
+
+def _plan_nodes(plan: dict) -> list[str]:
+    """Nœuds du plan, "Index Scan (ix_...)" pour les accès par index."""
+    node = plan["Node Type"]
+    if plan.get("Index Name"):
+        node += f" ({plan['Index Name']})"
+    out = [node]
+    for child in plan.get("Plans", []):
+        out.extend(_plan_nodes(child))
+    return out
+
+
+async def _explain(conn, stmt, runs: int) -> tuple[float, list[str]]:
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    best = float("inf")
+    nodes: list[str] = []
+    for _ in range(runs):
+        raw = (await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")).scalar()
+        result = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+        best = min(best, result["Execution Time"])
+        nodes = _plan_nodes(result["Plan"])
+    return best, nodes
+
+
+async def benchmark(runs: int) -> None:
+    async with engine.connect() as conn:
+        params = await _sample(conn)
+        queries = _queries(params)
+        print(f"Sample parameters: {params}")
+
+        with_idx = {name: await _explain(conn, stmt, runs) for name, stmt in queries.items()}
+        await conn.rollback()
+
+        trans = await conn.begin()
+        try:
+            for name in _secondary_indexes():
+                await conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{name}"')
+            without_idx = {name: await _explain(conn, stmt, runs) for name, stmt in queries.items()}
+        finally:
+            await trans.rollback()
+
+    for name in queries:
+        (t_with, plan_with), (t_without, plan_without) = with_idx[name], without_idx[name]
+        print(f"\n== {name}: {t_without:.2f} ms -> {t_with:.2f} ms")
+        print(f"   without indexes: {' > '.join(plan_without)}")
+        print(f"   with indexes:    {' > '.join(plan_with)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3, help="exécutions par requête (meilleur temps retenu)")
+    args = parser.parse_args()
+    configure_logging()
+    asyncio.run(benchmark(args.runs))
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+
+
+from app.core.logging_config import configure_logging
+from app.db import engine, SessionLocal
+from app.models import DataVersion, GeometryGeoJSON, GeoUnitPoint
+from app.repositories.data_version_repo import bump_data_version
+from app.repositories.geo_unit_point_repo import build_geo_unit_points
+from app.repositories.geometry_cache_repo import build_geojson_cache
+
+
+""""
+Script pour (re)construire les tables dérivées des géométries
+(geometry_geojson, geo_unit_point) sur une base existante.
+
+Utile après une mise à jour sans réinitialiser la base (init_db_async -f).
+L'import géo (populate_geo_db) remplit déjà ces tables.
+Ces tables ne sont que des caches dérivés des *_map : elles sont recréées pour
+suivre les évolutions de leur schéma (ex. colonne detail des niveaux simplifiés).
+"""
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_geojson_cache() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(GeometryGeoJSON.__table__.drop, checkfirst=True)
+        await conn.run_sync(GeometryGeoJSON.__table__.create)
+        await conn.run_sync(GeoUnitPoint.__table__.drop, checkfirst=True)
+        await conn.run_sync(GeoUnitPoint.__table__.create)
+        await conn.run_sync(DataVersion.__table__.create, checkfirst=True)
+
+    async with SessionLocal() as session:
+        async with session.begin():
+            await build_geojson_cache(session)
+            await build_geo_unit_points(session)
+            await bump_data_version(session, commit=False)
+    logger.info("geometry_geojson and geo_unit_point rebuilt.")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(rebuild_geojson_cache())
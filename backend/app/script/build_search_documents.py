@@ -0,0 +1,39 @@
+import asyncio
+import logging
+
+
+from app.core.logging_config import configure_logging
+from app.db import engine, ensure_extensions, SessionLocal
+from app.models import SearchDocument
+from app.repositories.search_repo import build_search_documents
+
+
+""""
+Script pour (re)construire la table search_document (recherche transversale
+/search) sur une base existante.
+
+Utile après une mise à jour sans réinitialiser la base (init_db_async -f).
+L'import (populate_db / populate_demo_db) et /edit, /delete la tiennent déjà
+à jour. La table n'est qu'un index dérivé des tables sources : elle est
+recréée pour suivre les évolutions de son schéma.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_search_documents() -> None:
+    # f_unaccent() et pg_trgm (index trigramme de search_text)
+    await ensure_extensions()
+    async with engine.begin() as conn:
+        await conn.run_sync(SearchDocument.__table__.drop, checkfirst=True)
+        await conn.run_sync(SearchDocument.__table__.create)
+
+    async with SessionLocal() as session:
+        async with session.begin():
+            await build_search_documents(session)
+    logger.info("search_document rebuilt.")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(rebuild_search_documents())
@@ -0,0 +1,29 @@
+import asyncio
+import logging
+
+
+from app.core.logging_config import configure_logging
+from app.db import SessionLocal
+from app.services.geo_static_service import export_static_layers
+
+
+"""
+Script pour (ré)exporter les couches géo pré-compressées dans static/geo/.
+
+À relancer après un import géo ou une reconstruction du cache GeoJSON
+(populate_geo_db l'appelle déjà). Les fichiers inchangés sont conservés,
+ceux qui ne figurent plus dans le manifeste sont supprimés.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+async def export_static_geo() -> None:
+    async with SessionLocal() as session:
+        manifest = await export_static_layers(session)
+    logger.info("Static geo layers exported (%d layers).", len(manifest["layers"]))
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(export_static_geo())
@@ -5,7 +5,7 @@ import logging
 from app import models
 from app.core.config import settings
 from app.core.logging_config import configure_logging
-from app.db import AsyncSessionLocal, engine, ensure_extensions
+from app.db import analyze_tables, AsyncSessionLocal, engine, ensure_extensions, ensure_indexes
 from app.models import Base
 from app.repositories.user_repo import any_admin_exists, create_user
 from app.script.populate_config import populate_config_if_empty
@@ -21,7 +21,7 @@ async def create_schema(is_demo: bool, delete_force: bool) -> None:
     try:
         await ensure_extensions()
     except Exception as e:
-        logger.warning("Could not ensure extensions (unaccent/postgis): %s", e)
+        logger.warning("Could not ensure extensions (unaccent/pg_trgm/postgis): %s", e)
     if delete_force:
         async with engine.begin() as conn:
             # Drop toute les tables pour repartir de 0
@@ -33,6 +33,10 @@ async def create_schema(is_demo: bool, delete_force: bool) -> None:
             await conn.run_sync(Base.metadata.create_all)
         logger.info("Database schema created.")
 
+    # Index (spatiaux, composites, clés étrangères) manquants sur une base existante
+    await ensure_indexes()
+    logger.info("Indexes ensured.")
+
     if settings.ROOT_EMAIL and settings.ROOT_PASSWORD:
         async with AsyncSessionLocal() as db:
             admin_exists = await any_admin_exists(db)
@@ -65,6 +69,9 @@ async def create_schema(is_demo: bool, delete_force: bool) -> None:
     await populate_async_geo(is_demo)
     logger.info("Database populated successfully with geo data.")
 
+    await analyze_tables()
+    logger.info("Planner statistics refreshed (ANALYZE).")
+
 
 if __name__ == "__main__":
     import argparse
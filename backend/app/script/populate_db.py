@@ -11,6 +11,9 @@ from app.models.district import District
 from app.models.question_category import QuestionCategory
 from app.models.question_per_survey import QuestionPerSurvey
 from app.models.survey import Survey
+from app.repositories.answer_aggregate_repo import refresh_answer_aggregates
+from app.repositories.data_version_repo import bump_data_version
+from app.repositories.search_repo import build_search_documents
 from sqlalchemy import select
 from tqdm import tqdm
 import pandas as pd
@@ -245,3 +248,10 @@ async def populate_db() -> None:
                         await session.flush()
 
                     # print(f">>> INSERTING ANSWER for commune {db_commune.name} {index}/{len(crc)}")
+
+        # Agrégats des réponses pour les cartes choroplèthes (table answer_aggregate)
+        # et documents de la recherche transversale (table search_document)
+        async with session.begin():
+            await refresh_answer_aggregates(session)
+            await build_search_documents(session)
+            await bump_data_version(session, commit=False)
@@ -13,6 +13,9 @@ from app.models.question_global_option_association import QuestionGlobalOptionAs
 from app.models.question_option_association import QuestionOptionAssociation
 from app.models.question_per_survey import QuestionPerSurvey
 from app.models.survey import Survey
+from app.repositories.answer_aggregate_repo import refresh_answer_aggregates
+from app.repositories.data_version_repo import bump_data_version
+from app.repositories.search_repo import build_search_documents
 from sqlalchemy import select
 from tqdm import tqdm
 import pandas as pd
@@ -432,3 +435,10 @@ async def populate_demo_db() -> None:
                         )
                         session.add(db_answer)
                         await session.flush()
+
+        # Agrégats des réponses pour les cartes choroplèthes (table answer_aggregate)
+        # et documents de la recherche transversale (table search_document)
+        async with session.begin():
+            await refresh_answer_aggregates(session)
+            await build_search_documents(session)
+            await bump_data_version(session, commit=False)
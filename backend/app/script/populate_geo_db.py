@@ -6,6 +6,10 @@ import tempfile as tf
 
 from app.db import SessionLocal
 from app.models import Canton, CantonMap, Commune, CommuneMap, Country, District, DistrictMap, Lake, LakeMap
+from app.repositories.data_version_repo import bump_data_version
+from app.repositories.geo_unit_point_repo import build_geo_unit_points
+from app.repositories.geometry_cache_repo import build_geojson_cache
+from app.services.geo_static_service import export_static_layers
 from geoalchemy2.shape import from_shape
 from pyproj import Transformer
 from shapely.geometry import shape
@@ -201,6 +205,17 @@ async def populate_async_geo(is_demo: bool) -> None:
                                         await session.flush()
                                         print(f">>>[{fake_year}] INSERTING FAKE LAKE GEODATA {db_lake.name}")
 
+        # Sérialisation GeoJSON pré-calculée de toutes les couches (table geometry_geojson)
+        async with session.begin():
+            await build_geojson_cache(session)
+            await build_geo_unit_points(session)
+            await bump_data_version(session, commit=False)
+            print(">>> GEOJSON CACHE AND UNIT POINTS BUILT")
+
+        # Couches pré-compressées servies par /static (géométries désormais figées)
+        await export_static_layers(session)
+        print(">>> STATIC GEO LAYERS EXPORTED")
+
 
 if __name__ == "__main__":
     asyncio.run(populate_async_geo())
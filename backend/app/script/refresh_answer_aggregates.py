@@ -0,0 +1,36 @@
+import asyncio
+import logging
+
+
+from app.core.logging_config import configure_logging
+from app.db import engine, SessionLocal
+from app.models import AnswerAggregate, DataVersion
+from app.repositories.answer_aggregate_repo import refresh_answer_aggregates
+from app.repositories.data_version_repo import bump_data_version
+
+
+""""
+Script pour (re)construire la table answer_aggregate sur une base existante.
+
+Utile après une mise à jour sans réinitialiser la base (init_db_async -f),
+ou après un import de réponses fait hors des scripts populate_*.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_answer_aggregates() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(AnswerAggregate.__table__.create, checkfirst=True)
+        await conn.run_sync(DataVersion.__table__.create, checkfirst=True)
+
+    async with SessionLocal() as session:
+        async with session.begin():
+            await refresh_answer_aggregates(session)
+            await bump_data_version(session, commit=False)
+    logger.info("answer_aggregate rebuilt.")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(rebuild_answer_aggregates())
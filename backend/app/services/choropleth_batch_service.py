@@ -0,0 +1,286 @@
+# Carte choroplèthe d'une question globale sur toutes ses années de sondage.
+# Remplace N appels /geo/choropleth (un par année) par un nombre fixe de
+# requêtes : contexte (questions par sondage + options), agrégats de toutes
+# les années, unités disponibles par année de carte.
+from typing import Any, Optional
+
+
+from app.core.geojson import dumps, object_json
+from app.models.answer_aggregate import AnswerAggregate
+from app.models.canton import Canton
+from app.models.canton_map import CantonMap
+from app.models.commune import Commune
+from app.models.commune_map import CommuneMap
+from app.models.district import District
+from app.models.district_map import DistrictMap
+from app.models.option import Option
+from app.models.question_option_association import QuestionOptionAssociation
+from app.models.question_per_survey import QuestionPerSurvey
+from app.models.survey import Survey
+from app.repositories.geo_year_index_repo import nearest_year
+from app.repositories.geometry_cache_repo import DEFAULT_DETAIL, LAYER_FOR_LEVEL
+from app.schemas.choropleth import ChoroplethBatchResponse, ChoroplethGranularity, ChoroplethYearValues
+from app.schemas.geo import GeometryDetail
+from app.services.choropleth_legend import apply_legend, MAX_CATEGORIES
+from app.services.choropleth_service import (
+    add_warning,
+    ADMIN_GEO_WINDOW,
+    choropleth_geometry_json,
+    ChoroplethFeature,
+    COMMUNE_GEO_WINDOW,
+    empty_return,
+    features_to_values,
+    FEDERAL_COLUMNS,
+    federal_features,
+    rows_to_features,
+)
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# granularité -> (modèle carte, colonne unité de la carte, modèle unité)
+_LEVEL_MODELS = {
+    "commune": (CommuneMap, CommuneMap.commune_uid, Commune),
+    "district": (DistrictMap, DistrictMap.district_id, District),
+    "canton": (CantonMap, CantonMap.canton_uid, Canton),
+    "federal": (CantonMap, CantonMap.canton_uid, Canton),
+}
+
+
+def _qps_cte(question_global_uid: int) -> Any:
+    """(year, q_uid) : une question par sondage et par année (la plus petite uid si plusieurs)."""
+    return (
+        select(Survey.year.label("year"), QuestionPerSurvey.uid.label("q_uid"))
+        .join(Survey, Survey.uid == QuestionPerSurvey.survey_uid)
+        .where(QuestionPerSurvey.question_global_uid == question_global_uid)
+        .distinct(Survey.year)
+        .order_by(Survey.year, QuestionPerSurvey.uid)
+    ).cte("qps")
+
+
+async def _load_units(
+    db: AsyncSession, granularity: str, year_min: int, year_max: int
+) -> dict[int, dict[int, dict[str, Any]]]:
+    """map_year -> unit_uid -> {map_uid, name, code} pour les cartes dans [year_min, year_max]."""
+    map_model, unit_col, unit_model = _LEVEL_MODELS[granularity]
+    stmt = (
+        select(
+            map_model.year.label("map_year"),
+            map_model.uid.label("map_uid"),
+            unit_model.uid.label("uid"),
+            unit_model.name.label("name"),
+            unit_model.code.label("code"),
+        )
+        .join(unit_model, unit_model.uid == unit_col)
+        .where(map_model.year >= year_min, map_model.year <= year_max)
+    )
+    units: dict[int, dict[int, dict[str, Any]]] = {}
+    for r in (await db.execute(stmt)).mappings():
+        units.setdefault(int(r["map_year"]), {})[int(r["uid"])] = {
+            "map_uid": r["map_uid"],
+            "name": r["name"],
+            "code": r["code"],
+        }
+    return units
+
+
+def _commune_rows(
+    agg_rows: list[dict[str, Any]], units: dict[int, dict[int, dict[str, Any]]], year: int
+) -> list[dict[str, Any]]:
+    """Lignes communes avec la meilleure géométrie par commune dans la fenêtre +-1 (cf. cm_best)."""
+    map_years = list(units)
+    rows = []
+    for a in agg_rows:
+        gid = int(a["unit_uid"])
+        years_for_unit = [y for y in map_years if gid in units[y]]
+        best = nearest_year(years_for_unit, year, COMMUNE_GEO_WINDOW)
+        unit = units[best][gid] if best is not None else {"map_uid": None, "name": None, "code": None}
+        rows.append({**a, **unit, "uid": gid if best is not None else None, "geo_year_used": best})
+    return rows
+
+
+def _commune_geo_year(map_years: list[int], year: int, seen: dict[tuple[int, ...], int]) -> Optional[int]:
+    """
+    Année cible de la géométrie communale d'une année de sondage (None si
+    aucune carte dans la fenêtre). La géométrie d'une cible dépend seulement
+    des années de carte de sa fenêtre, dans l'ordre de préférence de cm_best :
+    deux années de sondage qui ont le même ordre partagent la même géométrie,
+    demandée une fois pour la première de ces années.
+    """
+    in_window = [y for y in map_years if abs(y - year) <= COMMUNE_GEO_WINDOW]
+    key = tuple(sorted(in_window, key=lambda y: (abs(y - year), y > year, -y)))
+    if not key:
+        return None
+    return seen.setdefault(key, year)
+
+
+def _admin_rows(agg_rows: list[dict[str, Any]], units_at_year: dict[int, dict[str, Any]]) -> list[dict[str, Any]]:
+    rows = []
+    for a in agg_rows:
+        unit = units_at_year.get(int(a["unit_uid"]))
+        rows.append({**a, **(unit or {}), "uid": int(a["unit_uid"]) if unit else None})
+    return rows
+
+
+async def build_choropleth_batch(
+    db: AsyncSession,
+    question_global_uid: int,
+    granularity: ChoroplethGranularity,
+) -> tuple[ChoroplethBatchResponse, dict[int, int]]:
+    """
+    Valeurs + légende de chaque année de sondage d'une question globale.
+
+    Trois requêtes quel que soit le nombre d'années :
+      1. années / question par sondage / libellés des options
+      2. agrégats (answer_aggregate) de toutes les années, niveau demandé + federal
+      3. unités disponibles par année de carte (fenêtre couvrant toutes les années)
+
+    Renvoie aussi {année de sondage: année de géométrie} : année de carte
+    (district, canton), ou année cible partagée par les années de sondage
+    dont la géométrie communale est identique (voir _commune_geo_year).
+    """
+    layer = LAYER_FOR_LEVEL[granularity]
+    qps = _qps_cte(question_global_uid)
+
+    # 1. contexte
+    option_labels = (
+        select(func.json_object_agg(Option.value, func.coalesce(Option.label_, Option.value)))
+        .join(QuestionOptionAssociation, QuestionOptionAssociation.option_uid == Option.uid)
+        .where(QuestionOptionAssociation.question_uid == qps.c.q_uid)
+        .scalar_subquery()
+    )
+    ctx_stmt = select(qps.c.year, qps.c.q_uid, option_labels.label("option_labels")).order_by(qps.c.year)
+    ctx_rows = (await db.execute(ctx_stmt)).mappings().all()
+    if not ctx_rows:
+        return (
+            ChoroplethBatchResponse(
+                question_global_uid=question_global_uid, granularity=granularity, geo_layer=layer, years=[]
+            ),
+            {},
+        )
+
+    # 2. agrégats de toutes les années
+    level = "canton" if granularity == "federal" else granularity
+    agg_stmt = (
+        select(AnswerAggregate.question_uid, AnswerAggregate.year, AnswerAggregate.level, AnswerAggregate.unit_uid)
+        .add_columns(*[getattr(AnswerAggregate, c) for c in FEDERAL_COLUMNS], AnswerAggregate.tie_values)
+        .join(qps, and_(AnswerAggregate.question_uid == qps.c.q_uid, AnswerAggregate.year == qps.c.year))
+        .where(AnswerAggregate.level.in_(["federal"] if granularity == "federal" else [level, "federal"]))
+    )
+    federal: dict[tuple[int, int], dict[str, Any]] = {}
+    by_scope: dict[tuple[int, int], list[dict[str, Any]]] = {}
+    for r in (await db.execute(agg_stmt)).mappings():
+        key = (int(r["question_uid"]), int(r["year"]))
+        if r["level"] == "federal":
+            federal[key] = dict(r)
+        else:
+            by_scope.setdefault(key, []).append(dict(r))
+
+    # 3. unités par année de carte
+    window = COMMUNE_GEO_WINDOW if granularity == "commune" else ADMIN_GEO_WINDOW
+    survey_years = [int(r["year"]) for r in ctx_rows]
+    units = await _load_units(db, granularity, min(survey_years) - window, max(survey_years) + window)
+    map_years = sorted(units)
+
+    out_years: list[ChoroplethYearValues] = []
+    geo_years: dict[int, int] = {}
+    commune_geo_keys: dict[tuple[int, ...], int] = {}
+    for ctx in ctx_rows:
+        year, q_uid = int(ctx["year"]), int(ctx["q_uid"])
+        fed = federal.get((q_uid, year), {})
+        use_mode = int(fed.get("cnt_distinct") or 0) <= MAX_CATEGORIES
+        meta: dict[str, Any] = {}
+
+        def _warn(code: str, message: str) -> list[ChoroplethFeature]:
+            add_warning(meta, code=code, message=message, q_uid=q_uid, year=year, granularity=str(granularity))
+            return []
+
+        if granularity == "commune":
+            geo_year = _commune_geo_year(map_years, year, commune_geo_keys)
+        else:
+            geo_year = nearest_year(map_years, year, window)
+        if geo_year is None:
+            feats = _warn(
+                "NO_GEO_YEAR",
+                f"No {layer[:-1]} geometry year available in window +/-{window} for target year={year}.",
+            )
+        elif granularity == "federal":
+            if not int(fed.get("total_rows") or 0):
+                feats = _warn("NO_ANSWERS", f"No answers for question_uid={q_uid} year={year} (federal).")
+            else:
+                rows = [{"uid": uid, **u} for uid, u in units.get(geo_year, {}).items()]
+                feats = federal_features(rows, fed, use_mode=use_mode, with_geometry=False)
+        else:
+            agg_rows = by_scope.get((q_uid, year), [])
+            if not agg_rows:
+                feats = _warn("NO_ANSWERS", f"No answers for question_uid={q_uid} year={year} ({granularity}).")
+            else:
+                if granularity == "commune":
+                    rows = _commune_rows(agg_rows, units, year)
+                else:
+                    rows = _admin_rows(agg_rows, units.get(geo_year, {}))
+                feats = rows_to_features(
+                    level=granularity,
+                    rows=rows,
+                    use_mode=use_mode,
+                    include_geo_year_used=(granularity == "commune"),
+                    with_geometry=False,
+                )
+                if granularity == "commune" and not feats:
+                    feats = _warn(
+                        "NO_GEO_FOR_REQUESTED",
+                        f"Answers exist but no commune geometry found in window +/-{COMMUNE_GEO_WINDOW} "
+                        f"for question_uid={q_uid} year={year}.",
+                    )
+
+        if feats:
+            legend = apply_legend(feats, ctx["option_labels"] or {})
+        else:
+            if not meta.get("warnings"):
+                _warn("NO_FEATURES", f"Produced 0 features for question_uid={q_uid} year={year} ({granularity}).")
+            _, legend, _ = empty_return(meta)
+
+        if geo_year is not None:
+            geo_years[year] = geo_year
+        out_years.append(
+            ChoroplethYearValues(
+                year=year,
+                question_uid=q_uid,
+                geo_year=geo_year,
+                legend=legend,
+                values=features_to_values(feats),
+                warnings=meta.get("warnings") or [],
+            )
+        )
+
+    response = ChoroplethBatchResponse(
+        question_global_uid=question_global_uid,
+        granularity=granularity,
+        geo_layer=layer,
+        years=out_years,
+    )
+    return response, geo_years
+
+
+async def choropleth_batch_json(
+    db: AsyncSession,
+    question_global_uid: int,
+    granularity: ChoroplethGranularity,
+    include_geometry: bool = False,
+    detail: GeometryDetail = DEFAULT_DETAIL,
+) -> str:
+    """
+    Réponse batch sérialisée. include_geometry : ajoute la FeatureCollection
+    de chaque année de carte utilisée, une seule fois même si plusieurs années
+    de sondage la partagent (géométries pré-sérialisées insérées telles quelles).
+    """
+    response, geo_years = await build_choropleth_batch(db, question_global_uid, granularity)
+    fields = response.model_dump(mode="json", exclude={"geometries"})
+    if not include_geometry:
+        return object_json(fields, {"geometries": None})
+
+    parts = []
+    for geo_year in sorted(set(geo_years.values())):
+        fc = await choropleth_geometry_json(db, granularity, geo_year, detail=detail)
+        parts.append(dumps(str(geo_year)) + ":" + fc)
+    return object_json(fields, {"geometries": "{" + ",".join(parts) + "}"})
@@ -0,0 +1,310 @@
+# Légende et couleurs des cartes choroplèthes, calculées sur des tableaux NumPy.
+# Chaque feature est réduite à (code de type, code de valeur) ; les couleurs
+# sont lues dans une table (LUT) de palette au lieu d'être calculées une à une.
+from typing import Any, Optional, Sequence
+
+
+from app.schemas.choropleth import GradientMeta, LegendItem, MapLegend
+import numpy as np
+
+
+NO_DATA_COLOR = "#cccccc"  # gris
+NO_RESPONSE_COLOR = "#f59e0b"  # orange/ambre
+OTHER_COLOR = "#999999"
+GRAD_START = "#22c55e"  # vert
+GRAD_END = "#3b82f6"  # bleu
+MAX_CATEGORIES = 12  # légende: 12 catégories max, sinon gradient ou top12+other
+OTHER_VALUE = "__other__"
+DEFAULT_PATTERN_OPTS = {"type": "stripes", "angle": 45, "stripe": 6}
+
+# palette simple, lisible. Ajustable plus tard.
+PALETTE = (
+    "#fee5d9",
+    "#fcae91",
+    "#fb6a4a",
+    "#de2d26",
+    "#a50f15",
+    "#eff3ff",
+    "#bdd7e7",
+    "#6baed6",
+    "#3182bd",
+    "#08519c",
+    "#edf8e9",
+    "#bae4b3",
+    "#74c476",
+    "#31a354",
+    "#006d2c",
+)
+
+# codes de value_kind
+KIND_VALUE = 0
+KIND_NO_RESPONSE = 1
+KIND_NO_DATA = 2
+KIND_CODES = {"value": KIND_VALUE, "no_response": KIND_NO_RESPONSE, "no_data": KIND_NO_DATA}
+
+# "00".."ff" : conversion RGB -> hex par indexation
+_HEX2 = np.array([f"{i:02x}" for i in range(256)])
+
+
+def default_colors(n: int) -> list[str]:
+    return [PALETTE[i % len(PALETTE)] for i in range(n)]
+
+
+def make_ticks(vmin: float, vmax: float) -> list[float]:
+    # 5 ticks simples, lisibles
+    if vmin == vmax:
+        return [vmin]
+    return [vmin + (vmax - vmin) * f for f in (0.0, 0.25, 0.50, 0.75)] + [vmax]
+
+
+def _hex_to_rgb(h: str) -> np.ndarray:
+    h = h.lstrip("#")
+    return np.array([int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16)], dtype=np.float64)
+
+
+def gradient_colors(t: np.ndarray, start: str = GRAD_START, end: str = GRAD_END) -> np.ndarray:
+    """Couleurs hex interpolées entre start et end pour un tableau t (borné à [0, 1])."""
+    t = np.clip(np.asarray(t, dtype=np.float64), 0.0, 1.0)
+    c1, c2 = _hex_to_rgb(start), _hex_to_rgb(end)
+    rgb = np.rint(c1 + (c2 - c1) * t[:, None]).astype(np.intp)
+    return np.char.add(np.char.add(np.char.add("#", _HEX2[rgb[:, 0]]), _HEX2[rgb[:, 1]]), _HEX2[rgb[:, 2]])
+
+
+def _to_float(v: str) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _encode(kinds: Sequence[Optional[str]], values: Sequence[Any]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (kind_codes, value_codes, distinct) :
+      - kind_codes : KIND_* par feature
+      - value_codes : index dans distinct (triées) pour les vraies valeurs, -1 sinon
+    """
+    kind_codes = np.array([KIND_CODES.get(k, KIND_VALUE) for k in kinds], dtype=np.int8)
+    is_real = np.array([k == KIND_VALUE and v is not None for k, v in zip(kind_codes, values)], dtype=bool)
+
+    real = np.array([str(v) for v, r in zip(values, is_real) if r], dtype=str)
+    distinct, inverse = np.unique(real, return_inverse=True)
+
+    value_codes = np.full(len(kind_codes), -1, dtype=np.intp)
+    value_codes[is_real] = inverse
+    return kind_codes, value_codes, distinct
+
+
+class LegendResult:
+    """Légende + couleurs calculées, indexées comme les features d'entrée."""
+
+    def __init__(
+        self,
+        legend: MapLegend,
+        kind_codes: np.ndarray,
+        fill_colors: np.ndarray,
+        other_mask: np.ndarray,
+        lut: Optional[np.ndarray] = None,
+        value_index: Optional[dict[str, int]] = None,
+    ):
+        self.legend = legend
+        self.kind_codes = kind_codes  # KIND_* par feature
+        self.fill_colors = fill_colors  # couleur hex par feature
+        self.other_mask = other_mask  # True : valeur regroupée dans "__other__"
+        self.lut = lut  # catégoriel : [couleurs des valeurs..., other, no_response, no_data]
+        self.value_index = value_index  # catégoriel : valeur -> index dans lut (hors "other")
+
+    def pattern_colors(self, candidates: Sequence[Optional[list]]) -> list[Optional[list[str]]]:
+        """
+        Couleurs des rayures (ex-aequo) par feature, dédupliquées dans l'ordre ;
+        None si moins de 2 couleurs distinctes, feature sans vraie valeur
+        (no_data / no_response) ou légende en gradient.
+        """
+        out: list[Optional[list[str]]] = [None] * len(candidates)
+        if self.lut is None or self.value_index is None:
+            return out
+
+        n_lut = len(self.lut)
+        other_idx, no_response_idx, no_data_idx = n_lut - 3, n_lut - 2, n_lut - 1
+        feat_idx: list[int] = []
+        color_idx: list[int] = []
+        for i, cands in enumerate(candidates):
+            if self.kind_codes[i] != KIND_VALUE or not isinstance(cands, list) or len(cands) < 2:
+                continue
+            for c in cands[:MAX_CATEGORIES]:
+                if not isinstance(c, dict):
+                    continue
+                kind = str(c.get("kind"))
+                if kind == "no_data":
+                    idx = no_data_idx
+                elif kind == "no_response":
+                    idx = no_response_idx
+                else:
+                    idx = self.value_index.get(c.get("value"), other_idx)
+                feat_idx.append(i)
+                color_idx.append(idx)
+
+        if not feat_idx:
+            return out
+
+        f = np.asarray(feat_idx, dtype=np.intp)
+        c = np.asarray(color_idx, dtype=np.intp)
+        # première occurrence de chaque couple (feature, couleur), ordre conservé
+        _, first = np.unique(f * n_lut + c, return_index=True)
+        first.sort()
+        f, c = f[first], c[first]
+        feats, starts, counts = np.unique(f, return_index=True, return_counts=True)
+        for fi, start, count in zip(feats, starts, counts):
+            if count >= 2:
+                out[int(fi)] = self.lut[c[start : start + count]].tolist()
+        return out
+
+
+def _special_items(kind_codes: np.ndarray) -> list[LegendItem]:
+    items: list[LegendItem] = []
+    if np.any(kind_codes == KIND_NO_RESPONSE):
+        items.append(LegendItem(label="No response", color=NO_RESPONSE_COLOR, value=""))
+    if np.any(kind_codes == KIND_NO_DATA):
+        items.append(LegendItem(label="No data", color=NO_DATA_COLOR, value=None))
+    return items
+
+
+def _categorical(
+    kind_codes: np.ndarray,
+    value_codes: np.ndarray,
+    distinct: np.ndarray,
+    labels: list[str],
+    with_other: bool,
+) -> LegendResult:
+    """Catégoriel sur les len(labels) premières valeurs distinctes, le reste en "__other__"."""
+    n_cat = len(labels)
+    colors = default_colors(n_cat)
+    lut = np.array(colors + [OTHER_COLOR, NO_RESPONSE_COLOR, NO_DATA_COLOR])
+    other_idx, no_response_idx, no_data_idx = n_cat, n_cat + 1, n_cat + 2
+
+    is_real = value_codes >= 0
+    other_mask = is_real & (value_codes >= n_cat)
+    color_idx = np.where(is_real & ~other_mask, value_codes, other_idx)
+    color_idx = np.where(kind_codes == KIND_NO_RESPONSE, no_response_idx, color_idx)
+    color_idx = np.where(kind_codes == KIND_NO_DATA, no_data_idx, color_idx)
+
+    items = [LegendItem(label=labels[i], color=colors[i], value=str(distinct[i])) for i in range(n_cat)]
+    if with_other:
+        items.append(LegendItem(label="Other", color=OTHER_COLOR, value=OTHER_VALUE))
+    items += _special_items(kind_codes)
+
+    return LegendResult(
+        legend=MapLegend(type="categorical", title="Responses", items=items),
+        kind_codes=kind_codes,
+        fill_colors=lut[color_idx],
+        other_mask=other_mask,
+        lut=lut,
+        value_index={str(distinct[i]): i for i in range(n_cat)},
+    )
+
+
+def compute_legend(
+    kinds: Sequence[Optional[str]],
+    values: Sequence[Any],
+    option_labels: Optional[dict[str, Optional[str]]] = None,
+) -> LegendResult:
+    """
+    Légende et couleur de chaque feature en une passe sur tableaux :
+      - <= 12 valeurs distinctes : catégoriel (libellés des options)
+      - > 12 valeurs, >= 80% numériques : gradient
+      - sinon : top 12 + "Other"
+    """
+    option_labels = option_labels or {}
+    kind_codes, value_codes, distinct = _encode(kinds, values)
+    n_distinct = len(distinct)
+    is_real = value_codes >= 0
+
+    # categorical (<= 12)
+    if 0 < n_distinct <= MAX_CATEGORIES:
+        labels = [option_labels.get(str(v)) or str(v) for v in distinct]
+        return _categorical(kind_codes, value_codes, distinct, labels, with_other=False)
+
+    # valeurs numériques (parsées une fois par valeur distincte)
+    distinct_num = np.array([_to_float(v) for v in distinct], dtype=np.float64)
+    feat_num = np.full(len(kind_codes), np.nan)
+    feat_num[is_real] = distinct_num[value_codes[is_real]]
+    is_num = ~np.isnan(feat_num)
+    real_count = int(is_real.sum())
+    numeric_count = int(is_num.sum())
+    mostly_numeric = real_count > 0 and numeric_count / real_count >= 0.8
+
+    # gradient (beaucoup de valeurs + numeric)
+    if n_distinct > MAX_CATEGORIES and mostly_numeric:
+        vmin = float(feat_num[is_num].min())
+        vmax = float(feat_num[is_num].max())
+        if vmin == vmax:
+            t = np.full(len(kind_codes), 0.5)
+        else:
+            t = (np.nan_to_num(feat_num, nan=vmin) - vmin) / (vmax - vmin)
+
+        fill = np.full(len(kind_codes), NO_DATA_COLOR, dtype=object)
+        if numeric_count:
+            fill[is_num] = gradient_colors(t[is_num]).tolist()
+        fill[kind_codes == KIND_NO_RESPONSE] = NO_RESPONSE_COLOR
+
+        legend = MapLegend(
+            type="gradient",
+            title="Value",
+            items=_special_items(kind_codes),
+            gradient=GradientMeta(
+                start=GRAD_START,
+                end=GRAD_END,
+                vmin=vmin,
+                vmax=vmax,
+                ticks=[float(x) for x in make_ticks(vmin, vmax)],
+            ),
+        )
+        return LegendResult(
+            legend=legend,
+            kind_codes=kind_codes,
+            fill_colors=fill,
+            other_mask=np.zeros(len(kind_codes), dtype=bool),
+        )
+
+    # fallback top 12 + other
+    n_top = min(n_distinct, MAX_CATEGORIES)
+    labels = [str(v) for v in distinct[:n_top]]
+    return _categorical(kind_codes, value_codes, distinct, labels, with_other=n_distinct > MAX_CATEGORIES)
+
+
+def apply_legend(features: list[dict[str, Any]], option_labels: Optional[dict[str, Optional[str]]] = None) -> MapLegend:
+    """
+    Calcule la légende et écrit fill_color / fill_pattern dans les propriétés
+    des features ({"geometry": ..., "properties": {...}}).
+    Les valeurs regroupées en "Other" (et leurs candidats d'égalité) prennent la valeur "__other__".
+    """
+    props_list = [f["properties"] for f in features]
+    result = compute_legend(
+        [p.get("value_kind") for p in props_list],
+        [p.get("value") for p in props_list],
+        option_labels,
+    )
+
+    for i in np.flatnonzero(result.other_mask):
+        props_list[i]["value"] = OTHER_VALUE
+
+    candidates = [p.get("fill_pattern_candidates") for p in props_list]
+    if result.legend.items and any(o.value == OTHER_VALUE for o in result.legend.items):
+        for cands in candidates:
+            if not isinstance(cands, list):
+                continue
+            for c in cands:
+                if isinstance(c, dict) and c.get("kind") == "value":
+                    vv = c.get("value")
+                    if vv is not None and vv not in result.value_index:
+                        c["value"] = OTHER_VALUE
+
+    patterns = result.pattern_colors(candidates)
+    for props, color, pattern in zip(props_list, result.fill_colors.tolist(), patterns):
+        props["fill_color"] = color
+        if pattern is not None:
+            opts = props.get("fill_pattern_opts")
+            if not isinstance(opts, dict):
+                opts = DEFAULT_PATTERN_OPTS
+            props["fill_pattern"] = {**opts, "colors": pattern}
+
+    return result.legend
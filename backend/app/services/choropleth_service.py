@@ -2,11 +2,14 @@
 # Une carte choroplèthe est une carte thématique où des zones géographiques
 # (par exemple des communes) sont colorées en fonction d'une valeur de données
 # (statistique, réponse à un sondage, score numérique, etc.).
-from typing import Any, List, Optional
-import json
+from typing import Any, Iterator, Optional
+import time
 
 
-from app.models.answer import Answer
+from app.core.cache import LRUTTLCache
+from app.core.config import settings
+from app.core.geojson import feature_collection_json, feature_collection_sql, feature_json, object_json_parts
+from app.models.answer_aggregate import AnswerAggregate
 from app.models.canton import Canton
 from app.models.canton_map import CantonMap
 from app.models.commune import Commune
@@ -17,44 +20,36 @@ from app.models.option import Option
 from app.models.question_option_association import QuestionOptionAssociation
 from app.models.question_per_survey import QuestionPerSurvey
 from app.models.survey import Survey
-from app.schemas.choropleth import ChoroplethGranularity, GradientMeta, LegendItem, MapLegend
-from app.schemas.geo import Feature, FeatureCollection, Geometry
-from geoalchemy2 import functions as geofunc
-from sqlalchemy import and_, case, cast, func, Integer, Numeric, select
+from app.repositories.data_version_repo import current_data_version
+from app.repositories.geo_year_index_repo import get_geo_year_index
+from app.repositories.geometry_cache_repo import DEFAULT_DETAIL, geojson_cache_join, LAYER_FOR_LEVEL
+from app.schemas.choropleth import (
+    ChoroplethGranularity,
+    ChoroplethUnitValue,
+    ChoroplethValuesResponse,
+    LegendItem,
+    MapLegend,
+)
+from app.schemas.geo import GeometryDetail
+from app.services.choropleth_legend import apply_legend, MAX_CATEGORIES, NO_DATA_COLOR
+from sqlalchemy import and_, case, func, Integer, literal, select, String
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.elements import ColumnElement
-from sqlalchemy.sql.selectable import FromClause
-
-
-NO_DATA_COLOR = "#cccccc"  # gris
-NO_RESPONSE_COLOR = "#f59e0b"  # orange/ambre
-GRAD_START = "#22c55e"  # vert
-GRAD_END = "#3b82f6"  # bleu
-MAX_CATEGORIES = 12  # légende: 12 catégories max, sinon gradient ou top12+other
-
-
-def _default_colors(n: int) -> list[str]:
-    # palette simple, lisible. Ajustable plus tard.
-    base = [
-        "#fee5d9",
-        "#fcae91",
-        "#fb6a4a",
-        "#de2d26",
-        "#a50f15",
-        "#eff3ff",
-        "#bdd7e7",
-        "#6baed6",
-        "#3182bd",
-        "#08519c",
-        "#edf8e9",
-        "#bae4b3",
-        "#74c476",
-        "#31a354",
-        "#006d2c",
-    ]
-    if n <= len(base):
-        return base[:n]
-    return [base[i % len(base)] for i in range(n)]
+
+
+# Feature choroplèthe : {"geometry": <GeoJSON déjà sérialisé (texte) ou None>, "properties": {...}}
+ChoroplethFeature = dict[str, Any]
+
+# Fenêtres (+- années) de recherche de géométrie autour de l'année demandée
+COMMUNE_GEO_WINDOW = 1
+ADMIN_GEO_WINDOW = 2
+
+# Résultats de build_choropleth, clé = (data_version, scope, question_uid, year, granularity, with_geometry)
+_choropleth_cache = LRUTTLCache(
+    maxsize=settings.CHOROPLETH_CACHE_SIZE,
+    ttl=settings.CHOROPLETH_CACHE_TTL_SECONDS,
+    max_weight=settings.CHOROPLETH_CACHE_MAX_MB * 1024 * 1024,
+)
 
 
 def _unique_keep_order(items: list[tuple[str, Any]], limit: int) -> list[tuple[str, Any]]:
@@ -71,88 +66,28 @@ def _unique_keep_order(items: list[tuple[str, Any]], limit: int) -> list[tuple[s
     return out
 
 
-async def _global_distinct_non_empty_count(db: AsyncSession, q_uid: int, year: int) -> int:
-    vtrim = func.btrim(Answer.value)
-    stmt = select(func.count(func.distinct(vtrim))).where(
-        Answer.question_uid == q_uid,
-        Answer.year == year,
-        Answer.value.isnot(None),
-        vtrim != "",
-    )
-    v = (await db.execute(stmt)).scalar_one_or_none()
-    return int(v or 0)
-
-
-def _apply_fill_colors(
-    features: list[Feature],
-    legend: MapLegend,
-    categorical_map: dict[str | None, str] | None,
-    vmin: float | None,
-    vmax: float | None,
-) -> None:
-    for f in features:
-        props = f.properties
-        kind = props.get("value_kind")
-        v = props.get("value")
-
-        if kind == "no_data":
-            props["fill_color"] = NO_DATA_COLOR
-            continue
-        if kind == "no_response":
-            props["fill_color"] = NO_RESPONSE_COLOR
-            continue
+# Colonnes de la ligne agrégée "federal" lues par la requête de contexte
+FEDERAL_COLUMNS = (
+    "total_rows",
+    "cnt_null",
+    "cnt_empty",
+    "cnt_non_empty",
+    "cnt_num",
+    "cnt_distinct",
+    "avg_num_int",
+    "mode_text",
+    "top_real_count",
+)
 
-        if legend.type == "categorical":
-            props["fill_color"] = (categorical_map or {}).get(v, "#999999")
-
-            # fill_pattern pour les égalités donc double couleur ou plus
-            cands = props.get("fill_pattern_candidates")
-            if isinstance(cands, list) and len(cands) >= 2:
-
-                def _color_for(k: str, vv: Any) -> str:
-                    if k == "no_data":
-                        return NO_DATA_COLOR
-                    if k == "no_response":
-                        return NO_RESPONSE_COLOR
-                    return (categorical_map or {}).get(vv, "#999999")
-
-                colors: list[str] = []
-                for c in cands[:MAX_CATEGORIES]:
-                    if not isinstance(c, dict):
-                        continue
-                    ck = str(c.get("kind"))
-                    cv = c.get("value")
-                    colors.append(_color_for(ck, cv))
-
-                # dédup couleurs sans casser l'ordre
-                seen: set[str] = set()
-                uniq_colors: list[str] = []
-                for col in colors:
-                    if col in seen:
-                        continue
-                    seen.add(col)
-                    uniq_colors.append(col)
-
-                if len(uniq_colors) >= 2:
-                    opts = props.get("fill_pattern_opts")
-                    if not isinstance(opts, dict):
-                        opts = {"type": "stripes", "angle": 45, "stripe": 6}
-                    props["fill_pattern"] = {**opts, "colors": uniq_colors}
-
-            continue
-
-        # gradient
-        try:
-            x = float(v)
-        except Exception:
-            props["fill_color"] = NO_DATA_COLOR
-            continue
 
-        if vmin is None or vmax is None or vmin == vmax:
-            props["fill_color"] = _interp_color(GRAD_START, GRAD_END, 0.5)
-        else:
-            t = (x - vmin) / (vmax - vmin)
-            props["fill_color"] = _interp_color(GRAD_START, GRAD_END, t)
+def _question_per_survey_uid_for_global_stmt(question_global_uid: int, year: int) -> Any:
+    return (
+        select(QuestionPerSurvey.uid)
+        .join(Survey, Survey.uid == QuestionPerSurvey.survey_uid)
+        .where(QuestionPerSurvey.question_global_uid == question_global_uid, Survey.year == year)
+        .order_by(QuestionPerSurvey.uid.asc())
+        .limit(1)
+    )
 
 
 async def _resolve_question_per_survey_uid_for_global(
@@ -160,13 +95,7 @@ async def _resolve_question_per_survey_uid_for_global(
     question_global_uid: int,
     year: int,
 ) -> int | None:
-    stmt = (
-        select(QuestionPerSurvey.uid)
-        .join(Survey, Survey.uid == QuestionPerSurvey.survey_uid)
-        .where(QuestionPerSurvey.question_global_uid == question_global_uid, Survey.year == year)
-        .limit(1)
-    )
-    uid = (await db.execute(stmt)).scalar_one_or_none()
+    uid = (await db.execute(_question_per_survey_uid_for_global_stmt(question_global_uid, year))).scalar_one_or_none()
     return int(uid) if uid is not None else None
 
 
@@ -191,55 +120,8 @@ def _normalize_value(v: Optional[str]) -> tuple[str, Optional[str]]:
     return ("value", s)
 
 
-def _make_ticks(vmin: float, vmax: float) -> list[float]:
-    # 5 ticks simples, lisibles
-    if vmin == vmax:
-        return [vmin]
-    return [
-        vmin,
-        vmin + (vmax - vmin) * 0.25,
-        vmin + (vmax - vmin) * 0.50,
-        vmin + (vmax - vmin) * 0.75,
-        vmax,
-    ]
-
-
-def _hex_to_rgb(h: str) -> tuple[int, int, int]:
-    h = h.lstrip("#")
-    return (int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16))
-
-
-def _rgb_to_hex(r: int, g: int, b: int) -> str:
-    return "#{:02x}{:02x}{:02x}".format(r, g, b)
-
-
-def _interp_color(c1: str, c2: str, t: float) -> str:
-    t = max(0.0, min(1.0, t))
-    r1, g1, b1 = _hex_to_rgb(c1)
-    r2, g2, b2 = _hex_to_rgb(c2)
-    r = int(round(r1 + (r2 - r1) * t))
-    g = int(round(g1 + (g2 - g1) * t))
-    b = int(round(b1 + (b2 - b1) * t))
-    return _rgb_to_hex(r, g, b)
-
-
-async def _compute_global_value(
-    db: AsyncSession, q_uid: int, year: int, *, use_mode: bool
-) -> tuple[str, Optional[str]]:
-    vtrim = func.btrim(Answer.value)
-    is_num = _numeric_regex_col()
-
-    avg_numeric = func.avg(cast(Answer.value, Numeric)).filter(and_(Answer.value.isnot(None), vtrim != "", is_num))
-
-    stmt = select(
-        func.count().filter(and_(Answer.value.isnot(None), vtrim == "")).label("cnt_empty"),
-        func.count().filter(and_(Answer.value.isnot(None), vtrim != "")).label("cnt_non_empty"),
-        func.count().filter(and_(Answer.value.isnot(None), vtrim != "", is_num)).label("cnt_num"),
-        cast(func.round(avg_numeric, 0), Integer).label("avg_num_int"),
-        func.mode().within_group(Answer.value).filter(and_(Answer.value.isnot(None), vtrim != "")).label("mode_text"),
-    ).where(Answer.question_uid == q_uid, Answer.year == year)
-
-    r = (await db.execute(stmt)).mappings().first() or {}
+def _compute_global_value(r: dict[str, Any], *, use_mode: bool) -> tuple[str, Optional[str]]:
+    # r = ligne agrégée "federal" (voir _context_stmt)
     cnt_non_empty = int(r.get("cnt_non_empty") or 0)
     cnt_empty = int(r.get("cnt_empty") or 0)
     cnt_num = int(r.get("cnt_num") or 0)
@@ -258,137 +140,6 @@ async def _compute_global_value(
     return _normalize_value(str(r.get("mode_text")) if r.get("mode_text") is not None else None)
 
 
-def _build_legend_and_colors(features: list[Feature], options: List[Option]) -> MapLegend:
-    raw_values: list[tuple[str, Optional[str]]] = []
-    numeric_values: list[float] = []
-
-    for f in features:
-        k = f.properties.get("value_kind")
-        v = f.properties.get("value")
-        raw_values.append((k, v))
-        option = next((opt for opt in options if opt.value == str(v)), None)
-        if k == "value" and v is not None:
-            try:
-                numeric_values.append(float(v))
-            except Exception:
-                pass
-
-    real_values = [v for (k, v) in raw_values if k == "value" and v is not None]
-    distinct = sorted(set(real_values))
-    n_distinct = len(distinct)
-
-    has_no_response = any(k == "no_response" for (k, _) in raw_values)
-    has_no_data = any(k == "no_data" for (k, _) in raw_values)
-
-    # Détecter "principalement numérique" (utile seulement si >12 distinct)
-    numeric_count = len(numeric_values)
-    real_count = len(real_values)
-    mostly_numeric = (real_count > 0) and (numeric_count / real_count >= 0.8)
-
-    def _append_special(items: list[LegendItem]) -> None:
-        if has_no_response:
-            items.append(LegendItem(label="No response", color=NO_RESPONSE_COLOR, value=""))
-        if has_no_data:
-            items.append(LegendItem(label="No data", color=NO_DATA_COLOR, value=None))
-
-    # categorical (<= 12)
-    if 0 < n_distinct <= MAX_CATEGORIES:
-        colors = _default_colors(n_distinct)
-        option_by_value = {str(opt.value): opt for opt in options}
-
-        items: list[LegendItem] = []
-        for i, v in enumerate(distinct):
-            opt = option_by_value.get(str(v))
-            label = opt.label if opt is not None and opt.label else str(v)
-
-            items.append(
-                LegendItem(
-                    label=label,
-                    color=colors[i],
-                    value=v,
-                )
-            )
-
-        _append_special(items)
-        legend = MapLegend(type="categorical", title="Responses", items=items)
-        cmap = {str(v): colors[i] for i, v in enumerate(distinct)}
-        _apply_fill_colors(features, legend, categorical_map=cmap, vmin=None, vmax=None)
-        return legend
-
-    # gradient (beaucoup de valeurs + numeric)
-    if n_distinct > MAX_CATEGORIES and mostly_numeric and numeric_values:
-        vmin = float(min(numeric_values))
-        vmax = float(max(numeric_values))
-        items: list[LegendItem] = []
-        _append_special(items)
-        legend = MapLegend(
-            type="gradient",
-            title="Value",
-            items=items,
-            gradient=GradientMeta(
-                start=GRAD_START,
-                end=GRAD_END,
-                vmin=vmin,
-                vmax=vmax,
-                ticks=[float(x) for x in _make_ticks(vmin, vmax)],
-            ),
-        )
-        _apply_fill_colors(features, legend, categorical_map=None, vmin=vmin, vmax=vmax)
-        return legend
-
-    # fallback top 12 + other
-    top = distinct[:MAX_CATEGORIES]
-    colors = _default_colors(len(top))
-    items = [LegendItem(label=str(v), color=colors[i], value=v) for i, v in enumerate(top)]
-    if n_distinct > MAX_CATEGORIES:
-        items.append(LegendItem(label="Other", color="#999999", value="__other__"))
-    _append_special(items)
-
-    legend = MapLegend(type="categorical", title="Responses", items=items)
-    cmap = {str(v): colors[i] for i, v in enumerate(top)}
-    cmap["__other__"] = "#999999"
-
-    for f in features:
-        if f.properties.get("value_kind") == "value":
-            v = f.properties.get("value")
-            if v is not None and v not in cmap:
-                f.properties["value"] = "__other__"
-
-    cands = f.properties.get("fill_pattern_candidates")
-    if isinstance(cands, list):
-        for c in cands:
-            if isinstance(c, dict) and c.get("kind") == "value":
-                vv = c.get("value")
-                if vv is not None and vv not in cmap:
-                    c["value"] = "__other__"
-
-    _apply_fill_colors(features, legend, categorical_map=cmap, vmin=None, vmax=None)
-    return legend
-
-
-async def _nearest_year_sql_window(db: AsyncSession, model, target_year: int, year_window: int = 1) -> Optional[int]:
-    """
-    Renvoie l’année dispo la plus proche dans une fenêtre de +- year_window
-    """
-    y = model.year
-    y_min = target_year - year_window
-    y_max = target_year + year_window
-
-    stmt = (
-        select(y)
-        .select_from(model)
-        .where(and_(y >= y_min, y <= y_max))
-        .group_by(y)
-        .order_by(
-            func.abs(y - target_year).asc(),
-            case((y <= target_year, 0), else_=1).asc(),
-            y.desc(),
-        )
-        .limit(1)
-    )
-    return (await db.execute(stmt)).scalar_one_or_none()
-
-
 def _pick_aggregated_value(
     *,
     cnt_empty: int,
@@ -413,24 +164,15 @@ def _pick_aggregated_value(
     return _normalize_value(str(mode_text) if mode_text is not None else None)[0:2]  # type: ignore
 
 
-def _geojson_col(geom_col) -> ColumnElement:
-    return geofunc.ST_AsGeoJSON(geofunc.ST_Transform(geom_col, 4326), maxdecimaldigits=5)
-
-
-def _numeric_regex_col() -> ColumnElement:
-    # Postgres regex
-    return Answer.value.op("~")(r"^[+-]?\d+(\.\d+)?$")
-
-
 def _best_commune_map_for_requested_cte_window(
     *,
-    requested_communes_cte,  # cte avec colonne .c.gid
+    requested_communes_cte,  # cte avec colonne .c.gid (None = toutes les communes)
     target_year: int,
     year_window: int = 1,  # +-1 par défaut
 ) -> ColumnElement:
     """
-    Retourne cm_best(unit_uid, geometry, map_year) uniquement
-    pour les communes présentes dans requested_communes_cte,
+    Retourne cm_best(unit_uid, map_uid, geometry, map_year) uniquement
+    pour les communes présentes dans requested_communes_cte (si fourni),
     ET uniquement pour CommuneMap.year dans [target_year-year_window, target_year+year_window].
 
     Si une commune n'a aucune géo dans cette fenêtre, elle n'apparaît pas (pas de feature).
@@ -441,6 +183,7 @@ def _best_commune_map_for_requested_cte_window(
     cm_ranked = (
         select(
             CommuneMap.commune_uid.label("unit_uid"),
+            CommuneMap.uid.label("map_uid"),
             CommuneMap.geometry.label("geometry"),
             CommuneMap.year.label("map_year"),
             func.row_number()
@@ -455,13 +198,17 @@ def _best_commune_map_for_requested_cte_window(
             .label("rn"),
         )
         .select_from(CommuneMap)
-        .join(requested_communes_cte, requested_communes_cte.c.gid == CommuneMap.commune_uid)
         .where(and_(CommuneMap.year >= y_min, CommuneMap.year <= y_max))
-    ).cte("cm_ranked_window")
-
-    cm_best = (select(cm_ranked.c.unit_uid, cm_ranked.c.geometry, cm_ranked.c.map_year).where(cm_ranked.c.rn == 1)).cte(
-        "cm_best_window"
     )
+    if requested_communes_cte is not None:
+        cm_ranked = cm_ranked.join(requested_communes_cte, requested_communes_cte.c.gid == CommuneMap.commune_uid)
+    cm_ranked = cm_ranked.cte("cm_ranked_window")
+
+    cm_best = (
+        select(cm_ranked.c.unit_uid, cm_ranked.c.map_uid, cm_ranked.c.geometry, cm_ranked.c.map_year).where(
+            cm_ranked.c.rn == 1
+        )
+    ).cte("cm_best_window")
 
     return cm_best
 
@@ -473,54 +220,17 @@ def _special_dominates(cnt_null: int, cnt_empty: int, top_real_count: int) -> bo
     return (cnt_null + cnt_empty) > top_real_count
 
 
-async def _global_special_stats(db: "AsyncSession", q_uid: int, year: int) -> dict[str, int | bool]:
+def _global_special_stats(r: dict[str, Any]) -> dict[str, int | bool]:
     """
-    Stats 'special' (federal/global):
+    Stats 'special' (federal/global), lues dans la ligne agrégée "federal":
       - cnt_null
       - cnt_empty (vides / espaces)
       - top_real_count: meilleure fréquence d'une vraie valeur non vide
       - special_dominant: (null+empty) > top_real_count
     """
-    vtrim = func.btrim(Answer.value)
-
-    cnt_null_stmt = (
-        select(func.count())
-        .select_from(Answer)
-        .where(
-            Answer.question_uid == q_uid,
-            Answer.year == year,
-            Answer.value.is_(None),
-        )
-    )
-
-    cnt_empty_stmt = (
-        select(func.count())
-        .select_from(Answer)
-        .where(
-            Answer.question_uid == q_uid,
-            Answer.year == year,
-            Answer.value.isnot(None),
-            vtrim == "",
-        )
-    )
-
-    top_real_stmt = (
-        select(func.count().label("n"))
-        .select_from(Answer)
-        .where(
-            Answer.question_uid == q_uid,
-            Answer.year == year,
-            Answer.value.isnot(None),
-            vtrim != "",
-        )
-        .group_by(vtrim)
-        .order_by(func.count().desc())
-        .limit(1)
-    )
-
-    cnt_null = int((await db.execute(cnt_null_stmt)).scalar_one() or 0)
-    cnt_empty = int((await db.execute(cnt_empty_stmt)).scalar_one() or 0)
-    top_real_count = int((await db.execute(top_real_stmt)).scalar_one_or_none() or 0)
+    cnt_null = int(r.get("cnt_null") or 0)
+    cnt_empty = int(r.get("cnt_empty") or 0)
+    top_real_count = int(r.get("top_real_count") or 0)
 
     return {
         "cnt_null": cnt_null,
@@ -530,124 +240,32 @@ async def _global_special_stats(db: "AsyncSession", q_uid: int, year: int) -> di
     }
 
 
-def _agg_cte_generic(
-    *,
-    q_uid: int,
-    year: int,
-    gid_col: ColumnElement,  # ex: Answer.commune_uid / Commune.district_uid / District.canton_uid
-    from_clause: FromClause,  # ex: Answer / Answer.join(Commune, ...) / Answer.join(Commune,...).join(District,...)
-    gid_not_null_filter: ColumnElement,  # ex: Answer.commune_uid.isnot(None) / Commune.district_uid.isnot(None) ...
-    cte_prefix: str,  # ex: "commune" / "district" / "canton"
-) -> Any:
-    vtrim = func.btrim(Answer.value)
-    is_num = _numeric_regex_col()
-
-    avg_numeric = func.avg(cast(Answer.value, Numeric)).filter(and_(Answer.value.isnot(None), vtrim != "", is_num))
-
-    # counts par (gid, valeur réelle non vide)
-    counts = (
-        select(
-            gid_col.label("gid"),
-            vtrim.label("v"),
-            func.count().label("n"),
-        )
-        .select_from(from_clause)
-        .where(
-            Answer.question_uid == q_uid,
-            Answer.year == year,
-            gid_not_null_filter,
-            Answer.value.isnot(None),
-            vtrim != "",
-        )
-        .group_by(gid_col, vtrim)
-    ).cte(f"{cte_prefix}_value_counts")
-
-    # top_real_count par gid
-    top = (
-        select(
-            counts.c.gid,
-            func.max(counts.c.n).label("top_real_count"),
-        ).group_by(counts.c.gid)
-    ).cte(f"{cte_prefix}_top_real_count")
-
-    # toutes les valeurs ex-aequo au max (top_real_count)
-    ties = (
-        select(
-            counts.c.gid.label("gid"),
-            func.array_agg(func.distinct(counts.c.v)).label("tie_values"),
-        )
-        .select_from(counts)
-        .join(top, top.c.gid == counts.c.gid)
-        .where(counts.c.n == top.c.top_real_count)
-        .group_by(counts.c.gid)
-    ).cte(f"{cte_prefix}_ties")
-
-    # agg global par gid (inclut NULL et empty)
-    agg = (
+def _level_agg_cte(q_uid: int, year: int, level: str) -> Any:
+    """
+    Agrégats pré-calculés (answer_aggregate) d'un niveau, exposés avec
+    les mêmes colonnes que l'ancien CTE d'agrégation (gid, cnt_*, mode_text, ...).
+    """
+    return (
         select(
-            gid_col.label("gid"),
-            func.count().label("total_rows"),
-            func.count().filter(Answer.value.is_(None)).label("cnt_null"),
-            func.count().filter(and_(Answer.value.isnot(None), vtrim == "")).label("cnt_empty"),
-            func.count().filter(and_(Answer.value.isnot(None), vtrim != "")).label("cnt_non_empty"),
-            func.count().filter(and_(Answer.value.isnot(None), vtrim != "", is_num)).label("cnt_num"),
-            cast(func.round(avg_numeric, 0), Integer).label("avg_num_int"),
-            func.mode().within_group(vtrim).filter(and_(Answer.value.isnot(None), vtrim != "")).label("mode_text"),
-            func.coalesce(top.c.top_real_count, 0).label("top_real_count"),
-            ties.c.tie_values.label("tie_values"),
-        )
-        .select_from(from_clause)
-        .outerjoin(top, top.c.gid == gid_col)
-        .outerjoin(ties, ties.c.gid == gid_col)
-        .where(
-            Answer.question_uid == q_uid,
-            Answer.year == year,
-            gid_not_null_filter,
+            AnswerAggregate.unit_uid.label("gid"),
+            AnswerAggregate.total_rows,
+            AnswerAggregate.cnt_null,
+            AnswerAggregate.cnt_empty,
+            AnswerAggregate.cnt_non_empty,
+            AnswerAggregate.cnt_num,
+            AnswerAggregate.avg_num_int,
+            AnswerAggregate.mode_text,
+            AnswerAggregate.top_real_count,
+            AnswerAggregate.tie_values,
+        ).where(
+            AnswerAggregate.question_uid == q_uid,
+            AnswerAggregate.year == year,
+            AnswerAggregate.level == level,
         )
-        .group_by(gid_col, top.c.top_real_count, ties.c.tie_values)
-    ).cte(f"{cte_prefix}_agg")
+    ).cte(f"{level}_agg")
 
-    return agg
 
-
-def _commune_agg_cte(q_uid: int, year: int) -> Any:
-    return _agg_cte_generic(
-        q_uid=q_uid,
-        year=year,
-        gid_col=Answer.commune_uid,
-        from_clause=Answer.__table__,
-        gid_not_null_filter=Answer.commune_uid.isnot(None),
-        cte_prefix="commune",
-    )
-
-
-def _district_agg_cte(q_uid: int, year: int) -> Any:
-    base = Answer.__table__.join(Commune.__table__, Commune.uid == Answer.commune_uid)
-    return _agg_cte_generic(
-        q_uid=q_uid,
-        year=year,
-        gid_col=Commune.district_uid,
-        from_clause=base,
-        gid_not_null_filter=Commune.district_uid.isnot(None),
-        cte_prefix="district",
-    )
-
-
-def _canton_agg_cte(q_uid: int, year: int) -> Any:
-    base = Answer.__table__.join(Commune.__table__, Commune.uid == Answer.commune_uid).join(
-        District.__table__, District.uid == Commune.district_uid
-    )
-    return _agg_cte_generic(
-        q_uid=q_uid,
-        year=year,
-        gid_col=District.canton_uid,
-        from_clause=base,
-        gid_not_null_filter=District.canton_uid.isnot(None),
-        cte_prefix="canton",
-    )
-
-
-def _add_warning(
+def add_warning(
     years_meta: dict[str, Any], *, code: str, message: str, q_uid: int, year: int, granularity: str
 ) -> None:
     warnings = years_meta.get("warnings")
@@ -664,14 +282,14 @@ def _add_warning(
     )
 
 
-def _empty_return(years_meta: dict[str, Any]) -> tuple["FeatureCollection", "MapLegend", dict[str, Any]]:
+def empty_return(years_meta: dict[str, Any]) -> tuple[list[ChoroplethFeature], "MapLegend", dict[str, Any]]:
     # Une légende minimale qui explique "No data"
     legend = MapLegend(
         type="categorical",
         title="Responses",
         items=[LegendItem(label="No data", color=NO_DATA_COLOR, value=None)],
     )
-    return FeatureCollection(features=[]), legend, years_meta
+    return [], legend, years_meta
 
 
 def _agg_cols(agg: Any) -> list[Any]:
@@ -688,19 +306,21 @@ def _agg_cols(agg: Any) -> list[Any]:
 
 
 # boucle rows -> feats unique (commune/district/canton)
-def _rows_to_features(
+def rows_to_features(
     *,
     level: str,
     rows: list[dict[str, Any]],
     use_mode: bool,
     include_geo_year_used: bool,
-) -> list["Feature"]:
-    feats: list[Feature] = []
+    with_geometry: bool = True,
+) -> list[ChoroplethFeature]:
+    feats: list[ChoroplethFeature] = []
     for r in rows:
-        if r.get("geojson") is None:
+        # lignes d'agrégat sans unité ou sans géométrie (LEFT JOIN) : pas de feature
+        if r.get("uid") is None or r.get("map_uid") is None:
+            continue
+        if with_geometry and r.get("geojson") is None:
             continue
-
-        gj = json.loads(r["geojson"])
 
         cnt_null = int(r.get("cnt_null") or 0)
         cnt_empty = int(r.get("cnt_empty") or 0)
@@ -758,7 +378,7 @@ def _rows_to_features(
                 props["fill_pattern_candidates"] = [{"kind": k, "value": v} for (k, v) in candidates]
                 props["fill_pattern_opts"] = {"type": "stripes", "angle": 45, "stripe": 6}
 
-        feats.append(Feature(geometry=Geometry(**gj), properties=props))
+        feats.append({"geometry": r.get("geojson"), "properties": props})
 
     return feats
 
@@ -769,328 +389,493 @@ def _stmt_admin_level(
     agg: Any,
     unit_model: Any,  # District ou Canton
     map_model: Any,  # DistrictMap ou CantonMap
+    layer: str,  # "districts" ou "cantons" (cache geometry_geojson)
     map_year: int,
     map_join_cond: Any,  # condition join map_model -> unit_model
+    with_geometry: bool = True,
+    detail: GeometryDetail = DEFAULT_DETAIL,
 ) -> Any:
-    return (
+    # LEFT JOIN : toutes les lignes d'agrégat reviennent (décompte NO_ANSWERS sans requête dédiée)
+    stmt = (
         select(
             unit_model.uid.label("uid"),
             unit_model.name.label("name"),
             unit_model.code.label("code"),
-            _geojson_col(map_model.geometry).label("geojson"),
+            map_model.uid.label("map_uid"),
             *_agg_cols(agg),
         )
         .select_from(agg)
-        .join(unit_model, unit_model.uid == agg.c.gid)
-        .join(map_model, and_(map_join_cond, map_model.year == map_year))
+        .outerjoin(unit_model, unit_model.uid == agg.c.gid)
+        .outerjoin(map_model, and_(map_join_cond, map_model.year == map_year))
     )
+    if with_geometry:
+        cache, onclause, geojson = geojson_cache_join(layer, map_model.uid, map_model.geometry, detail=detail)
+        stmt = stmt.add_columns(geojson.label("geojson")).outerjoin(cache, onclause)
+    return stmt
 
 
-async def build_choropleth(
-    db: "AsyncSession",
-    scope: str,
-    question_uid: int,
-    year: int,
-    granularity: "ChoroplethGranularity",
-) -> tuple["FeatureCollection", "MapLegend", dict[str, Any]]:
-
-    years_meta: dict[str, Any] = {"communes": None, "districts": None, "cantons": None}
-    smt = select(Option).join(QuestionOptionAssociation).where(QuestionOptionAssociation.question_uid == question_uid)
-    result = await db.scalars(smt)
-    options = result.all()
-    # scope global: question_uid = question_global_uid
+def _context_stmt(*, scope: str, question_uid: int, year: int) -> Any:
+    """
+    Requête de contexte (une ligne, un aller-retour) :
+      - q_uid : question par sondage (résolue si scope global)
+      - ligne agrégée "federal" (LEFT JOIN, NULL si aucune réponse)
+      - option_labels : {value: label} des options de la question (par sondage)
+    """
     if scope == "global":
-        resolved = await _resolve_question_per_survey_uid_for_global(db, question_uid, year)
-        if resolved is None:
-            _add_warning(
-                years_meta,
-                code="NO_QPS_FOR_GLOBAL",
-                message=f"No QuestionPerSurvey found for global question_uid={question_uid} year={year}.",
-                q_uid=question_uid,
-                year=year,
-                granularity=str(granularity),
-            )
-            return _empty_return(years_meta)
-        q_uid = resolved
+        q_expr = _question_per_survey_uid_for_global_stmt(question_uid, year).scalar_subquery()
     else:
-        q_uid = question_uid
+        q_expr = literal(question_uid, Integer)
+    q = select(q_expr.label("q_uid")).cte("q")
+
+    option_labels = (
+        select(func.json_object_agg(Option.value, func.coalesce(Option.label_, Option.value)))
+        .join(QuestionOptionAssociation, QuestionOptionAssociation.option_uid == Option.uid)
+        .where(QuestionOptionAssociation.question_uid == q.c.q_uid)
+        .scalar_subquery()
+    )
+
+    return (
+        select(
+            q.c.q_uid,
+            option_labels.label("option_labels"),
+            *[getattr(AnswerAggregate, c) for c in FEDERAL_COLUMNS],
+        )
+        .select_from(q)
+        .outerjoin(
+            AnswerAggregate,
+            and_(
+                AnswerAggregate.question_uid == q.c.q_uid,
+                AnswerAggregate.year == year,
+                AnswerAggregate.level == "federal",
+                AnswerAggregate.unit_uid == 0,
+            ),
+        )
+    )
 
-    distinct_cnt = await _global_distinct_non_empty_count(db, q_uid, year)
-    use_mode = distinct_cnt <= MAX_CATEGORIES
 
-    # Commune
+def choropleth_stmt(
+    *,
+    q_uid: int,
+    year: int,
+    granularity: str,
+    geo_year: Optional[int],
+    with_geometry: bool,
+    detail: GeometryDetail = DEFAULT_DETAIL,
+) -> Any:
+    """Requête principale (un aller-retour) : une ligne par unité, agrégats + géométrie."""
     if granularity == "commune":
-        years_meta["communes"] = year
-
-        commune_agg = _commune_agg_cte(q_uid=q_uid, year=year)
+        commune_agg = _level_agg_cte(q_uid, year, "commune")
         cm_best = _best_commune_map_for_requested_cte_window(
             requested_communes_cte=commune_agg,
             target_year=year,
-            year_window=1,
+            year_window=COMMUNE_GEO_WINDOW,
         )
-
-        communes_requested = int((await db.execute(select(func.count()).select_from(commune_agg))).scalar_one() or 0)
-        communes_with_geo = int((await db.execute(select(func.count()).select_from(cm_best))).scalar_one() or 0)
-
-        if communes_requested == 0:
-            _add_warning(
-                years_meta,
-                code="NO_ANSWERS",
-                message=f"No answers for question_uid={q_uid} year={year} (commune).",
-                q_uid=q_uid,
-                year=year,
-                granularity="commune",
-            )
-            return _empty_return(years_meta)
-
-        if communes_with_geo == 0:
-            _add_warning(
-                years_meta,
-                code="NO_GEO_FOR_REQUESTED",
-                message=f"Answers exist but no commune geometry found in window +/-2 for question_uid={q_uid} year={year}.",
-                q_uid=q_uid,
-                year=year,
-                granularity="commune",
-            )
-            return _empty_return(years_meta)
-
+        # LEFT JOIN : les communes sans géométrie reviennent avec map_uid NULL
         stmt = (
             select(
                 Commune.uid.label("uid"),
                 Commune.name.label("name"),
                 Commune.code.label("code"),
+                cm_best.c.map_uid.label("map_uid"),
                 cm_best.c.map_year.label("geo_year_used"),
-                _geojson_col(cm_best.c.geometry).label("geojson"),
                 *_agg_cols(commune_agg),
             )
             .select_from(commune_agg)
-            .join(Commune, Commune.uid == commune_agg.c.gid)
-            .join(cm_best, cm_best.c.unit_uid == Commune.uid)
+            .outerjoin(Commune, Commune.uid == commune_agg.c.gid)
+            .outerjoin(cm_best, cm_best.c.unit_uid == commune_agg.c.gid)
         )
-
-        rows = (await db.execute(stmt)).mappings().all()
-        feats = _rows_to_features(
-            level="commune", rows=[dict(r) for r in rows], use_mode=use_mode, include_geo_year_used=True
-        )
-
-        if not feats:
-            _add_warning(
-                years_meta,
-                code="NO_FEATURES",
-                message=f"Answers/geometries exist but produced 0 features for question_uid={q_uid} year={year} (commune).",
-                q_uid=q_uid,
-                year=year,
-                granularity="commune",
+        if with_geometry:
+            cache, onclause, geojson = geojson_cache_join(
+                "communes", cm_best.c.map_uid, cm_best.c.geometry, detail=detail
             )
-            return _empty_return(years_meta)
-
-        legend = _build_legend_and_colors(feats, options)
-        return FeatureCollection(features=feats), legend, years_meta
+            stmt = stmt.add_columns(geojson.label("geojson")).outerjoin(cache, onclause)
+        return stmt
 
-    # District
     if granularity == "district":
-        y_geo = await _nearest_year_sql_window(db, DistrictMap, year, year_window=2)
-        years_meta["districts"] = y_geo
-        if y_geo is None:
-            _add_warning(
-                years_meta,
-                code="NO_GEO_YEAR",
-                message=f"No district geometry year available in window +/-2 for target year={year}.",
-                q_uid=q_uid,
-                year=year,
-                granularity="district",
-            )
-            return _empty_return(years_meta)
-
-        district_agg = _district_agg_cte(q_uid=q_uid, year=year)
-        district_requested = int((await db.execute(select(func.count()).select_from(district_agg))).scalar_one() or 0)
-        if district_requested == 0:
-            _add_warning(
-                years_meta,
-                code="NO_ANSWERS",
-                message=f"No answers for question_uid={q_uid} year={year} (district).",
-                q_uid=q_uid,
-                year=year,
-                granularity="district",
-            )
-            return _empty_return(years_meta)
-
-        stmt = _stmt_admin_level(
-            agg=district_agg,
+        return _stmt_admin_level(
+            agg=_level_agg_cte(q_uid, year, "district"),
             unit_model=District,
             map_model=DistrictMap,
-            map_year=y_geo,
+            layer="districts",
+            map_year=geo_year,
             map_join_cond=(DistrictMap.district_id == District.uid),
+            with_geometry=with_geometry,
+            detail=detail,
         )
 
-        rows = (await db.execute(stmt)).mappings().all()
-        feats = _rows_to_features(
-            level="district", rows=[dict(r) for r in rows], use_mode=use_mode, include_geo_year_used=False
+    if granularity == "canton":
+        return _stmt_admin_level(
+            agg=_level_agg_cte(q_uid, year, "canton"),
+            unit_model=Canton,
+            map_model=CantonMap,
+            layer="cantons",
+            map_year=geo_year,
+            map_join_cond=(CantonMap.canton_uid == Canton.uid),
+            with_geometry=with_geometry,
+            detail=detail,
         )
 
-        if not feats:
-            _add_warning(
-                years_meta,
-                code="NO_FEATURES",
-                message=f"Produced 0 features for question_uid={q_uid} year={year} (district).",
-                q_uid=q_uid,
-                year=year,
-                granularity="district",
-            )
-            return _empty_return(years_meta)
+    # federal : tous les cantons, même valeur globale
+    stmt = (
+        select(
+            Canton.uid.label("uid"),
+            Canton.name.label("name"),
+            Canton.code.label("code"),
+            CantonMap.uid.label("map_uid"),
+        )
+        .select_from(Canton)
+        .join(CantonMap, and_(CantonMap.canton_uid == Canton.uid, CantonMap.year == geo_year))
+    )
+    if with_geometry:
+        cache, onclause, geojson = geojson_cache_join("cantons", CantonMap.uid, CantonMap.geometry, detail=detail)
+        stmt = stmt.add_columns(geojson.label("geojson")).outerjoin(cache, onclause)
+    return stmt
 
-        legend = _build_legend_and_colors(feats, options)
-        return FeatureCollection(features=feats), legend, years_meta
 
-    # Canton
-    if granularity == "canton":
-        y_geo = await _nearest_year_sql_window(db, CantonMap, year, year_window=2)
-        years_meta["cantons"] = y_geo
-        if y_geo is None:
-            _add_warning(
-                years_meta,
-                code="NO_GEO_YEAR",
-                message=f"No canton geometry year available in window +/-2 for target year={year}.",
-                q_uid=q_uid,
-                year=year,
-                granularity="canton",
-            )
-            return _empty_return(years_meta)
-
-        canton_agg = _canton_agg_cte(q_uid=q_uid, year=year)
-        canton_requested = int((await db.execute(select(func.count()).select_from(canton_agg))).scalar_one() or 0)
-        if canton_requested == 0:
-            _add_warning(
-                years_meta,
-                code="NO_ANSWERS",
-                message=f"No answers for question_uid={q_uid} year={year} (canton).",
-                q_uid=q_uid,
-                year=year,
-                granularity="canton",
-            )
-            return _empty_return(years_meta)
+def federal_features(
+    rows: list[dict[str, Any]], federal: dict[str, Any], *, use_mode: bool, with_geometry: bool
+) -> list[ChoroplethFeature]:
+    global_kind, global_val = _compute_global_value(federal, use_mode=use_mode)
+    special = _global_special_stats(federal)
 
-        stmt = _stmt_admin_level(
-            agg=canton_agg,
-            unit_model=Canton,
-            map_model=CantonMap,
-            map_year=y_geo,
-            map_join_cond=(CantonMap.canton_uid == Canton.uid),
+    feats: list[ChoroplethFeature] = []
+    for r in rows:
+        if with_geometry and r.get("geojson") is None:
+            continue
+        feats.append(
+            {
+                "geometry": r.get("geojson"),
+                "properties": {
+                    "level": "federal",
+                    "unit_uid": int(r["uid"]),
+                    "name": r["name"],
+                    "code": r["code"],
+                    "value_kind": global_kind,
+                    "value": global_val,
+                    "special_dominant": bool(special["special_dominant"]),
+                    "top_real_count": int(special["top_real_count"]),
+                    "cnt_null": int(special["cnt_null"]),
+                    "cnt_empty": int(special["cnt_empty"]),
+                },
+            }
         )
+    return feats
+
+
+def _elapsed_ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000, 2)
+
+
+async def build_choropleth(
+    db: "AsyncSession",
+    scope: str,
+    question_uid: int,
+    year: int,
+    granularity: "ChoroplethGranularity",
+    with_geometry: bool = True,
+    detail: GeometryDetail = DEFAULT_DETAIL,
+) -> tuple[list[ChoroplethFeature], "MapLegend", dict[str, Any]]:
+    """
+    Features (géométrie + propriétés), légende et méta (années géo, warnings,
+    timings_ms par étape).
+    with_geometry=False : pas de géométrie (feature["geometry"] = None), pour
+    /geo/choropleth/values ; la géométrie vient de /geo/choropleth/geometry.
+    detail : niveau de simplification des géométries (voir geometry_cache_repo).
+
+    Deux allers-retours au plus, quelle que soit la granularité :
+      1. contexte (question résolue, agrégat federal, options) ; année géo via l'index en mémoire
+      2. une ligne par unité (agrégats + géométrie) ; les warnings sont
+         déduits de ce résultat.
+    """
+    years_meta: dict[str, Any] = {"communes": None, "districts": None, "cantons": None}
+    timings: dict[str, float] = {}
+    years_meta["timings_ms"] = timings
 
-        rows = (await db.execute(stmt)).mappings().all()
-        feats = _rows_to_features(
-            level="canton", rows=[dict(r) for r in rows], use_mode=use_mode, include_geo_year_used=False
+    def _warn(code: str, message: str, q_uid: int) -> tuple[list[ChoroplethFeature], MapLegend, dict[str, Any]]:
+        add_warning(years_meta, code=code, message=message, q_uid=q_uid, year=year, granularity=str(granularity))
+        return empty_return(years_meta)
+
+    if granularity not in LAYER_FOR_LEVEL:
+        return _warn("INVALID_GRANULARITY", f"Unsupported granularity={granularity}.", question_uid)
+
+    # 1. contexte
+    t0 = time.perf_counter()
+    ctx = (await db.execute(_context_stmt(scope=scope, question_uid=question_uid, year=year))).mappings().one()
+    timings["context"] = _elapsed_ms(t0)
+
+    # scope global: question_uid = question_global_uid
+    if ctx["q_uid"] is None:
+        return _warn(
+            "NO_QPS_FOR_GLOBAL",
+            f"No QuestionPerSurvey found for global question_uid={question_uid} year={year}.",
+            question_uid,
         )
+    q_uid = int(ctx["q_uid"])
+
+    federal = {c: ctx[c] for c in FEDERAL_COLUMNS} if ctx["total_rows"] is not None else {}
+    option_labels: dict[str, Optional[str]] = ctx["option_labels"] or {}
+    use_mode = int(federal.get("cnt_distinct") or 0) <= MAX_CATEGORIES
 
-        if not feats:
-            _add_warning(
-                years_meta,
-                code="NO_FEATURES",
-                message=f"Produced 0 features for question_uid={q_uid} year={year} (canton).",
-                q_uid=q_uid,
-                year=year,
-                granularity="canton",
+    geo_year: Optional[int] = None
+    if granularity == "commune":
+        years_meta["communes"] = year
+    else:
+        # année de géométrie district/canton (fenêtre +-ADMIN_GEO_WINDOW), index en mémoire
+        geo_year = (await get_geo_year_index(db)).nearest(LAYER_FOR_LEVEL[granularity], year, ADMIN_GEO_WINDOW)
+        years_meta[LAYER_FOR_LEVEL[granularity]] = geo_year
+        if geo_year is None:
+            return _warn(
+                "NO_GEO_YEAR",
+                f"No {LAYER_FOR_LEVEL[granularity][:-1]} geometry year available in window "
+                f"+/-{ADMIN_GEO_WINDOW} for target year={year}.",
+                q_uid,
             )
-            return _empty_return(years_meta)
 
-        legend = _build_legend_and_colors(feats, options)
-        return FeatureCollection(features=feats), legend, years_meta
+    if granularity == "federal" and not int(federal.get("total_rows") or 0):
+        return _warn("NO_ANSWERS", f"No answers for question_uid={q_uid} year={year} (federal).", q_uid)
 
-    # Federal
+    # 2. une ligne par unité
+    t0 = time.perf_counter()
+    stmt = choropleth_stmt(
+        q_uid=q_uid,
+        year=year,
+        granularity=granularity,
+        geo_year=geo_year,
+        with_geometry=with_geometry,
+        detail=detail,
+    )
+    rows = [dict(r) for r in (await db.execute(stmt)).mappings().all()]
+    timings["query"] = _elapsed_ms(t0)
+
+    t0 = time.perf_counter()
     if granularity == "federal":
-        y_geo = await _nearest_year_sql_window(db, CantonMap, year, year_window=2)
-        years_meta["cantons"] = y_geo
-        if y_geo is None:
-            _add_warning(
-                years_meta,
-                code="NO_GEO_YEAR",
-                message=f"No canton geometry year available (nearest) for target year={year}.",
-                q_uid=q_uid,
-                year=year,
-                granularity="federal",
+        feats = federal_features(rows, federal, use_mode=use_mode, with_geometry=with_geometry)
+    else:
+        if not rows:
+            return _warn("NO_ANSWERS", f"No answers for question_uid={q_uid} year={year} ({granularity}).", q_uid)
+
+        if granularity == "commune" and not any(r["map_uid"] is not None for r in rows):
+            return _warn(
+                "NO_GEO_FOR_REQUESTED",
+                f"Answers exist but no commune geometry found in window +/-{COMMUNE_GEO_WINDOW} "
+                f"for question_uid={q_uid} year={year}.",
+                q_uid,
             )
-            return _empty_return(years_meta)
-
-        # si aucune answer => on avertit direct
-        total_rows = int(
-            (
-                await db.execute(
-                    select(func.count()).select_from(Answer).where(Answer.question_uid == q_uid, Answer.year == year)
-                )
-            ).scalar_one()
-            or 0
+
+        feats = rows_to_features(
+            level=granularity,
+            rows=rows,
+            use_mode=use_mode,
+            include_geo_year_used=(granularity == "commune"),
+            with_geometry=with_geometry,
         )
 
-        if total_rows == 0:
-            _add_warning(
-                years_meta,
-                code="NO_ANSWERS",
-                message=f"No answers for question_uid={q_uid} year={year} (federal).",
-                q_uid=q_uid,
-                year=year,
-                granularity="federal",
-            )
-            return _empty_return(years_meta)
+    if not feats:
+        return _warn("NO_FEATURES", f"Produced 0 features for question_uid={q_uid} year={year} ({granularity}).", q_uid)
 
-        global_kind, global_val = await _compute_global_value(db, q_uid, year, use_mode=use_mode)
-        special = await _global_special_stats(db, q_uid, year)
+    legend = apply_legend(feats, option_labels)
+    timings["build"] = _elapsed_ms(t0)
+    return feats, legend, years_meta
 
+
+def _choropleth_weight(features: list[ChoroplethFeature]) -> int:
+    # poids approx. en octets : géométrie (texte) + propriétés
+    return sum(len(f["geometry"] or "") + 256 for f in features) + 1024
+
+
+async def build_choropleth_cached(
+    db: "AsyncSession",
+    scope: str,
+    question_uid: int,
+    year: int,
+    granularity: "ChoroplethGranularity",
+    with_geometry: bool = True,
+    detail: GeometryDetail = DEFAULT_DETAIL,
+) -> tuple[list[ChoroplethFeature], "MapLegend", dict[str, Any]]:
+    """
+    build_choropleth avec cache mémoire LRU + TTL.
+    La clé inclut la version des données (data_version) : tout import, /edit
+    ou /delete rend les anciennes entrées inaccessibles.
+
+    Le résultat est partagé entre requêtes : ne pas modifier features/légende.
+    years_meta["cache"] = "hit" / "miss".
+    """
+    version = await current_data_version(db)
+    # sans géométrie, le niveau de détail n'a pas d'effet : une seule entrée
+    key = (version, scope, question_uid, year, granularity, with_geometry, detail if with_geometry else None)
+
+    cached = _choropleth_cache.get(key)
+    if cached is not None:
+        feats, legend, meta = cached
+        return feats, legend, {**meta, "timings_ms": {}, "cache": "hit"}
+
+    feats, legend, meta = await build_choropleth(
+        db,
+        scope=scope,
+        question_uid=question_uid,
+        year=year,
+        granularity=granularity,
+        with_geometry=with_geometry,
+        detail=detail,
+    )
+    meta["cache"] = "miss"
+    _choropleth_cache.set(key, (feats, legend, meta), weight=_choropleth_weight(feats))
+    return feats, legend, meta
+
+
+def choropleth_cache_stats() -> dict[str, Any]:
+    return _choropleth_cache.stats()
+
+
+def server_timing_header(years_meta: dict[str, Any]) -> str:
+    """En-tête Server-Timing à partir de years_meta["timings_ms"] (visible dans les devtools)."""
+    timings = years_meta.get("timings_ms") or {}
+    parts = [f"{name};dur={ms}" for name, ms in timings.items()]
+    if years_meta.get("cache"):
+        parts.append(f'cache;desc="{years_meta["cache"]}"')
+    return ", ".join(parts)
+
+
+def choropleth_response_parts(
+    *,
+    question_uid: int,
+    year: int,
+    granularity: "ChoroplethGranularity",
+    features: list[ChoroplethFeature],
+    legend: MapLegend,
+    years_meta: dict[str, Any],
+) -> Iterator[str]:
+    """
+    Sérialise une ChoroplethResponse en insérant les géométries
+    pré-sérialisées telles quelles (pas de json.loads / modèles Pydantic).
+    Fragments produits à la demande : une Feature à la fois (RawJSONStreamingResponse).
+    """
+    head = object_json_parts(
+        {
+            "question_uid": question_uid,
+            "year_requested": year,
+            "year_geo_communes": None,
+            "year_geo_districts": years_meta.get("districts"),
+            "year_geo_cantons": years_meta.get("cantons"),
+            "granularity": granularity,
+            "legend": legend.model_dump(),
+        },
+        {"feature_collection": '{"type":"FeatureCollection","features":['},
+    )
+    yield from head[:-1]
+    for i, f in enumerate(features):
+        yield ("," if i else "") + feature_json(f["geometry"], f["properties"])
+    yield "]}" + head[-1]
+
+
+def features_to_values(features: list[ChoroplethFeature]) -> dict[int, ChoroplethUnitValue]:
+    """unit_uid -> valeur / couleur / motif (features colorées par apply_legend)."""
+    values: dict[int, ChoroplethUnitValue] = {}
+    for f in features:
+        props = f["properties"]
+        values[int(props["unit_uid"])] = ChoroplethUnitValue(
+            value=props.get("value"),
+            value_kind=props.get("value_kind"),
+            fill_color=props.get("fill_color"),
+            pattern=props.get("fill_pattern"),
+        )
+    return values
+
+
+def choropleth_values_response(
+    *,
+    question_uid: int,
+    year: int,
+    granularity: "ChoroplethGranularity",
+    features: list[ChoroplethFeature],
+    legend: MapLegend,
+    years_meta: dict[str, Any],
+) -> ChoroplethValuesResponse:
+    """
+    Réponse "values only" : unit_uid -> valeur/couleur, légende et année de
+    géométrie à utiliser. Quelques Ko au lieu des polygones complets.
+    """
+    layer = LAYER_FOR_LEVEL[granularity]
+    return ChoroplethValuesResponse(
+        question_uid=question_uid,
+        year_requested=year,
+        granularity=granularity,
+        geo_layer=layer,
+        geo_year=years_meta.get(layer),
+        legend=legend,
+        values=features_to_values(features),
+        warnings=years_meta.get("warnings") or [],
+    )
+
+
+async def choropleth_geometry_json(
+    db: AsyncSession,
+    granularity: "ChoroplethGranularity",
+    year: int,
+    detail: GeometryDetail = DEFAULT_DETAIL,
+) -> str:
+    """
+    FeatureCollection (texte) des unités d'une granularité pour une année de
+    géométrie, sans aucune valeur : ne dépend que de la géo, donc cacheable
+    côté client/proxy. Mêmes fenêtres d'années que build_choropleth.
+
+    Propriétés : level, unit_uid, name, code (+ geo_year_used pour les communes).
+    """
+    if granularity == "commune":
+        cm_best = _best_commune_map_for_requested_cte_window(
+            requested_communes_cte=None,
+            target_year=year,
+            year_window=COMMUNE_GEO_WINDOW,
+        )
+        cache, onclause, geojson = geojson_cache_join("communes", cm_best.c.map_uid, cm_best.c.geometry, detail=detail)
         stmt = (
             select(
-                Canton.uid.label("uid"),
-                Canton.name.label("name"),
-                Canton.code.label("code"),
-                _geojson_col(CantonMap.geometry).label("geojson"),
+                Commune.uid.label("uid"),
+                Commune.name.label("name"),
+                Commune.code.label("code"),
+                cm_best.c.map_year.label("geo_year_used"),
+                geojson.label("geojson"),
             )
-            .select_from(Canton)
-            .join(CantonMap, and_(CantonMap.canton_uid == Canton.uid, CantonMap.year == y_geo))
+            .select_from(cm_best)
+            .join(Commune, Commune.uid == cm_best.c.unit_uid)
+            .outerjoin(cache, onclause)
+            .order_by(Commune.uid.asc())
         )
+    else:
+        if granularity == "district":
+            unit_model, map_model, map_join_cond = District, DistrictMap, DistrictMap.district_id == District.uid
+        else:  # canton / federal
+            unit_model, map_model, map_join_cond = Canton, CantonMap, CantonMap.canton_uid == Canton.uid
 
-        rows = (await db.execute(stmt)).mappings().all()
-
-        feats: list[Feature] = []
-        for r in rows:
-            gj = json.loads(r["geojson"])
-            feats.append(
-                Feature(
-                    geometry=Geometry(**gj),
-                    properties={
-                        "level": "federal",
-                        "unit_uid": int(r["uid"]),
-                        "name": r["name"],
-                        "code": r["code"],
-                        "value_kind": global_kind,
-                        "value": global_val,
-                        "special_dominant": bool(special["special_dominant"]),
-                        "top_real_count": int(special["top_real_count"]),
-                        "cnt_null": int(special["cnt_null"]),
-                        "cnt_empty": int(special["cnt_empty"]),
-                    },
-                )
-            )
+        y_geo = (await get_geo_year_index(db)).nearest(LAYER_FOR_LEVEL[granularity], year, ADMIN_GEO_WINDOW)
+        if y_geo is None:
+            return feature_collection_json([])
 
-        if not feats:
-            _add_warning(
-                years_meta,
-                code="NO_FEATURES",
-                message=f"Produced 0 features for question_uid={q_uid} year={year} (federal).",
-                q_uid=q_uid,
-                year=year,
-                granularity="federal",
+        cache, onclause, geojson = geojson_cache_join(
+            LAYER_FOR_LEVEL[granularity], map_model.uid, map_model.geometry, detail=detail
+        )
+        stmt = (
+            select(
+                unit_model.uid.label("uid"),
+                unit_model.name.label("name"),
+                unit_model.code.label("code"),
+                geojson.label("geojson"),
             )
-            return _empty_return(years_meta)
-
-        legend = _build_legend_and_colors(feats, options)
-        return FeatureCollection(features=feats), legend, years_meta
+            .select_from(unit_model)
+            .join(map_model, and_(map_join_cond, map_model.year == y_geo))
+            .outerjoin(cache, onclause)
+            .order_by(unit_model.uid.asc())
+        )
 
-    # fallback
-    _add_warning(
-        years_meta,
-        code="INVALID_GRANULARITY",
-        message=f"Unsupported granularity={granularity}.",
-        q_uid=q_uid,
-        year=year,
-        granularity=str(granularity),
-    )
-    return _empty_return(years_meta)
+    # FeatureCollection assemblée par Postgres : une seule valeur texte, aucun objet par feature
+    sub = stmt.subquery()
+    props: dict[str, Any] = {
+        "level": literal(granularity, String),
+        "unit_uid": sub.c.uid,
+        "name": sub.c.name,
+        "code": sub.c.code,
+    }
+    if "geo_year_used" in sub.c:
+        props["geo_year_used"] = sub.c.geo_year_used
+    fc = feature_collection_sql(sub.c.geojson, props, order_by=sub.c.uid)
+    return (await db.execute(select(fc))).scalar_one()
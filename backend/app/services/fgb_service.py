@@ -0,0 +1,84 @@
+# Couches FlatGeobuf (.fgb) générées depuis les tables *_map.
+# ST_AsFlatGeobuf(..., true) écrit l'index spatial (R-tree Hilbert compacté)
+# en tête de fichier : un client (QGIS, GDAL, flatgeobuf.js) lit l'en-tête
+# puis seulement les octets des features de sa bbox via des requêtes Range.
+# Fichiers générés à la première demande puis servis depuis le cache disque.
+from pathlib import Path
+from typing import Any, Optional
+
+
+from app.core.paths import FGB_CACHE_DIR
+from app.core.tile_cache import fgb_path, write_cached_file
+from app.models.canton import Canton
+from app.models.commune import Commune
+from app.models.district import District
+from app.models.lake import Lake
+from app.repositories.data_version_repo import current_data_version
+from app.repositories.geo_year_index_repo import get_geo_year_index
+from app.repositories.geometry_cache_repo import MAP_LAYERS
+from app.schemas.geo import TileLayer
+from geoalchemy2 import functions as geofunc
+from sqlalchemy import func, LargeBinary, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+FGB_MEDIA_TYPE = "application/flatgeobuf"
+WGS84_SRID = 4326
+COUNTRY_YEAR = 0  # country n'est pas versionné : année unique du cache
+
+# couche -> modèle d'unité (propriétés uid/name/code) ; country n'a que son uid
+_FGB_UNITS: dict[str, Any] = {
+    "communes": Commune,
+    "districts": District,
+    "cantons": Canton,
+    "lakes": Lake,
+    "country": None,
+}
+
+
+def _fgb_stmt(layer: TileLayer, map_year: Optional[int]) -> Any:
+    map_layer = MAP_LAYERS[layer]
+    model = map_layer.map_model
+    unit_model = _FGB_UNITS[layer]
+
+    # toutes les couches en WGS84 (country est stocké en LV95)
+    geom = model.geometry if map_layer.srid == WGS84_SRID else geofunc.ST_Transform(model.geometry, WGS84_SRID)
+    rows = select(map_layer.unit_col.label("uid"), geom.label("geom")).where(model.geometry.isnot(None))
+    if unit_model is not None:
+        rows = rows.add_columns(unit_model.name.label("name"), unit_model.code.label("code")).join(
+            unit_model, unit_model.uid == map_layer.unit_col
+        )
+    if map_layer.versioned:
+        rows = rows.where(model.year == map_year)
+
+    sub = rows.order_by(map_layer.unit_col).subquery("fgb")
+    # ST_AsFlatGeobuf(fgb, true, 'geom') : la ligne entière devient les propriétés, index spatial inclus
+    return select(func.ST_AsFlatGeobuf(literal_column(sub.name), True, "geom", type_=LargeBinary)).select_from(sub)
+
+
+async def resolve_fgb_year(db: AsyncSession, layer: TileLayer, year: int) -> Optional[int]:
+    """Année de carte la plus récente <= year (même règle que /geo/by_year) ; COUNTRY_YEAR pour country."""
+    if not MAP_LAYERS[layer].versioned:
+        return COUNTRY_YEAR
+    return (await get_geo_year_index(db)).latest(layer, year)
+
+
+async def get_layer_fgb(db: AsyncSession, layer: TileLayer, map_year: int) -> Optional[Path]:
+    """
+    Chemin du fichier .fgb de (couche, année de carte), généré s'il n'est pas
+    encore en cache ; None si la couche n'a aucune géométrie (rien n'est écrit :
+    un fichier vide rendrait toute requête Range insatisfiable).
+    """
+    version = await current_data_version(db)
+    path = fgb_path(version, layer, map_year)
+    if path.exists():
+        return path
+
+    data = (await db.execute(_fgb_stmt(layer, map_year))).scalar_one_or_none()
+    if not data:
+        return None
+    write_cached_file(path, bytes(data), root=FGB_CACHE_DIR)
+    if not path.exists():
+        # les requêtes Range lisent le fichier : pas de repli en mémoire
+        raise RuntimeError(f"FlatGeobuf cache not writable: {path}")
+    return path
@@ -1,9 +1,16 @@
 from datetime import date
-from typing import Optional, Set, Tuple
+from typing import Any, Awaitable, Callable, Optional, Set, Tuple
+import asyncio
 import json
+import time
 
 
+from app.core.cache import LRUTTLCache
+from app.core.config import settings
 from app.core.geo_config import THEME_MAP_PREVIEW_CANTON_OFS_ID
+from app.core.geojson import dumps, feature_collection_sql, object_json_parts
+from app.core.topojson import build_topology
+from app.db import SessionLocal
 from app.models.canton import Canton
 from app.models.canton_map import CantonMap
 from app.models.commune import Commune
@@ -13,20 +20,42 @@ from app.models.district import District
 from app.models.district_map import DistrictMap
 from app.models.lake import Lake
 from app.models.lake_map import LakeMap
-from app.schemas.geo import Feature, FeatureCollection, GeoBundle, Geometry, YearMeta
+from app.repositories.data_version_repo import current_data_version
+from app.repositories.geo_year_index_repo import get_geo_year_index
+from app.repositories.geometry_cache_repo import (
+    DEFAULT_DETAIL,
+    DEFAULT_PRECISION,
+    DETAIL_TOLERANCES,
+    geojson_cache_join,
+    MAP_LAYERS,
+)
+from app.schemas.geo import Feature, FeatureCollection, GeoBundle, GeoFormat, Geometry, GeometryDetail, YearMeta
 from geoalchemy2 import functions as geofunc
 from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-async def _fc_for_layer(
-    session: AsyncSession,
-    MapModel,
-    EntModel,
-    rel_attr: str,
-    year_val: int,
-    props: Tuple[Tuple[str, str, bool], ...],
-) -> FeatureCollection:
+# couche -> (modèle *_map, modèle d'unité, relation, propriétés (clé, attribut, optionnel))
+_LAYER_SOURCES: dict[str, tuple[Any, Any, str, Tuple[Tuple[str, str, bool], ...]]] = {
+    "lakes": (LakeMap, Lake, "lake", (("uid", "uid", False), ("name", "name", False), ("code", "code", False))),
+    "cantons": (CantonMap, Canton, "canton", (("uid", "uid", False), ("code", "code", False), ("name", "name", False))),
+    "districts": (
+        DistrictMap,
+        District,
+        "district",
+        (("uid", "uid", False), ("name", "name", False), ("code", "code", True)),
+    ),
+    "communes": (
+        CommuneMap,
+        Commune,
+        "commune",
+        (("uid", "uid", False), ("name", "name", False), ("code", "code", False)),
+    ),
+}
+
+
+def _layer_stmt(layer: str, year_val: int, detail: GeometryDetail = DEFAULT_DETAIL) -> tuple[Any, Tuple[str, ...]]:
+    MapModel, EntModel, rel_attr, props = _LAYER_SOURCES[layer]
     labeled_cols = []
     prop_keys = []
     for out_key, attr_name, is_optional in props:
@@ -39,21 +68,24 @@ async def _fc_for_layer(
         labeled_cols.append(col.label(out_key))
         prop_keys.append(out_key)
 
+    cache, onclause, geojson = geojson_cache_join(layer, MapModel.uid, MapModel.geometry, detail=detail)
     stmt = (
         select(
-            geofunc.ST_AsGeoJSON(MapModel.geometry, maxdecimaldigits=5).label("geojson"),
+            geojson.label("geojson"),
             *labeled_cols,
         )
         .join(getattr(MapModel, rel_attr))
+        .outerjoin(cache, onclause)
         .where(MapModel.year == year_val)
     )
-    return await _features_from_stmt(session, stmt, tuple(prop_keys))
+    return stmt, tuple(prop_keys)
 
 
-async def _max_year_leq(session: AsyncSession, model, y: int) -> Optional[int]:
-    q = select(func.max(model.year)).where(model.year <= y)
-    res = await session.execute(q)
-    return res.scalar_one_or_none()
+async def fc_for_layer(
+    session: AsyncSession, layer: str, year_val: int, detail: GeometryDetail = DEFAULT_DETAIL
+) -> str:
+    stmt, prop_keys = _layer_stmt(layer, year_val, detail)
+    return await raw_fc_from_stmt(session, stmt, prop_keys)
 
 
 async def _features_from_stmt(session: AsyncSession, stmt, prop_keys: Tuple[str, ...]) -> FeatureCollection:
@@ -67,114 +99,188 @@ async def _features_from_stmt(session: AsyncSession, stmt, prop_keys: Tuple[str,
     return FeatureCollection(features=feats)
 
 
+async def _geometries_from_stmt(
+    session: AsyncSession, stmt, prop_keys: Tuple[str, ...]
+) -> list[tuple[Optional[dict], dict]]:
+    # (géométrie GeoJSON décodée, propriétés) pour build_topology
+    rows = (await session.execute(stmt)).all()
+    out = []
+    for row in rows:
+        m = row._mapping
+        out.append((json.loads(m["geojson"]) if m["geojson"] else None, {k: m[k] for k in prop_keys if k in m}))
+    return out
+
+
+async def raw_fc_from_stmt(session: AsyncSession, stmt, prop_keys: Tuple[str, ...]) -> str:
+    # Variante sans Pydantic : FeatureCollection assemblée par Postgres (une seule valeur texte)
+    sub = stmt.subquery()
+    fc = feature_collection_sql(sub.c.geojson, {k: sub.c[k] for k in prop_keys})
+    return (await session.execute(select(fc))).scalar_one()
+
+
 ALL_LAYERS = {"country", "lakes", "cantons", "districts", "communes"}
 
+# Topologies TopoJSON déjà construites (texte), clé = version des données + couches/années + détail
+_topology_cache = LRUTTLCache(maxsize=settings.GEO_TOPOLOGY_CACHE_SIZE, ttl=settings.GEO_TOPOLOGY_CACHE_TTL_SECONDS)
+
+
+def _country_wgs84_stmt(detail: GeometryDetail) -> Any:
+    # country est stocké (et servi en GeoJSON) en LV95 ; une topologie n'a qu'un repère : WGS84
+    tolerance = DETAIL_TOLERANCES[detail]
+    geom = Country.geometry if tolerance is None else MAP_LAYERS["country"].simplified_expr(Country.geometry, tolerance)
+    return select(
+        geofunc.ST_AsGeoJSON(geofunc.ST_Transform(geom, 4326), DEFAULT_PRECISION).label("geojson"),
+        Country.uid.label("uid"),
+    ).where(Country.geometry.isnot(None))
+
+
+# borne le nombre de sessions ouvertes par _load_layers, sans quoi des requêtes
+# simultanées multi-couches épuisent le pool de connexions
+_layer_connections = asyncio.Semaphore(max(settings.GEO_LAYER_MAX_CONNECTIONS, 1))
+
+
+def _elapsed_ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000, 2)
+
+
+async def _load_layers(
+    session: AsyncSession,
+    stmts: dict[str, tuple[Any, Tuple[str, ...]]],
+    loader: Callable[[AsyncSession, Any, Tuple[str, ...]], Awaitable[Any]],
+    timings: dict[str, float],
+) -> dict[str, Any]:
+    """
+    Exécute une requête par couche. Plusieurs couches : en parallèle, chacune
+    sur sa propre session (connexion du pool) ; une AsyncSession ne supporte
+    pas de requêtes concurrentes. Au plus GEO_LAYER_MAX_CONNECTIONS sessions
+    ouvertes à la fois pour tout le process. Une seule couche : session de la requête.
+    """
+    if len(stmts) > 1:
+        # rend au pool la connexion de la session de la requête (lectures déjà faites) :
+        # une requête en attente du sémaphore ne garde aucune connexion
+        await session.commit()
+
+    async def _one(layer: str, stmt: Any, prop_keys: Tuple[str, ...]) -> tuple[str, Any]:
+        if len(stmts) == 1:
+            t0 = time.perf_counter()
+            result = await loader(session, stmt, prop_keys)
+        else:
+            async with _layer_connections:
+                t0 = time.perf_counter()
+                async with SessionLocal() as own:
+                    result = await loader(own, stmt, prop_keys)
+        timings[layer] = _elapsed_ms(t0)
+        return layer, result
+
+    return dict(await asyncio.gather(*(_one(layer, *args) for layer, args in stmts.items())))
+
+
+def _layer_stmts(
+    layer_years: dict[str, Optional[int]], detail: GeometryDetail, country_wgs84: bool = False
+) -> dict[str, tuple[Any, Tuple[str, ...]]]:
+    stmts: dict[str, tuple[Any, Tuple[str, ...]]] = {}
+    for layer, year_val in layer_years.items():
+        if layer == "country":
+            stmts[layer] = (_country_wgs84_stmt(detail) if country_wgs84 else country_stmt(detail)), ("uid",)
+        elif year_val is not None:
+            stmts[layer] = _layer_stmt(layer, year_val, detail)
+    return stmts
+
+
+def country_stmt(detail: GeometryDetail) -> Any:
+    cache, onclause, geojson = geojson_cache_join("country", Country.uid, Country.geometry, detail=detail)
+    return select(
+        geojson.label("geojson"),
+        Country.uid.label("uid"),
+    ).outerjoin(cache, onclause)
+
+
+async def _topology_json(
+    session: AsyncSession,
+    layer_years: dict[str, Optional[int]],
+    detail: GeometryDetail,
+    timings: dict[str, float],
+) -> str:
+    """
+    Topologie TopoJSON (texte) des couches demandées : arcs partagés entre
+    toutes les couches, coordonnées entières. Construite une fois par
+    (version des données, couches/années, détail) puis servie depuis le cache.
+    """
+    wanted = tuple(sorted(layer_years.items()))
+    key = (await current_data_version(session), wanted, detail)
+    cached = _topology_cache.get(key)
+    if cached is not None:
+        return cached
+
+    features = await _load_layers(
+        session, _layer_stmts(dict(wanted), detail, country_wgs84=True), _geometries_from_stmt, timings
+    )
+
+    # construction CPU (quelques secondes pour toutes les couches) : hors de la boucle asyncio
+    t0 = time.perf_counter()
+    topology = await asyncio.to_thread(build_topology, dict(sorted(features.items())), DEFAULT_PRECISION)
+    body = dumps(topology)
+    timings["topology"] = _elapsed_ms(t0)
+    _topology_cache.set(key, body, weight=len(body))
+    return body
+
 
-async def get_geo_by_year_selective(
+async def get_geo_by_year_parts(
     session: AsyncSession,
     requested_year: Optional[int],
     layers: Set[str],
     clear_others: bool = False,
-) -> GeoBundle:
+    detail: GeometryDetail = DEFAULT_DETAIL,
+    format: GeoFormat = "geojson",
+    timings: Optional[dict[str, float]] = None,
+) -> list[str]:
     """
-    Returns only the requested layers.
+    Returns only the requested layers, as GeoBundle JSON (already serialized).
     - layers: subset of {"country","lakes","cantons",“districts”,"communes"}
     - clear_others: if True, explicitly includes other layers set to None
                     if False, omits them to facilitate front-end merging
+    - detail: geometry simplification tier ("full" = original geometries)
+    - format: "topojson" returns {"year", "format", "topology"} instead of one
+              FeatureCollection per layer (shared borders sent once, WGS84)
+    - timings: filled with per-step durations in ms ("years", one per layer,
+               "topology"); layers are loaded concurrently
+
+    Returned as JSON fragments (one per layer) to be streamed without
+    concatenating them (see RawJSONStreamingResponse).
     """
+    timings = timings if timings is not None else {}
     y_req = int(requested_year or date.today().year)
 
-    # Calcule les années uniquement pour les couches demandées
-    y_cantons = y_districts = y_lakes = y_communes = None
-    if "cantons" in layers:
-        y_cantons = await _max_year_leq(session, CantonMap, y_req)
-    if "districts" in layers:
-        y_districts = await _max_year_leq(session, DistrictMap, y_req)
-    if "lakes" in layers:
-        y_lakes = await _max_year_leq(session, LakeMap, y_req)
-    if "communes" in layers:
-        y_communes = await _max_year_leq(session, CommuneMap, y_req)
-
-    # Construit les FeatureCollections demandées
-    country_fc = lakes_fc = cantons_fc = districts_fc = communes_fc = None
-
-    if "country" in layers:
-        country_fc = await _features_from_stmt(
-            session,
-            select(
-                geofunc.ST_AsGeoJSON(Country.geometry, maxdecimaldigits=5).label("geojson"),
-                Country.uid.label("uid"),
-            ),
-            ("uid",),
-        )
-
-    # Lakes
-    if "lakes" in layers and y_lakes is not None:
-        lakes_fc = await _fc_for_layer(
-            session,
-            LakeMap,
-            Lake,
-            "lake",
-            y_lakes,
-            (("uid", "uid", False), ("name", "name", False), ("code", "code", False)),
-        )
-
-    # Cantons
-    if "cantons" in layers and y_cantons is not None:
-        cantons_fc = await _fc_for_layer(
-            session,
-            CantonMap,
-            Canton,
-            "canton",
-            y_cantons,
-            (("uid", "uid", False), ("code", "code", False), ("name", "name", False)),
-        )
-
-    # Districts
-    if "districts" in layers and y_districts is not None:
-        districts_fc = await _fc_for_layer(
-            session,
-            DistrictMap,
-            District,
-            "district",
-            y_districts,
-            (("uid", "uid", False), ("name", "name", False), ("code", "code", True)),
-        )
-
-    # Communes
-    if "communes" in layers and y_communes is not None:
-        communes_fc = await _fc_for_layer(
-            session,
-            CommuneMap,
-            Commune,
-            "commune",
-            y_communes,
-            (("uid", "uid", False), ("name", "name", False), ("code", "code", False)),
-        )
+    # Années de carte des couches demandées (index en mémoire)
+    t0 = time.perf_counter()
+    index = await get_geo_year_index(session)
+    years = {layer: index.latest(layer, y_req) for layer in layers if layer != "country"}
+    timings["years"] = _elapsed_ms(t0)
 
     # Prépare YearMeta (remplit uniquement ce qui est demandé)
     year_meta = YearMeta(
         requested=y_req,
-        country=(None if "country" in layers else None),  # pas de notion d'année country
-        lakes=y_lakes if "lakes" in layers else None,
-        cantons=y_cantons if "cantons" in layers else None,
-        districts=y_districts if "districts" in layers else None,
+        country=None,  # pas de notion d'année country
+        lakes=years.get("lakes"),
+        cantons=years.get("cantons"),
+        districts=years.get("districts"),
     )
+    layer_years = {layer: years.get(layer) for layer in layers}
+
+    if format == "topojson":
+        topology = await _topology_json(session, layer_years, detail, timings)
+        return object_json_parts({"year": year_meta.model_dump(), "format": "topojson"}, {"topology": topology})
+
+    # FeatureCollections demandées, une requête par couche en parallèle
+    fcs = await _load_layers(session, _layer_stmts(layer_years, detail), raw_fc_from_stmt, timings)
 
     # On construit la réponse GeoBundle, en incluant ou omettant les clés non demandées
-    bundle_kwargs = dict(year=year_meta)
-    if "country" in layers or clear_others:
-        bundle_kwargs["country"] = country_fc
-    if "lakes" in layers or clear_others:
-        bundle_kwargs["lakes"] = lakes_fc
-    if "cantons" in layers or clear_others:
-        bundle_kwargs["cantons"] = cantons_fc
-    if "districts" in layers or clear_others:
-        bundle_kwargs["districts"] = districts_fc
-    if "communes" in layers or clear_others:
-        bundle_kwargs["communes"] = communes_fc
+    raw_layers: dict[str, Optional[str]] = {}
+    for layer in ("country", "lakes", "cantons", "districts", "communes"):
+        if layer in layers or clear_others:
+            raw_layers[layer] = fcs.get(layer)
 
-    return GeoBundle(**bundle_kwargs)
+    return object_json_parts({"year": year_meta.model_dump()}, raw_layers)
 
 
 async def get_geo_by_canton_preview(
@@ -234,10 +340,11 @@ async def get_geo_by_canton_preview(
         )
 
     # On prend pour chaque table de géométrie, la dernière année
-    y_cantons = await _max_year_leq(session, CantonMap, y_req)
-    y_districts = await _max_year_leq(session, DistrictMap, y_req)
-    y_communes = await _max_year_leq(session, CommuneMap, y_req)
-    y_lakes = await _max_year_leq(session, LakeMap, y_req)
+    index = await get_geo_year_index(session)
+    y_cantons = index.latest("cantons", y_req)
+    y_districts = index.latest("districts", y_req)
+    y_communes = index.latest("communes", y_req)
+    y_lakes = index.latest("lakes", y_req)
 
     canton_fc = FeatureCollection(features=[])
     districts_fc = FeatureCollection(features=[])
@@ -246,15 +353,17 @@ async def get_geo_by_canton_preview(
 
     if y_cantons is not None:
         # Géométrie du canton sélectionné uniquement.
+        cache, onclause, cantons_geojson = geojson_cache_join("cantons", CantonMap.uid, CantonMap.geometry)
         canton_fc = await _features_from_stmt(
             session,
             select(
-                geofunc.ST_AsGeoJSON(CantonMap.geometry, maxdecimaldigits=5).label("geojson"),
+                cantons_geojson.label("geojson"),
                 Canton.uid.label("uid"),
                 Canton.code.label("code"),
                 Canton.name.label("name"),
             )
             .join(CantonMap.canton)
+            .outerjoin(cache, onclause)
             .where(
                 CantonMap.year == y_cantons,
                 Canton.uid == canton_uid,
@@ -264,15 +373,17 @@ async def get_geo_by_canton_preview(
 
     if y_districts is not None:
         # Les districts sont directement rattachés au canton via District.canton_uid.
+        cache, onclause, districts_geojson = geojson_cache_join("districts", DistrictMap.uid, DistrictMap.geometry)
         districts_fc = await _features_from_stmt(
             session,
             select(
-                geofunc.ST_AsGeoJSON(DistrictMap.geometry, maxdecimaldigits=5).label("geojson"),
+                districts_geojson.label("geojson"),
                 District.uid.label("uid"),
                 District.name.label("name"),
                 District.code.label("code"),
             )
             .join(DistrictMap.district)
+            .outerjoin(cache, onclause)
             .where(
                 DistrictMap.year == y_districts,
                 District.canton_uid == canton_uid,
@@ -283,16 +394,18 @@ async def get_geo_by_canton_preview(
     if y_communes is not None:
         # Les communes ne sont pas directement rattachées au canton.
         # On passe donc par leur district pour limiter la preview aux communes du canton.
+        cache, onclause, communes_geojson = geojson_cache_join("communes", CommuneMap.uid, CommuneMap.geometry)
         communes_fc = await _features_from_stmt(
             session,
             select(
-                geofunc.ST_AsGeoJSON(CommuneMap.geometry, maxdecimaldigits=5).label("geojson"),
+                communes_geojson.label("geojson"),
                 Commune.uid.label("uid"),
                 Commune.name.label("name"),
                 Commune.code.label("code"),
             )
             .join(CommuneMap.commune)
             .join(District, Commune.district_uid == District.uid)
+            .outerjoin(cache, onclause)
             .where(
                 CommuneMap.year == y_communes,
                 District.canton_uid == canton_uid,
@@ -304,10 +417,11 @@ async def get_geo_by_canton_preview(
         # Les lacs ne sont pas reliés aux cantons par une clé étrangère.
         # On les sélectionne donc spatialement : tout lac qui intersecte
         # la géométrie du canton est inclus dans la preview.
+        cache, onclause, lakes_geojson = geojson_cache_join("lakes", LakeMap.uid, LakeMap.geometry)
         lakes_fc = await _features_from_stmt(
             session,
             select(
-                geofunc.ST_AsGeoJSON(LakeMap.geometry, maxdecimaldigits=5).label("geojson"),
+                lakes_geojson.label("geojson"),
                 Lake.uid.label("uid"),
                 Lake.name.label("name"),
                 Lake.code.label("code"),
@@ -320,6 +434,7 @@ async def get_geo_by_canton_preview(
                     CantonMap.canton_uid == canton_uid,
                 ),
             )
+            .outerjoin(cache, onclause)
             .where(
                 LakeMap.year == y_lakes,
                 geofunc.ST_Intersects(LakeMap.geometry, CantonMap.geometry),
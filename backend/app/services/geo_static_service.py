@@ -0,0 +1,149 @@
+# Export statique des couches géo : une FeatureCollection par (couche, année,
+# niveau de détail), pré-compressée (.json.gz, .json.br) dans static/geo/.
+# La géométrie d'une année passée ne change qu'au ré-import géo : le frontend
+# (ou un reverse proxy) lit ces fichiers sans aucune requête en base.
+# Les noms contiennent le hash du contenu (cache navigateur "immutable") ;
+# le manifeste (manifest.json, /geo/static/manifest) indique lesquels utiliser :
+# "url" (<nom>.json, encodage négocié) ou une variante compressée explicite.
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+
+
+from app.core.geojson import dumps
+from app.core.paths import GEO_STATIC_DIR, GEO_STATIC_MANIFEST, GEO_STATIC_PUBLIC_PREFIX
+from app.repositories.data_version_repo import current_data_version
+from app.repositories.geometry_cache_repo import DEFAULT_PRECISION, DETAIL_TOLERANCES, MAP_LAYERS
+from app.services.geo_service import country_stmt, fc_for_layer, raw_fc_from_stmt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle : seuls les .json.gz sont produits
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+HASH_LENGTH = 16  # caractères hexadécimaux du sha256 dans le nom de fichier
+COUNTRY_YEAR = 0  # country n'a pas d'année : clé unique du manifeste
+ENCODINGS = ("br", "gz") if brotli is not None else ("gz",)  # extensions = clés du manifeste
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _compress(body: bytes) -> dict[str, bytes]:
+    """Variantes compressées (niveau max : calculées une fois, servies souvent)."""
+    out = {"gz": gzip.compress(body, compresslevel=9, mtime=0)}  # mtime=0 : sortie reproductible
+    if brotli is not None:
+        out["br"] = brotli.compress(body, quality=11)
+    return out
+
+
+async def _write_layer_file(root: Path, stem: str, fc: str) -> dict[str, Any]:
+    """Écrit <stem>.<hash>.json.gz/.br si absents ; entrée du manifeste."""
+    body = fc.encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()
+    name = f"{stem}.{digest[:HASH_LENGTH]}.json"
+
+    paths = {enc: root / f"{name}.{enc}" for enc in ENCODINGS}
+    if not all(p.exists() for p in paths.values()):
+        # compression CPU (plusieurs Mo pour les communes en "full") : hors de la boucle asyncio
+        compressed = await asyncio.to_thread(_compress, body)
+        for enc, data in compressed.items():
+            _write_atomic(paths[enc], data)
+
+    # url : <nom>.json, servi dans l'encodage accepté par le client (voir core.static_files)
+    entry: dict[str, Any] = {"url": f"{GEO_STATIC_PUBLIC_PREFIX}/{name}", "sha256": digest, "bytes": len(body)}
+    for enc, path in paths.items():
+        entry[enc] = {"url": f"{GEO_STATIC_PUBLIC_PREFIX}/{path.name}", "bytes": path.stat().st_size}
+    return entry
+
+
+async def _layer_years(session: AsyncSession) -> dict[str, list[int]]:
+    years: dict[str, list[int]] = {}
+    for key, layer in MAP_LAYERS.items():
+        if not layer.versioned:
+            years[key] = [COUNTRY_YEAR]
+            continue
+        model = layer.map_model
+        stmt = select(model.year).distinct().order_by(model.year)
+        years[key] = [int(y) for y in (await session.execute(stmt)).scalars()]
+    return years
+
+
+def _purge_unreferenced(root: Path, keep: set[str]) -> int:
+    removed = 0
+    for path in root.iterdir():
+        if path.is_file() and path.name not in keep and path.name != GEO_STATIC_MANIFEST.name:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+async def export_static_layers(session: AsyncSession, root: Path = GEO_STATIC_DIR) -> dict[str, Any]:
+    """
+    Exporte toutes les couches (toutes années de carte, tous niveaux de détail)
+    puis écrit le manifeste et supprime les fichiers qui n'y figurent plus.
+    Un fichier dont le contenu n'a pas changé n'est pas réécrit (même nom).
+
+    Manifeste :
+        {"data_version", "generated_at", "precision", "encodings",
+         "layers": {couche: {année: {détail: {"url", "sha256", "bytes",
+                                              "gz": {"url", "bytes"}, "br": {...}}}}}}
+    (année "0" pour country, qui n'est pas versionné)
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    layers: dict[str, dict[str, dict[str, Any]]] = {}
+    keep: set[str] = set()
+
+    for layer, years in (await _layer_years(session)).items():
+        for year in years:
+            for detail in DETAIL_TOLERANCES:
+                if layer == "country":
+                    fc = await raw_fc_from_stmt(session, country_stmt(detail), ("uid",))
+                else:
+                    fc = await fc_for_layer(session, layer, year, detail)
+                entry = await _write_layer_file(root, f"{layer}-{year}-{detail}", fc)
+                layers.setdefault(layer, {}).setdefault(str(year), {})[detail] = entry
+                keep.update(Path(entry[enc]["url"]).name for enc in ENCODINGS)
+
+    manifest = {
+        "data_version": await current_data_version(session),
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "precision": DEFAULT_PRECISION,
+        "encodings": list(ENCODINGS),
+        "layers": layers,
+    }
+    _write_atomic(root / GEO_STATIC_MANIFEST.name, dumps(manifest).encode("utf-8"))
+    removed = _purge_unreferenced(root, keep)
+    logger.info("Static geo export: %d files referenced, %d stale files removed", len(keep), removed)
+    return manifest
+
+
+def read_manifest(path: Path = GEO_STATIC_MANIFEST) -> Optional[bytes]:
+    """Manifeste (JSON déjà sérialisé) ou None si l'export n'a jamais tourné."""
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
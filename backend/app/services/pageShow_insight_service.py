@@ -9,6 +9,7 @@ from app.models.question_global import QuestionGlobal
 from app.models.question_global_option_association import QuestionGlobalOptionAssociation
 from app.models.question_option_association import QuestionOptionAssociation
 from app.models.question_per_survey import QuestionPerSurvey
+from app.repositories.geometry_cache_repo import DEFAULT_DETAIL
 from app.repositories.pageShow_insights_repo import (
     count_by_column,
     count_by_columns,
@@ -22,6 +23,7 @@ from app.repositories.pageShow_insights_repo import (
     get_district_focus_feature,
     get_survey_year_by_uid,
 )
+from app.schemas.geo import GeometryDetail
 from app.schemas.pageAll import EntityEnum
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -30,11 +32,13 @@ def _entity_value(entity: EntityEnum | str) -> str:
     return entity.value if hasattr(entity, "value") else str(entity)
 
 
-async def build_map(entity: EntityEnum | str, obj: Any, db: AsyncSession) -> Optional[Dict[str, Any]]:
+async def build_map(
+    entity: EntityEnum | str, obj: Any, db: AsyncSession, detail: GeometryDetail = DEFAULT_DETAIL
+) -> Optional[Dict[str, Any]]:
     e = _entity_value(entity)
 
     if e == "commune":
-        focus = await get_commune_focus_feature(db, obj.uid)
+        focus = await get_commune_focus_feature(db, obj.uid, detail=detail)
         if not focus:
             return None
 
@@ -42,12 +46,12 @@ async def build_map(entity: EntityEnum | str, obj: Any, db: AsyncSession) -> Opt
             "type": "geo-focus",
             "level": "commune",
             "focus_feature": focus,
-            "context_features": await get_all_canton_features(db),
+            "context_features": await get_all_canton_features(db, detail=detail),
             "child_layers": [],
         }
 
     if e == "district":
-        focus = await get_district_focus_feature(db, obj.uid)
+        focus = await get_district_focus_feature(db, obj.uid, detail=detail)
         if not focus:
             return None
 
@@ -55,12 +59,12 @@ async def build_map(entity: EntityEnum | str, obj: Any, db: AsyncSession) -> Opt
             "type": "geo-focus",
             "level": "district",
             "focus_feature": focus,
-            "context_features": await get_all_canton_features(db),
-            "child_layers": await build_child_layers(entity, obj, db),
+            "context_features": await get_all_canton_features(db, detail=detail),
+            "child_layers": await build_child_layers(entity, obj, db, detail=detail),
         }
 
     if e == "canton":
-        focus = await get_canton_focus_feature(db, obj.uid)
+        focus = await get_canton_focus_feature(db, obj.uid, detail=detail)
         if not focus:
             return None
 
@@ -68,12 +72,12 @@ async def build_map(entity: EntityEnum | str, obj: Any, db: AsyncSession) -> Opt
             "type": "geo-focus",
             "level": "canton",
             "focus_feature": focus,
-            "context_features": await get_all_canton_features(db),
-            "child_layers": await build_child_layers(entity, obj, db),
+            "context_features": await get_all_canton_features(db, detail=detail),
+            "child_layers": await build_child_layers(entity, obj, db, detail=detail),
         }
 
     if e == "answer":
-        focus = await get_commune_focus_feature(db, obj.commune_uid, obj.year)
+        focus = await get_commune_focus_feature(db, obj.commune_uid, obj.year, detail=detail)
         if not focus:
             return None
 
@@ -81,7 +85,7 @@ async def build_map(entity: EntityEnum | str, obj: Any, db: AsyncSession) -> Opt
             "type": "geo-focus",
             "level": "commune",
             "focus_feature": focus,
-            "context_features": await get_all_canton_features(db),
+            "context_features": await get_all_canton_features(db, detail=detail),
             "child_layers": [],
         }
 
@@ -351,13 +355,15 @@ def _is_geo_entity(entity: str) -> bool:
     return entity in {"commune", "district", "canton"}
 
 
-async def build_child_layers(entity: EntityEnum | str, obj: Any, db: AsyncSession) -> list[dict]:
+async def build_child_layers(
+    entity: EntityEnum | str, obj: Any, db: AsyncSession, detail: GeometryDetail = DEFAULT_DETAIL
+) -> list[dict]:
     e = _entity_value(entity)
 
     layers: list[dict] = []
 
     if e == "district":
-        features = await get_all_commune_features_for_district(db, obj.uid)
+        features = await get_all_commune_features_for_district(db, obj.uid, detail=detail)
         if features:
             layers.append(
                 {
@@ -369,7 +375,7 @@ async def build_child_layers(entity: EntityEnum | str, obj: Any, db: AsyncSessio
             )
 
     if e == "canton":
-        features = await get_all_district_features_for_canton(db, obj.uid)
+        features = await get_all_district_features_for_canton(db, obj.uid, detail=detail)
         if features:
             layers.append(
                 {
@@ -383,8 +389,10 @@ async def build_child_layers(entity: EntityEnum | str, obj: Any, db: AsyncSessio
     return layers
 
 
-async def build_insights(entity: EntityEnum | str, obj: Any, db: AsyncSession) -> Optional[Dict[str, Any]]:
-    map_data = await build_map(entity, obj, db)
+async def build_insights(
+    entity: EntityEnum | str, obj: Any, db: AsyncSession, detail: GeometryDetail = DEFAULT_DETAIL
+) -> Optional[Dict[str, Any]]:
+    map_data = await build_map(entity, obj, db, detail=detail)
     stats = await build_stats(entity, obj, db)
 
     has_stats = bool(stats and stats.get("items"))
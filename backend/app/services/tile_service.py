@@ -0,0 +1,159 @@
+# Tuiles vectorielles (Mapbox Vector Tile) des couches administratives.
+# Le client ne charge que les tuiles visibles au zoom courant au lieu des
+# FeatureCollections complètes de /geo/by_year. ST_AsMVTGeom découpe et
+# quantifie les géométries sur la grille de la tuile (simplification implicite).
+from typing import Any, Optional
+
+
+from app.core.tile_cache import read_cached_file, tile_path, write_cached_file
+from app.models.canton import Canton
+from app.models.commune import Commune
+from app.models.district import District
+from app.models.lake import Lake
+from app.repositories.data_version_repo import current_data_version
+from app.repositories.geo_year_index_repo import get_geo_year_index
+from app.repositories.geometry_cache_repo import MAP_LAYERS
+from app.schemas.choropleth import ChoroplethGranularity, ChoroplethUnitValue
+from app.schemas.geo import TileLayer
+from app.services.choropleth_service import build_choropleth_cached, features_to_values
+from sqlalchemy import bindparam, func, Integer, LargeBinary, literal_column, select, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+MVT_EXTENT = 4096  # résolution de la grille d'une tuile
+MVT_BUFFER = 64  # marge autour de la tuile (évite les coutures aux bords)
+MAX_TILE_ZOOM = 16
+WEB_MERCATOR_SRID = 3857
+
+# couche -> modèle d'unité (propriétés uid/name/code) ; country n'a que son uid
+_TILE_UNITS: dict[str, Any] = {
+    "communes": Commune,
+    "districts": District,
+    "cantons": Canton,
+    "lakes": Lake,
+    "country": None,
+}
+
+# couche -> granularité choroplèthe (valeurs attachables aux features)
+TILE_GRANULARITY: dict[str, ChoroplethGranularity] = {
+    "communes": "commune",
+    "districts": "district",
+    "cantons": "canton",
+}
+
+
+class TileValues:
+    """Valeurs choroplèthes d'une (question, année) à attacher aux features d'une tuile."""
+
+    def __init__(self, scope: str, question_uid: int, year: int):
+        self.scope = scope
+        self.question_uid = question_uid
+        self.year = year
+
+    @property
+    def cache_key(self) -> str:
+        return f"values-{self.scope}-{self.question_uid}-{self.year}"
+
+
+def _values_table(values: dict[int, ChoroplethUnitValue]) -> Any:
+    """Table dérivée (unit_uid, value, value_kind, fill_color) : unnest de 4 tableaux liés (4 paramètres)."""
+    uids = list(values)
+    return (
+        func.unnest(
+            bindparam("vals_uid", uids, type_=ARRAY(Integer)),
+            bindparam("vals_value", [values[u].value for u in uids], type_=ARRAY(String)),
+            bindparam("vals_kind", [values[u].value_kind for u in uids], type_=ARRAY(String)),
+            bindparam("vals_color", [values[u].fill_color for u in uids], type_=ARRAY(String)),
+        )
+        .table_valued("unit_uid", "value", "value_kind", "fill_color")
+        .render_derived(name="vals")
+    )
+
+
+def _tile_stmt(
+    layer: TileLayer,
+    map_year: Optional[int],
+    z: int,
+    x: int,
+    y: int,
+    values: Optional[dict[int, ChoroplethUnitValue]] = None,
+) -> Any:
+    map_layer = MAP_LAYERS[layer]
+    model = map_layer.map_model
+    unit_model = _TILE_UNITS[layer]
+
+    envelope = func.ST_TileEnvelope(z, x, y)
+    # filtre dans le SRID de stockage : l'index spatial de la table reste utilisable
+    bbox = func.ST_Transform(envelope, map_layer.srid)
+    mvt_geom = func.ST_AsMVTGeom(
+        func.ST_Transform(model.geometry, WEB_MERCATOR_SRID), envelope, MVT_EXTENT, MVT_BUFFER, True
+    )
+
+    rows = select(map_layer.unit_col.label("uid"), mvt_geom.label("geom")).where(
+        func.ST_Intersects(model.geometry, bbox)
+    )
+    if unit_model is not None:
+        rows = rows.add_columns(unit_model.name.label("name"), unit_model.code.label("code")).join(
+            unit_model, unit_model.uid == map_layer.unit_col
+        )
+    if map_layer.versioned:
+        rows = rows.where(model.year == map_year)
+    if values is not None:
+        vals = _values_table(values)
+        rows = rows.add_columns(vals.c.value, vals.c.value_kind, vals.c.fill_color).outerjoin(
+            vals, vals.c.unit_uid == map_layer.unit_col
+        )
+
+    sub = rows.subquery("mvtgeom")
+    # ST_AsMVT(mvtgeom, ...) : la ligne entière du sous-select devient les propriétés
+    mvt = func.ST_AsMVT(literal_column(sub.name), layer, MVT_EXTENT, "geom", type_=LargeBinary)
+    return select(mvt).select_from(sub)
+
+
+async def get_tile(
+    db: AsyncSession,
+    layer: TileLayer,
+    year: int,
+    z: int,
+    x: int,
+    y: int,
+    values: Optional[TileValues] = None,
+) -> bytes:
+    """
+    Tuile MVT d'une couche pour l'année de carte la plus récente <= year
+    (même règle que /geo/by_year), lue depuis le cache disque si possible.
+    values : attache value / value_kind / fill_color de la carte choroplèthe.
+    """
+    map_layer = MAP_LAYERS[layer]
+    map_year: Optional[int] = None
+    if map_layer.versioned:
+        map_year = (await get_geo_year_index(db)).latest(layer, year)
+        if map_year is None:
+            return b""
+
+    version = await current_data_version(db)
+    key = f"{layer}/{map_year if map_year is not None else 0}"
+    if values is not None:
+        key += f"/{values.cache_key}"
+    path = tile_path(version, key, z, x, y)
+    cached = read_cached_file(path)
+    if cached is not None:
+        return cached
+
+    unit_values = None
+    if values is not None:
+        feats, _legend, _meta = await build_choropleth_cached(
+            db,
+            scope=values.scope,
+            question_uid=values.question_uid,
+            year=values.year,
+            granularity=TILE_GRANULARITY[layer],
+            with_geometry=False,
+        )
+        unit_values = features_to_values(feats)
+
+    data = (await db.execute(_tile_stmt(layer, map_year, z, x, y, unit_values))).scalar_one_or_none() or b""
+    data = bytes(data)
+    write_cached_file(path, data)
+    return data